@@ -1,5 +1,6 @@
 #!venv/bin/python
 from functions import set_up_logging, upload_data, abort
+from modulefile import LUA_SUFFIX, ModuleFileSyntaxError, parse_modulefile
 import re
 import os
 import datetime
@@ -9,13 +10,6 @@ import logging
 logger = logging.getLogger()
 
 
-# For parsing the module contents
-re_homepage = re.compile(r"module-whatis \{Homepage:(.*?)\}")
-re_description = re.compile(r"module-whatis \{Description:(.*?)\}", re.DOTALL)
-re_extensions = re.compile(r"module-whatis \{Extensions:(.*?)\}", re.DOTALL)
-re_multideps = re.compile(r"module-whatis \{Compatible modules:(.*?)\}", re.DOTALL)
-re_dependencies = re.compile(r"^\s*module load *(.*?)\s*\n", re.MULTILINE)
-
 # For parsing the filename
 if os.path.exists("/bask/apps"):
     re_filename_eb = re.compile(r"^/bask/apps/([^/]+)/([^/]+)/modules/all/([^/]+)/(.*)$")
@@ -23,49 +17,82 @@ else:
     re_filename_eb = re.compile(r"^/rds/bear-apps/([^/]+)/([^/]+)/modules/all/([^/]+)/(.*)$")
 
 
-def add_module(module_file, skip_deps):
+def parse_module(module_file, skip_deps, text=None):
     """
-    Add info from this module file (TCL) to the database - unless
-    it already exists.
+    Parse this module file (Tcl, or Lua if it ends in .lua) into the keyword arguments used by upload_data
 
     @param module_file: (txt) full path filename
+    @param text: (txt) contents of the module file, if already read
     """
-    with open(module_file) as f:
-        tcl = f.read()
+    if text is None:
+        with open(module_file) as f:
+            text = f.read()
+
+    try:
+        module = parse_modulefile(module_file, text)
+    except ModuleFileSyntaxError as e:
+        # keeping the fields parsed before the error
+        logger.warning("Couldn't parse all of %s: %s", module_file, e)
+        module = e.module
 
     data = {}
-    for vbl, regex in [('home', re_homepage),
-                       ('desc', re_description),
-                       ('ext', re_extensions)]:
-        try:
-            data[vbl] = regex.findall(tcl)[0].strip()
-        except Exception:
+    for vbl, value in [('home', module.homepage),
+                       ('desc', module.description),
+                       ('ext', module.extensions)]:
+        if value is None:
             logger.info("Couldn't get %s", vbl)
+        else:
+            data[vbl] = value
 
     if skip_deps:
         data['deps'] = None
     else:
-        try:
-            data['deps'] = re_dependencies.findall(tcl)
-            multideps = re_multideps.findall(tcl)[0].replace(',', '').split()
-            for dep in multideps:
-                if '(default)' not in dep:
-                    data['deps'].append(dep.strip())
-        except Exception as e:
-            logger.info(f"Couldn't get deps with exception: {repr(e)}")
+        data['deps'] = module.loads + module.compatible
+
+    data.update(parse_module_path(module_file))
+    data['created'], data['modified'] = module_file_times(module_file)
 
+    return data
+
+
+def parse_module_path(module_file):
+    """
+    Returns the keyword arguments for upload_data that come from the path of this module file,
+    i.e. none if it isn't in a recognised module tree
+
+    @param module_file: (txt) full path filename
+    """
+    data = {}
     filename_match = re_filename_eb.match(module_file)
     if filename_match:
         data['bav_family'] = filename_match.group(1)
         data['arch'] = filename_match.group(2)
         data['name'] = filename_match.group(3)
         data['version'] = filename_match.group(4)
+        if data['version'].endswith(LUA_SUFFIX):
+            data['version'] = data['version'][:-len(LUA_SUFFIX)]
         data['module_load'] = '%s/%s' % (data['name'], data['version'])
+    return data
+
 
+def module_file_times(module_file):
+    """
+    Returns the (created, modified) times of this module file
+    """
     timezone = pytz.timezone("Europe/London")
     stat = os.stat(module_file)
-    data['created'] = timezone.localize(datetime.datetime.fromtimestamp(stat.st_ctime))
-    data['modified'] = timezone.localize(datetime.datetime.fromtimestamp(stat.st_mtime))
+    return (timezone.localize(datetime.datetime.fromtimestamp(stat.st_ctime)),
+            timezone.localize(datetime.datetime.fromtimestamp(stat.st_mtime)))
+
+
+def add_module(module_file, skip_deps):
+    """
+    Add info from this module file (Tcl or Lua) to the database - unless
+    it already exists.
+
+    @param module_file: (txt) full path filename
+    """
+    data = parse_module(module_file, skip_deps)
 
     try:
         upload_data(**data)
@@ -0,0 +1,133 @@
+#!venv/bin/python
+from functions import set_up_logging
+from add_module_info import module_file_times, parse_module_path
+from add_module_tree import BATCH_SIZE, batches, upload_batch
+from modulefile import parse_whatis
+import os
+import json
+import datetime
+import pytz
+
+import logging
+logger = logging.getLogger(__name__)
+
+READ_SIZE = 1024 * 1024
+
+
+def read_json_array(f, read_size=READ_SIZE):
+    """
+    Yield each item of the JSON array in the file f, reading it in chunks rather than all at once
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    started = False
+    eof = False
+    while True:
+        # skip whitespace and the punctuation between items
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,[':
+            if buffer[pos] == '[':
+                if started:
+                    break
+                started = True
+            pos += 1
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
+        if pos < len(buffer):
+            if not started:
+                raise ValueError("Expected a JSON array")
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield item
+                pos = end
+                continue
+        if eof:
+            raise ValueError("Unexpected end of JSON array")
+        chunk = f.read(read_size)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+
+def spider_records(packages, timestamps=None):
+    """
+    Yield (path, data) for each module in the packages from 'spider -o jsonSoftwarePage', where data is the
+    keyword arguments for upload_data, without any dependencies: spider doesn't record the modules that are
+    loaded, and setting the dependencies replaces those set from the module files.
+
+    The spider output doesn't include the times of the module files, so these are timestamps, a
+    (created, modified) tuple, unless it is None, in which case each module file is stat'd.
+    """
+    for package in packages:
+        for version in package.get('versions', []):
+            path = version.get('path', '')
+            module = parse_whatis(version.get('whatis', []))
+            data = {}
+
+            home = module.homepage or version.get('url') or package.get('url')
+            desc = module.description or version.get('description') or package.get('description')
+            for vbl, value in [('home', home),
+                               ('desc', desc),
+                               ('ext', module.extensions)]:
+                if value is None:
+                    logger.debug("Couldn't get %s for %s", vbl, path)
+                else:
+                    data[vbl] = value.strip()
+
+            data.update(parse_module_path(path))
+
+            if timestamps is None:
+                try:
+                    data['created'], data['modified'] = module_file_times(path)
+                except OSError as e:
+                    logger.warning("Skipping %s as it can't be read. Error: %s", path, e)
+                    continue
+            else:
+                data['created'], data['modified'] = timestamps
+
+            yield path, data
+
+
+def load_spider(filename, batch_size=BATCH_SIZE, spider_times=False):
+    """
+    Add every module in the output of Lmod's 'spider -o jsonSoftwarePage' to the database, in batched
+    transactions, without parsing the module files themselves.
+
+    The created and modified times of each module are those of its module file, unless spider_times is True,
+    in which case they are all those of the spider output.
+    """
+    timestamps = None
+    if spider_times:
+        timezone = pytz.timezone("Europe/London")
+        mtime = timezone.localize(datetime.datetime.fromtimestamp(os.stat(filename).st_mtime))
+        timestamps = (mtime, mtime)
+
+    uploaded = 0
+    with open(filename) as f:
+        records = spider_records(read_json_array(f), timestamps=timestamps)
+        for batch in batches(records, batch_size):
+            _, batch_uploaded = upload_batch([(path, None, data) for path, data in batch])
+            uploaded += len(batch_uploaded)
+
+    logger.info("Loaded %d modules from %s", uploaded, filename)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Add info from the output of Lmod's 'spider -o jsonSoftwarePage' "
+                                                 "to the bear_apps_docs database")
+    parser.add_argument('-v', '--verbose', action='store_true', help='Turn on debugging output')
+    parser.add_argument('-b', '--batch-size', type=int, default=BATCH_SIZE,
+                        help='Number of modules uploaded in each transaction')
+    parser.add_argument('--spider-times', action='store_true',
+                        help='Use the time of the spider output for every module, rather than stat each module file')
+    parser.add_argument('filename', help='Output of e.g. $LMOD_DIR/spider -o jsonSoftwarePage $MODULEPATH')
+    args = parser.parse_args()
+
+    set_up_logging(args.verbose)
+
+    load_spider(args.filename, batch_size=args.batch_size, spider_times=args.spider_times)
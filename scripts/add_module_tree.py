@@ -0,0 +1,277 @@
+#!venv/bin/python
+from functions import set_up_logging, set_dependencies_batch, upload_data, upload_data_batch
+from add_module_info import module_file_times, parse_module, parse_module_path
+from manifest import Manifest, content_hash
+from bear_applications.signals import deferred_updates
+import os
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from django.db import connections, transaction
+
+import logging
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+
+def find_module_files(directory):
+    """
+    Walk a modules/all tree (e.g. /rds/bear-apps/2022a/EL8-icelake/modules/all) and yield the full path
+    of every module file in it, skipping hidden files such as .modulerc
+    """
+    with os.scandir(directory) as it:
+        entries = sorted(it, key=lambda e: e.name)
+
+    for entry in entries:
+        if entry.name.startswith('.'):
+            continue
+        if entry.is_dir():
+            yield from find_module_files(entry.path)
+        elif entry.is_file():
+            yield entry.path
+
+
+def batches(iterable, size):
+    """
+    Split iterable into lists of at most size items
+    """
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _map(func, items, jobs):
+    """
+    Yield func(item) for each of items, in order, in a pool of jobs processes
+    """
+    if jobs == 1:
+        yield from map(func, items)
+        return
+
+    # the workers don't use the database, so don't let them inherit an open connection
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(func, items, chunksize=64)
+
+
+def _hash_module(module_file):
+    """
+    Returns the hash of the contents of a module file, and the key it is grouped by with the identical
+    module files under other architectures: its name and version and the hash of its contents with
+    the architecture masked out of any paths. The key is None if the path isn't in a recognised tree.
+    """
+    with open(module_file, 'rb') as f:
+        content = f.read()
+    digest = content_hash(content)
+    path = parse_module_path(module_file)
+    if 'name' not in path:
+        return digest, None
+    normalized = content.replace(('/%s/' % path['arch']).encode(), b'/\0/')
+    return digest, (path['name'], os.path.basename(module_file), content_hash(normalized))
+
+
+def _read_and_parse(module_file, skip_deps):
+    """
+    Read and parse a module file, returning the data for upload_data
+    """
+    with open(module_file, 'rb') as f:
+        content = f.read()
+    return parse_module(module_file, skip_deps, text=content.decode())
+
+
+def _mentions_arch(data):
+    """
+    True if the parsed data of a module file includes its architecture, so can't be shared with the
+    same module file under other architectures
+    """
+    arch = data.get('arch')
+    if arch is None:
+        return False
+    values = [data.get(vbl) for vbl in ('home', 'desc', 'ext')] + list(data.get('deps') or [])
+    return any(arch in value for value in values if value)
+
+
+def _parse_all(groups, skip_deps, jobs):
+    """
+    Parse the first module file of each group of identical module files, in a pool of jobs processes,
+    and yield (module_file, data) for every module file in the groups, in order
+    """
+    parse = functools.partial(_read_and_parse, skip_deps=skip_deps)
+    for group, data in zip(groups, _map(parse, [group[0] for group in groups], jobs)):
+        yield group[0], data
+        shared = not _mentions_arch(data)
+        for module_file in group[1:]:
+            if shared:
+                member = dict(data, **parse_module_path(module_file))
+                member['created'], member['modified'] = module_file_times(module_file)
+            else:
+                member = parse(module_file)
+            yield module_file, member
+
+
+def upload_batch(batch):
+    """
+    Upload a batch of parsed module files in one transaction.
+    Returns a list of (Version, deps) for the versions that have dependencies to set, and a list
+    of (module_file, hash, Version) for the module files that were uploaded.
+    """
+    to_upload = []
+    for module_file, digest, data in batch:
+        if 'name' not in data:
+            logger.warning("Skipping %s as it is not in a recognised module tree", module_file)
+            continue
+        # a copy, as the parsed data can be shared by the module files of a group, see _parse_all
+        data = dict(data)
+        deps = data.pop('deps', None)
+        to_upload.append((module_file, digest, data, deps))
+    if not to_upload:
+        return [], []
+
+    try:
+        with transaction.atomic():
+            versions = upload_data_batch([data for _, _, data, _ in to_upload])
+    except Exception as e:
+        logger.error("Unable to upload batch, uploading one at a time. Error: %s", e)
+        versions = []
+        # what is worked out from the versions is brought up to date once, for all of them
+        with deferred_updates():
+            for module_file, _, data, _ in to_upload:
+                try:
+                    with transaction.atomic():
+                        versions.append(upload_data(**data))
+                except Exception as e:
+                    logger.error("Unable to upload data for %s. Error: %s", module_file, e)
+                    versions.append(None)
+
+    to_link = {}
+    uploaded = []
+    for ver, (module_file, digest, _, deps) in zip(versions, to_upload):
+        if ver is None:
+            continue
+        if deps:
+            # the same version under several architectures can load different modules under each, e.g.
+            # CUDA only where there are GPUs, so it has the dependencies of all of them
+            linked = to_link.setdefault(ver.pk, (ver, []))[1]
+            for dep in deps:
+                if dep not in linked:
+                    linked.append(dep)
+        uploaded.append((module_file, digest, ver))
+    return list(to_link.values()), uploaded
+
+
+def load_tree(directory, skip_deps=False, jobs=None, batch_size=BATCH_SIZE, manifest=None):
+    """
+    Add every module file under directory to the database, see load_trees
+    """
+    load_trees([directory], skip_deps=skip_deps, jobs=jobs, batch_size=batch_size, manifest=manifest)
+
+
+def load_trees(directories, skip_deps=False, jobs=None, batch_size=BATCH_SIZE, manifest=None):
+    """
+    Add every module file under the directories, e.g. the modules/all of each architecture of a
+    BEAR Apps Version, to the database.
+
+    The files are hashed and parsed in parallel and then written from this process in batched
+    transactions. A module file that is identical, apart from the architecture in its paths, to one
+    under another architecture is only parsed once, and gives one Version with a Link for each.
+    Dependencies are set once everything has been uploaded, so the order of the walk does not matter,
+    and any that are not in the database are reported rather than aborting.
+
+    If a Manifest is given then module files with the same mtime and size, or the same contents, as
+    when they were last uploaded are skipped, and the manifest is updated once everything is uploaded.
+    A module file whose version has dependencies that are not in the database is not recorded, so that
+    it is uploaded again next time, when they may be.
+    """
+    directories = [os.path.realpath(directory) for directory in directories]
+    module_files = []
+    for directory in directories:
+        found = list(find_module_files(directory))
+        logger.info("Found %d module files in %s", len(found), directory)
+        if manifest is not None:
+            manifest.prune(directory, set(found))
+        module_files.extend(found)
+
+    uploaded = load_module_files(module_files, skip_deps=skip_deps, jobs=jobs, batch_size=batch_size,
+                                 manifest=manifest)
+    logger.info("Loaded %d module files from %s", uploaded, ', '.join(directories))
+
+
+def load_module_files(module_files, skip_deps=False, jobs=None, batch_size=BATCH_SIZE, manifest=None):
+    """
+    Add the module files to the database, as for load_trees, returning the number that were uploaded
+    """
+    stats = {}
+    to_hash = module_files
+    if manifest is not None:
+        to_hash = []
+        for module_file in module_files:
+            stats[module_file] = os.stat(module_file)
+            if not manifest.unchanged(module_file, stats[module_file]):
+                to_hash.append(module_file)
+        logger.info("%d module files are unchanged since the last run", len(module_files) - len(to_hash))
+
+    digests = {}
+    groups = {}
+    for module_file, (digest, key) in zip(to_hash, _map(_hash_module, to_hash, jobs)):
+        if manifest is not None and manifest.same_content(module_file, digest):
+            # only touched
+            manifest.record(module_file, stats[module_file], digest)
+            continue
+        digests[module_file] = digest
+        groups.setdefault(module_file if key is None else key, []).append(module_file)
+    groups = list(groups.values())
+    logger.info("Parsing %d distinct module files for %d module files", len(groups), len(digests))
+
+    to_link = []
+    uploaded = []
+    for batch in batches(_parse_all(groups, skip_deps, jobs), batch_size):
+        batch_to_link, batch_uploaded = upload_batch([(module_file, digests[module_file], data)
+                                                      for module_file, data in batch])
+        to_link.extend(batch_to_link)
+        uploaded.extend(batch_uploaded)
+
+    unresolved = []
+    if to_link:
+        unresolved = set_dependencies_batch(to_link)
+
+    if manifest is not None:
+        retry = {ver.pk for ver, _ in unresolved}
+        for module_file, digest, ver in uploaded:
+            if ver.pk in retry:
+                logger.info("Not recording %s in the manifest, as some of its dependencies could not be found",
+                            module_file)
+                manifest.forget(module_file)
+                continue
+            manifest.record(module_file, stats[module_file], digest)
+        manifest.save()
+
+    return len(uploaded)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Add info from all the modules in a directory to the bear_apps_docs '
+                                                 'database')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Turn on debugging output')
+    parser.add_argument('-s', '--skip-deps', action='store_true', help='Skip adding dependency relationships')
+    parser.add_argument('-j', '--jobs', type=int,
+                        help='Number of processes used to parse the module files (default: number of CPUs)')
+    parser.add_argument('-b', '--batch-size', type=int, default=BATCH_SIZE,
+                        help='Number of module files uploaded in each transaction')
+    parser.add_argument('-m', '--manifest',
+                        help='Manifest file recording the module files already uploaded. If given, only new or '
+                             'changed module files are uploaded')
+    parser.add_argument('directories', nargs='+', metavar='directory',
+                        help='Full path to the modules directory, e.g. /rds/bear-apps/2022a/EL8-icelake/modules/all. '
+                             'Module files that are the same under several directories are only parsed once')
+    args = parser.parse_args()
+
+    set_up_logging(args.verbose)
+
+    load_trees(args.directories, skip_deps=args.skip_deps, jobs=args.jobs, batch_size=args.batch_size,
+               manifest=Manifest(args.manifest) if args.manifest else None)
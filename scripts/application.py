@@ -1,6 +1,5 @@
 #!venv/bin/python
 import logging
-from packaging.version import parse as parse_version
 from functions import abort, get_application, set_up_logging
 
 from bear_applications.models import Version
@@ -50,8 +49,8 @@ def show_order(*, application):
     Show the order of the versions of the application
     """
     logger.info("Application: %s", application.name)
-    versions = Version.objects.filter(application=application, reason_to_hide=None)
-    versions = sorted(versions, key=lambda k: (k.app_sort_order, parse_version(k.version)), reverse=True)
+    versions = (Version.objects.filter(application=application, reason_to_hide=None)
+                               .order_by('-app_sort_order', '-version_sort_key', '-version'))
     for ver in versions:
         logger.info("    %s (%s)", ver.version, ver.app_sort_order)
 
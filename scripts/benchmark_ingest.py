@@ -0,0 +1,136 @@
+#!venv/bin/python
+"""
+Benchmark loading module files into the database, using a synthetic module tree (see synthetic_modules.py)
+and a throwaway copy of the database, e.g.
+
+    ./benchmark_ingest.py --bavs 2 --archs 6 --apps 500
+
+This times parsing, add_module, upload_data and set_dependencies on each module file in turn, and a
+full load of the tree with add_module_tree.py, and reports the files per second, database queries per
+file and the peak RSS so far, of this process or of the processes parsing in parallel. With SQLite the
+throwaway database is a file in a temporary directory.
+"""
+import framework  # NOQA
+import argparse
+import logging
+import os
+import resource
+import tempfile
+import time
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+
+import add_module_info
+from add_module_info import add_module, parse_module
+from add_module_tree import load_trees
+from functions import set_dependencies, set_up_logging, upload_data
+from synthetic_modules import add_arguments, filename_regex, generate_tree, module_directories
+
+
+class QueryCounter:
+    """
+    Counts the queries run on a connection, see connection.execute_wrapper
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def peak_rss():
+    """
+    Returns the peak RSS, in MB, of this process or any of its children that have finished
+    """
+    return max(resource.getrusage(who).ru_maxrss for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)) / 1024
+
+
+def measure(func):
+    """
+    Run func, returning the seconds it took and the number of queries it ran
+    """
+    counter = QueryCounter()
+    with connection.execute_wrapper(counter):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+    return elapsed, counter.count
+
+
+def run_benchmarks(module_files, directories, jobs=None):
+    """
+    Yield (label, seconds, queries) for each benchmark, starting each that uses the database with it
+    empty. module_files must be in an order where each comes after those it loads.
+    """
+    call_command('flush', interactive=False, verbosity=0)
+    records = []
+    elapsed, queries = measure(lambda: records.extend(parse_module(module_file, False)
+                                                      for module_file in module_files))
+    yield 'parse_module', elapsed, queries
+
+    elapsed, queries = measure(lambda: [add_module(module_file, False) for module_file in module_files])
+    yield 'add_module', elapsed, queries
+
+    call_command('flush', interactive=False, verbosity=0)
+    to_link = []
+
+    def upload():
+        for data in records:
+            data = dict(data, deps=None)
+            to_link.append(upload_data(**data))
+
+    elapsed, queries = measure(upload)
+    yield 'upload_data', elapsed, queries
+
+    elapsed, queries = measure(lambda: [set_dependencies(ver, data['deps'])
+                                        for ver, data in zip(to_link, records) if data['deps']])
+    yield 'set_dependencies', elapsed, queries
+
+    call_command('flush', interactive=False, verbosity=0)
+    elapsed, queries = measure(lambda: load_trees(directories, jobs=jobs))
+    yield 'load_trees', elapsed, queries
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark loading a synthetic module tree into a throwaway '
+                                                 'database')
+    add_arguments(parser)
+    parser.add_argument('-v', '--verbose', action='store_true', help='Turn on debugging output')
+    parser.add_argument('-j', '--jobs', type=int,
+                        help='Number of processes used to parse the module files in load_trees '
+                             '(default: number of CPUs)')
+    parser.add_argument('-o', '--output', help='Directory to write the synthetic tree in, which is kept '
+                                               '(default: a temporary directory)')
+    args = parser.parse_args()
+
+    set_up_logging(args.verbose)
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+    # don't keep every query in memory
+    settings.DEBUG = False
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        base = os.path.realpath(args.output or tmpdir)
+        try:
+            module_files = generate_tree(base, args.bavs, args.archs, args.apps, args.seed)
+        except ValueError as e:
+            parser.error(str(e))
+        add_module_info.re_filename_eb = filename_regex(base)
+
+        old_name = connection.settings_dict['NAME']
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = os.path.join(tmpdir, 'benchmark.sqlite3')
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            print("%d module files (%d BEAR Apps Versions x %d architectures x %d apps) on %s"
+                  % (len(module_files), args.bavs, args.archs, args.apps, connection.vendor))
+            print("%-18s %10s %10s %14s %12s" % ('', 'seconds', 'files/s', 'queries/file', 'peak RSS MB'))
+            directories = module_directories(base, args.bavs, args.archs)
+            for label, elapsed, queries in run_benchmarks(module_files, directories, args.jobs):
+                print("%-18s %10.3f %10.1f %14.2f %12.1f"
+                      % (label, elapsed, len(module_files) / elapsed, queries / len(module_files), peak_rss()))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
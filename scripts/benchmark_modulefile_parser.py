@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""
+Compare the speed, and the results, of the modulefile parser against the regexes that add_module_info.py
+used to use, over a corpus of module files, e.g.
+
+    ./benchmark_modulefile_parser.py /rds/bear-apps/2022a/EL8-icelake/modules/all
+
+This does not need the database.
+"""
+import argparse
+import os
+import re
+import time
+
+from modulefile import parse_tcl
+
+# The regexes previously used by add_module_info.py
+re_homepage = re.compile(r"module-whatis \{Homepage:(.*?)\}")
+re_description = re.compile(r"module-whatis \{Description:(.*?)\}", re.DOTALL)
+re_extensions = re.compile(r"module-whatis \{Extensions:(.*?)\}", re.DOTALL)
+re_multideps = re.compile(r"module-whatis \{Compatible modules:(.*?)\}", re.DOTALL)
+re_dependencies = re.compile(r"^\s*module load *(.*?)\s*\n", re.MULTILINE)
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              '../src/apps-docs/bear_applications/tests/modulefiles')
+
+
+def legacy_parse(tcl):
+    """
+    Parse tcl with the previous regexes, returning (home, desc, ext, deps)
+    """
+    fields = []
+    for regex in (re_homepage, re_description, re_extensions):
+        found = regex.findall(tcl)
+        fields.append(found[0].strip() if found else None)
+    deps = re_dependencies.findall(tcl)
+    multideps = re_multideps.findall(tcl)
+    if multideps:
+        deps += [dep.strip() for dep in multideps[0].replace(',', '').split() if '(default)' not in dep]
+    return tuple(fields) + (deps,)
+
+
+def new_parse(tcl):
+    """
+    Parse tcl with modulefile.parse_tcl, returning (home, desc, ext, deps)
+    """
+    module = parse_tcl(tcl)
+    return module.homepage, module.description, module.extensions, module.loads + module.compatible
+
+
+def read_corpus(directory):
+    """
+    Returns {path: contents} of the (non hidden) module files under directory
+    """
+    corpus = {}
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        for name in files:
+            if name.startswith('.') or name.endswith('.lua'):
+                continue
+            path = os.path.join(root, name)
+            with open(path) as f:
+                corpus[path] = f.read()
+    return corpus
+
+
+def time_parser(parse, texts, repeat):
+    """
+    Returns the best time, in seconds, of repeat runs of parse over all of texts
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            parse(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the modulefile parser against the previous regexes')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='Number of timed runs, the best is reported')
+    parser.add_argument('-d', '--differences', action='store_true',
+                        help='Print the module files where the two parsers disagree')
+    parser.add_argument('directory', nargs='?', default=DEFAULT_CORPUS, help='Directory of module files')
+    args = parser.parse_args()
+
+    corpus = read_corpus(args.directory)
+    if not corpus:
+        parser.error("No module files found in %s" % args.directory)
+    texts = list(corpus.values())
+    size = sum(len(text) for text in texts)
+    print("%d module files, %.1f kB" % (len(texts), size / 1024))
+
+    for label, parse in [('regexes', legacy_parse), ('modulefile', new_parse)]:
+        elapsed = time_parser(parse, texts, args.repeat)
+        print("%-10s %8.3f ms %10.0f files/s %8.1f MB/s"
+              % (label, elapsed * 1000, len(texts) / elapsed, size / elapsed / 1e6))
+
+    differ = 0
+    for path, text in sorted(corpus.items()):
+        legacy, new = legacy_parse(text), new_parse(text)
+        if legacy != new:
+            differ += 1
+            if args.differences:
+                print(path)
+                for label, old, now in zip(('home', 'desc', 'ext', 'deps'), legacy, new):
+                    if old != now:
+                        print("  %s: %r -> %r" % (label, old, now))
+    print("%d module files parse differently" % differ)
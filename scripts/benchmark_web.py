@@ -0,0 +1,281 @@
+#!venv/bin/python
+"""
+Benchmark the website with a synthetic catalog (see synthetic_catalog.py) in a throwaway database, e.g.
+
+    ./benchmark_web.py --applications 5000 --versions 12 --clients 8 --output results.json
+
+This requests every page in urls.py, for a sample of the applications, versions, BEAR Apps Versions and
+architectures, from a number of clients at once, through the Django test client or, with --server, a local
+threaded WSGI server. For each page it reports the number of requests, the median, 95th and 99th percentile
+latency and the queries per request, with the peak RSS. The results can be saved as JSON with --output and
+compared with those of an earlier run with --compare.
+
+The pages are cached until the catalog changes (see caching.py), so each is requested --repeat times, the
+first rendering it and the others being answered from the cache. --no-cache renders every request.
+"""
+import framework  # NOQA
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import socketserver
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.urls import reverse
+from bear_applications import urls
+from bear_applications.models import Application, Link, Version
+
+from benchmark_ingest import peak_rss
+from functions import set_up_logging
+from synthetic_catalog import add_arguments, generate_catalog
+
+PERCENTILES = [50, 95, 99]
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def page_urls(samples, seed=0):
+    """
+    Returns [(URL name, URL)] for every page in urls.py, with samples of the pages that take arguments
+    """
+    rng = random.Random(seed)
+    versions = list(Version.objects.filter(is_visible=True, visible_link_count__gt=0)
+                                   .values_list('id', 'application__name', 'version'))
+    versions = rng.sample(versions, min(samples, len(versions)))
+    links = Link.objects.filter(version__in=[pk for pk, _, _ in versions], bearappsversion__hidden=False,
+                                architecture__hidden=False)
+    links = {version_id: (bav, arch) for version_id, bav, arch in
+             links.values_list('version_id', 'bearappsversion__displayed_name', 'architecture__displayed_name')}
+    names = list(Application.objects.filter(reason_to_hide=None).values_list('name', flat=True))
+    names = rng.sample(names, min(samples, len(names)))
+
+    pages = []
+    for pk, name, version in versions:
+        bav, arch = links[pk]
+        pages.append(('application_version',
+                      reverse('bear_applications:application_version',
+                              kwargs={'bavname': bav, 'name': name, 'version': version})))
+        pages.append(('old_application_version',
+                      reverse('bear_applications:old_application_version', kwargs={'name': name, 'version': version})))
+        pages.append(('api_version', reverse('bear_applications:api_version',
+                                             kwargs={'name': name, 'version': version})))
+        pages.append(('filter', reverse('bear_applications:filter', kwargs={'bearappsversion': bav, 'arch': arch})))
+        pages.append(('filter', reverse('bear_applications:filter', kwargs={'bearappsversion': bav})))
+        pages.append(('filter', reverse('bear_applications:filter', kwargs={'bearappsversion': 'all', 'arch': arch})))
+    for name in names:
+        pages.append(('application', reverse('bear_applications:application', kwargs={'name': name})))
+        pages.append(('search', reverse('bear_applications:search') + '?search=' + name[:4]))
+        pages.append(('api_versions', reverse('bear_applications:api_versions') + '?after=' + name))
+        pages.append(('api_applications', reverse('bear_applications:api_applications') + '?after=' + name))
+    for name in ['home', 'sitemap', 'applications', 'filter_options', 'cookies', 'help', 'latest-applications-feed',
+                 'api_dump']:
+        pages.append((name, reverse('bear_applications:' + name)))
+
+    missing = {pattern.name for pattern in urls.urlpatterns} - {name for name, _ in pages}
+    if missing:
+        logging.warning("Not benchmarking %s", ", ".join(sorted(missing)))
+    return pages
+
+
+class ClientRequester:
+    """
+    Requests pages through the Django test client, a client per thread
+    """
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def __call__(self, url):
+        """
+        Returns (seconds, status code, queries) for requesting url
+        """
+        if not hasattr(self.local, 'client'):
+            self.local.client = Client(raise_request_exception=False)
+        start = time.perf_counter()
+        try:
+            response = self.local.client.get(url)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+        except Exception:
+            # e.g. rendering the error page failed too
+            logging.exception("Requesting %s failed", url)
+            return time.perf_counter() - start, 500, None
+        elapsed = time.perf_counter() - start
+        return elapsed, response.status_code, response.wsgi_request.timing.queries
+
+    def close(self):
+        pass
+
+
+class ThreadingWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class ServerRequester:
+    """
+    Requests pages from a threaded WSGI server on localhost, getting the queries from the Server-Timing header
+    """
+
+    def __init__(self):
+        settings.SERVER_TIMING = True
+        self.server = make_server('127.0.0.1', 0, get_wsgi_application(), server_class=ThreadingWSGIServer,
+                                  handler_class=QuietHandler)
+        self.base = 'http://127.0.0.1:%d' % self.server.server_port
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def __call__(self, url):
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(self.base + url) as response:
+                response.read()
+                status, timing = response.status, response.headers.get('Server-Timing', '')
+        except urllib.error.HTTPError as e:
+            e.read()
+            status, timing = e.code, e.headers.get('Server-Timing', '')
+        elapsed = time.perf_counter() - start
+        match = SERVER_TIMING_QUERIES.search(timing)
+        return elapsed, status, int(match.group(1)) if match else None
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def percentile(values, percent):
+    """
+    Returns the percent percentile of the sorted values, by the nearest rank
+    """
+    return values[max(0, -(-len(values) * percent // 100) - 1)]
+
+
+def run_benchmark(requester, pages, clients=1, repeat=3):
+    """
+    Request each of pages repeat times, from clients threads at once. Returns {URL name: results}
+    """
+    requests = [page for page in pages for _ in range(repeat)]
+    if clients == 1:
+        timings = [requester(url) for _, url in requests]
+    else:
+        def request(url):
+            try:
+                return requester(url)
+            finally:
+                # as Django does at the end of each request, which the test client stops it doing
+                connections.close_all()
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            timings = list(executor.map(request, [url for _, url in requests]))
+
+    by_name = defaultdict(list)
+    for (name, _), timing in zip(requests, timings):
+        by_name[name].append(timing)
+    by_name['all'] = timings
+    results = {}
+    for name, timings in sorted(by_name.items()):
+        latencies = sorted(elapsed * 1000 for elapsed, _, _ in timings)
+        queries = [count for _, _, count in timings if count is not None]
+        results[name] = dict({'requests': len(timings),
+                              'errors': len([status for _, status, _ in timings if status >= 500]),
+                              'mean_queries': round(sum(queries) / len(queries), 1) if queries else None,
+                              'max_queries': max(queries) if queries else None},
+                             **{'p%d_ms' % percent: round(percentile(latencies, percent), 2)
+                                for percent in PERCENTILES})
+    return results
+
+
+def print_results(results, previous=None):
+    """
+    Print a table of the results, with the change in latency from previous if given
+    """
+    print("%-26s %8s %6s %9s %9s %9s %9s %9s"
+          % ('', 'requests', 'errors', 'p50 ms', 'p95 ms', 'p99 ms', 'queries', 'max'))
+    for name, result in results.items():
+        line = "%-26s %8d %6d %9.1f %9.1f %9.1f %9s %9s" % (
+            name, result['requests'], result['errors'], result['p50_ms'], result['p95_ms'], result['p99_ms'],
+            result['mean_queries'], result['max_queries'])
+        if previous and name in previous:
+            line += "   p95 %+.0f%%" % ((result['p95_ms'] / previous[name]['p95_ms'] - 1) * 100
+                                        if previous[name]['p95_ms'] else 0)
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the website with a synthetic catalog in a throwaway '
+                                                 'database')
+    add_arguments(parser)
+    parser.add_argument('-c', '--clients', type=int, default=os.cpu_count(),
+                        help='Number of clients requesting pages at once (default: number of CPUs)')
+    parser.add_argument('-s', '--samples', type=int, default=20,
+                        help='Number of versions and of applications to request the pages of (default: %(default)s)')
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help='Number of times to request each page (default: %(default)s)')
+    parser.add_argument('--no-cache', action='store_true', help="Don't cache the pages")
+    parser.add_argument('--server', action='store_true',
+                        help='Request the pages from a local WSGI server rather than through the test client')
+    parser.add_argument('-o', '--output', help='File to save the results in, as JSON')
+    parser.add_argument('--compare', help='File with the results of an earlier run to compare with')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Turn on debugging output')
+    args = parser.parse_args()
+
+    set_up_logging(args.verbose)
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+    # don't keep every query in memory
+    settings.DEBUG = False
+    if '*' not in settings.ALLOWED_HOSTS:
+        settings.ALLOWED_HOSTS = list(settings.ALLOWED_HOSTS) + ['testserver', '127.0.0.1']
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)['results']
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        old_name = connection.settings_dict['NAME']
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = os.path.join(tmpdir, 'benchmark.sqlite3')
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            start = time.perf_counter()
+            try:
+                counts = generate_catalog(args.applications, args.versions, args.bavs, args.archs, args.seed)
+            except ValueError as e:
+                parser.error(str(e))
+            print("Generated %s in %.1f seconds on %s"
+                  % (", ".join("%d %s" % (count, name) for name, count in counts.items()),
+                     time.perf_counter() - start, connection.vendor))
+
+            caches = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+            with override_settings(**({'CACHES': caches} if args.no_cache else {})):
+                pages = page_urls(args.samples, args.seed)
+                requester = ServerRequester() if args.server else ClientRequester()
+                try:
+                    results = run_benchmark(requester, pages, args.clients, args.repeat)
+                finally:
+                    requester.close()
+            print_results(results, previous)
+            print("Peak RSS %.1f MB" % peak_rss())
+
+            if args.output:
+                with open(args.output, 'w') as f:
+                    json.dump({'date': datetime.now(timezone.utc).isoformat(), 'arguments': vars(args),
+                               'database': connection.vendor, 'catalog': counts, 'peak_rss_mb': round(peak_rss(), 1),
+                               'results': results}, f, indent=2)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
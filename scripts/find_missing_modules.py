@@ -49,7 +49,7 @@ def find_missing_modules(bear_apps_version=None):
             ver = link.version.version
             arch = link.architecture.name
             target = os.path.join(BASE, bav, arch, 'modules/all', app, ver)
-            if os.path.exists(target):
+            if os.path.exists(target) or os.path.exists(target + '.lua'):
                 continue
             else:
                 missing.append((link, target))
@@ -1,11 +1,20 @@
 #!venv/bin/python
 import framework  # NOQA
 import logging
+import operator
 import sys
-from packaging.version import parse as parse_version
+from functools import reduce
 from django.db import IntegrityError, transaction
+from django.db.models import Q
 from bear_applications.models import (Application, Version, Architecture, BearAppsVersion,
                                       ParagraphData, Link, CurrentVersion)
+from bear_applications.caching import bump_generation
+from bear_applications.ordering import full_sort_key, version_sort_key
+from bear_applications.toolchains import toolchain_family
+from bear_applications.search import update_documents
+from bear_applications.signals import deferred_updates
+from bear_applications.siblings import update_siblings
+from bear_applications.visibility import update_visibility
 
 
 logger = logging.getLogger(__name__)
@@ -59,9 +68,11 @@ def get_application(name, version=None):
     return (app, ver)
 
 
+@deferred_updates()
 def upload_data(name, version, arch, bav_family, module_load, home, desc, created, modified, ext=None, deps=None):
     """
-    Upload this data to the database
+    Upload this data to the database, returning the Version object, bringing what is worked out from it up to
+    date once at the end rather than on each save
     """
     logger.info("Uploading %s/%s", name, version)
 
@@ -152,8 +163,9 @@ def upload_data(name, version, arch, bav_family, module_load, home, desc, create
                 obj.delete()
             set_cv = True
         else:
-            if (current_version.version.modified < modified and
-                    parse_version(current_version.version.version) < parse_version(ver.version)):
+            # <=, as versions loaded together, e.g. by add_module_spider.py, can have the same time
+            if (current_version.version.modified <= modified and
+                    full_sort_key(current_version.version.version) < full_sort_key(ver.version)):
                 set_cv = True
                 current_version.delete()
 
@@ -167,7 +179,128 @@ def upload_data(name, version, arch, bav_family, module_load, home, desc, create
     if deps:
         set_dependencies(ver, deps)
 
+    return ver
 
+
+def upload_data_batch(records):
+    """
+    Upload many records to the database, each a dict of the keyword arguments to upload_data, using
+    one query per table rather than several per record. The end state is the same as calling
+    upload_data on each record in turn.
+
+    Returns the Version objects, in the same order as the records
+    """
+    logger.info("Uploading %d records", len(records))
+
+    architectures = _get_or_create_by_name(Architecture, 'architecture',
+                                           {r['arch'] for r in records if r.get('arch') is not None},
+                                           lambda name: Architecture(name=name, displayed_name=name))
+    bavs = _get_or_create_by_name(BearAppsVersion, 'bearappsversion family',
+                                  {r['bav_family'] for r in records if r.get('bav_family') is not None},
+                                  lambda name: BearAppsVersion(name=name, displayed_name=name, auto_loaded=False,
+                                                               hidden=False, deprecated=False))
+
+    new_apps = {}
+    apps = Application.objects.in_bulk([r['name'] for r in records], field_name='name')
+    for r in records:
+        if r['name'] not in apps and r['name'] not in new_apps:
+            new_apps[r['name']] = Application(name=r['name'], description=r['desc'], more_info=r['home'])
+    if new_apps:
+        Application.objects.bulk_create(new_apps.values(), ignore_conflicts=True)
+        apps.update(Application.objects.in_bulk(list(new_apps), field_name='name'))
+        for name in new_apps:
+            logger.info("Created application %s", name)
+
+    versions = {(v.application_id, v.version): v
+                for v in Version.objects.filter(application__in=[app.id for app in apps.values()])}
+    new_versions = {}
+    for r in records:
+        key = (apps[r['name']].id, r['version'])
+        if key not in versions and key not in new_versions:
+            new_versions[key] = r
+    if new_versions:
+        Version.objects.bulk_create([Version(application_id=app_id, version=version, module_load=r['module_load'],
+                                             created=r['created'], modified=r['modified'],
+                                             version_sort_key=version_sort_key(version),
+                                             toolchain=toolchain_family(version))
+                                     for (app_id, version), r in new_versions.items()], ignore_conflicts=True)
+        versions.update({(v.application_id, v.version): v
+                         for v in Version.objects.filter(application__in={key[0] for key in new_versions})})
+        ParagraphData.objects.bulk_create([ParagraphData(header='Extensions', content=_parse_ext_list_to_html(r['ext']),
+                                                         version=versions[key])
+                                           for key, r in new_versions.items() if r.get('ext') is not None])
+        logger.info("Created %d versions", len(new_versions))
+
+    links = set(Link.objects.filter(version__in=[versions[key] for key in {(apps[r['name']].id, r['version'])
+                                                                           for r in records}])
+                            .values_list('version', 'bearappsversion', 'architecture'))
+    new_links = {}
+    for r in records:
+        if r.get('arch') is not None and r.get('bav_family') is not None:
+            key = (versions[(apps[r['name']].id, r['version'])].id, bavs[r['bav_family']].id,
+                   architectures[r['arch']].id)
+            if key not in links:
+                new_links[key] = Link(version_id=key[0], bearappsversion_id=key[1], architecture_id=key[2])
+    Link.objects.bulk_create(new_links.values(), ignore_conflicts=True)
+    if new_links:
+        logger.info("Created %d links", len(new_links))
+
+    _set_current_versions_batch(apps, versions, new_versions)
+
+    result = [versions[(apps[r['name']].id, r['version'])] for r in records]
+    # bulk_create doesn't send the signals that keep the flags, search documents and cached pages up to date
+    update_visibility([ver.id for ver in result])
+    update_siblings([ver.id for ver in result])
+    update_documents([ver.id for ver in result])
+    bump_generation()
+    to_link = [(ver, r['deps']) for ver, r in zip(result, records) if r.get('deps')]
+    if to_link:
+        set_dependencies_batch(to_link)
+
+    return result
+
+
+def _get_or_create_by_name(model, label, names, new_obj):
+    """
+    Returns a dict of name -> object of model (Architecture or BearAppsVersion) for all the
+    existing objects, after creating those in names that do not exist yet with new_obj(name)
+    """
+    objs = model.objects.in_bulk(field_name='name')
+    missing = names - set(objs)
+    if missing:
+        model.objects.bulk_create([new_obj(name) for name in sorted(missing)], ignore_conflicts=True)
+        objs = model.objects.in_bulk(field_name='name')
+        for name in sorted(missing):
+            logger.info("Created %s %s", label, name)
+    return objs
+
+
+def _set_current_versions_batch(apps, versions, new_versions):
+    """
+    Update the current versions for the newly created versions (new_versions is (app id, version) -> record)
+    in the same way that upload_data does, considering them in turn
+    """
+    current = {cv.application_id: cv.version
+               for cv in CurrentVersion.objects.filter(application__in={key[0] for key in new_versions})
+                                               .select_related('version')}
+    changed = set()
+    for key, r in new_versions.items():
+        app_id = key[0]
+        ver = versions[key]
+        if (app_id not in current or
+                (current[app_id].modified <= r['modified'] and
+                 full_sort_key(current[app_id].version) < full_sort_key(ver.version))):
+            current[app_id] = ver
+            changed.add(app_id)
+
+    if changed:
+        CurrentVersion.objects.filter(application__in=changed).delete()
+        CurrentVersion.objects.bulk_create([CurrentVersion(application_id=app_id, version=current[app_id])
+                                            for app_id in changed])
+        logger.info("Set %d current versions", len(changed))
+
+
+@deferred_updates()
 def set_dependencies(ver, deps):
     """
     Set the items in deps as dependencies for ver
@@ -189,6 +322,60 @@ def set_dependencies(ver, deps):
         raise DependencyNotFoundError(str(e))
 
 
+def set_dependencies_batch(to_link, chunk_size=400):
+    """
+    Set the dependencies for many versions at once, where to_link is a list of (Version, deps).
+    All the dependencies are looked up together, by (application name, version), and the
+    dependency rows are written in bulk.
+
+    Unlike set_dependencies a dependency that is not in the database does not abort, it is reported
+    and skipped. Returns a list of (Version, dep) for these unresolved dependencies
+    """
+    edges = []
+    for ver, deps in to_link:
+        for dep in deps:
+            dep_split = dep.split('/')
+            if len(dep_split) != 2:
+                logger.warning("Discarding potential dep '%s' as it doesn't match 'a/b'", dep)
+                continue
+            edges.append((ver, dep, tuple(dep_split)))
+
+    found = {}
+    pairs = sorted({pair for _, _, pair in edges})
+    for i in range(0, len(pairs), chunk_size):
+        pairs_q = reduce(operator.or_, (Q(application__name=name, version=version)
+                                        for name, version in pairs[i:i + chunk_size]))
+        found.update({(name, version): pk for name, version, pk
+                      in Version.objects.filter(pairs_q).values_list('application__name', 'version', 'id')})
+
+    through = Version.dependencies.through
+    rows = {}
+    unresolved = []
+    for ver, dep, pair in edges:
+        if pair in found:
+            rows[(ver.id, found[pair])] = through(from_version_id=ver.id, to_version_id=found[pair])
+        else:
+            unresolved.append((ver, dep))
+    # the application names of the versions, in one query rather than one for each warning
+    ids = sorted({ver.id for ver, _ in unresolved})
+    names = {}
+    for i in range(0, len(ids), chunk_size):
+        names.update(Version.objects.filter(id__in=ids[i:i + chunk_size]).values_list('id', 'application__name')
+                     .order_by())
+    for ver, dep in unresolved:
+        logger.warning("Can't find dependency %s of %s/%s", dep, names[ver.id], ver.version)
+
+    with transaction.atomic():
+        through.objects.filter(from_version__in=[ver.id for ver, _ in to_link]).delete()
+        through.objects.bulk_create(rows.values(), ignore_conflicts=True)
+        bump_generation()
+    logger.info("Set %d dependencies for %d versions", len(rows), len(to_link))
+    if unresolved:
+        logger.warning("%d dependencies could not be found", len(unresolved))
+
+    return unresolved
+
+
 def _parse_ext_list_to_html(ext_list):
     """
     Take an extension list and convert to a html list
@@ -0,0 +1,84 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+
+# from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+
+_EVENT = struct.Struct('iIII')
+READ_SIZE = 64 * 1024
+
+
+class Inotify:
+    """
+    A minimal wrapper of the Linux inotify API, using ctypes so that nothing needs to be installed.
+    Raises OSError if inotify isn't available, e.g. on another OS.
+    """
+
+    def __init__(self):
+        try:
+            self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            self._libc.inotify_init1
+        except (OSError, AttributeError) as e:
+            raise OSError("inotify is not available: %s" % e)
+        self.fd = self._check(self._libc.inotify_init1(IN_CLOEXEC))
+
+    def _check(self, result, path=None):
+        if result < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return result
+
+    def add_watch(self, path, mask):
+        """
+        Watch path for the events in mask, returning the watch descriptor
+        """
+        return self._check(self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask), path)
+
+    def rm_watch(self, wd):
+        self._check(self._libc.inotify_rm_watch(self.fd, wd))
+
+    def read(self, timeout=None):
+        """
+        Returns a list of (wd, mask, cookie, name) for the events that are waiting, after waiting up to
+        timeout seconds, or forever if it is None, for the first
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        buffer = os.read(self.fd, READ_SIZE)
+        events = []
+        pos = 0
+        while pos < len(buffer):
+            wd, mask, cookie, length = _EVENT.unpack_from(buffer, pos)
+            pos += _EVENT.size
+            name = os.fsdecode(buffer[pos:pos + length].rstrip(b'\0'))
+            pos += length
+            events.append((wd, mask, cookie, name))
+        return events
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
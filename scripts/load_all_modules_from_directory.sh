@@ -2,10 +2,6 @@
 set -e
 
 DIR=$1
+shift
 
-for app in $(cd ${DIR} ; ls); do
-    for ver in $(cd ${DIR}/${app}; ls); do
-        mod=$(realpath ${DIR}/${app}/${ver})
-        ./add_module_info.py ${mod}
-    done
-done
+./add_module_tree.py "$@" ${DIR}
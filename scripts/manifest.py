@@ -0,0 +1,72 @@
+import hashlib
+import json
+import os
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+def content_hash(content):
+    """
+    Hash of the (bytes) contents of a module file
+    """
+    return hashlib.sha1(content).hexdigest()
+
+
+class Manifest:
+    """
+    A local record of the module files that have been uploaded to the database, so that later runs
+    can skip the unchanged ones. Each full path maps to [mtime_ns, size, content hash].
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.entries = {}
+        if os.path.exists(filename):
+            with open(filename) as f:
+                self.entries = json.load(f)
+            logger.debug("Read %d entries from manifest %s", len(self.entries), filename)
+
+    def unchanged(self, path, stat):
+        """
+        True if the file has the same mtime and size as when it was recorded
+        """
+        entry = self.entries.get(path)
+        return entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size
+
+    def same_content(self, path, digest):
+        """
+        True if the file has the same contents as when it was recorded, e.g. it has only been touched
+        """
+        entry = self.entries.get(path)
+        return entry is not None and entry[2] == digest
+
+    def record(self, path, stat, digest):
+        """
+        Record the current state of this file
+        """
+        self.entries[path] = [stat.st_mtime_ns, stat.st_size, digest]
+
+    def forget(self, path):
+        """
+        Forget this file, so that it is uploaded again
+        """
+        self.entries.pop(path, None)
+
+    def prune(self, directory, paths):
+        """
+        Forget the files under directory that are not in paths, i.e. have been removed
+        """
+        prefix = os.path.join(directory, '')
+        for path in [p for p in self.entries if p.startswith(prefix) and p not in paths]:
+            del self.entries[path]
+
+    def save(self):
+        """
+        Write the manifest, replacing the previous one in a single step
+        """
+        tmp_filename = '%s.tmp' % self.filename
+        with open(tmp_filename, 'w') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_filename, self.filename)
+        logger.debug("Wrote %d entries to manifest %s", len(self.entries), self.filename)
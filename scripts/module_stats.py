@@ -9,7 +9,6 @@ import os
 from pathlib import Path
 import pytz
 import random
-import re
 import time
 
 try:
@@ -48,7 +47,6 @@ pip install -r requirements-module_stats.txt
 class ModuleStats:
 
     def __init__(self):
-        self.version_regex = re.compile(r"[v|V]?((\d+[.|-])*\d+)-?.*")
         self.timezone = pytz.timezone("Europe/London")
 
     def _full_list_dict(self):
@@ -70,23 +68,10 @@ class ModuleStats:
 
     def _order_by_version(self, version_instance):
         """
-        Used by the sorted function to order module version lists semantically, where possible
+        Used by the sorted function to order module version lists semantically, in the same way as the website
         """
 
-        version_string = version_instance.version
-        match = self.version_regex.match(version_string)
-        if match:
-            return_list = [""]
-            try:
-                return_list.extend([int(x) for x in match[1].replace('-', '.').split(".")])
-                return tuple(return_list)
-            except ValueError as e:
-                logger.debug("CANNOT PARSE TO INTS! %s for %s", version_string, version_instance.application.name)
-                logger.debug("\tError: %s", e)
-                return tuple(version_string)
-        else:
-            logger.debug("NO MATCH! %s for %s", version_string, version_instance.application.name)
-            return tuple(version_string)
+        return version_instance.version_sort_key, version_instance.version
 
     def _build_activity_dict(self):
         """
@@ -0,0 +1,230 @@
+"""
+Parsing of the module files generated by EasyBuild, in Tcl or, for Lmod, in Lua.
+
+A Tcl module file is parsed with regexes, like those add_module_info.py used to use, which pick out the
+module-whatis and module load (or depends-on) lines. The module loads can be in the body of an if command, on
+the same line, and can list several modules. The ModulesHelp proc that EasyBuild starts the module file with is
+skipped, so that e.g. a 'module load' in the help text is not mistaken for a dependency.
+
+A Lua module file is read in a single pass, following the Lua rules for strings and comments.
+"""
+import collections
+import re
+
+ModuleFile = collections.namedtuple('ModuleFile', [
+    'homepage',      # (str) Homepage from module-whatis, or None
+    'description',   # (str) Description from module-whatis, or None
+    'extensions',    # (str) comma separated Extensions from module-whatis, or None
+    'compatible',    # (list) modules from 'Compatible modules' in module-whatis, without the (default) marker
+    'loads',         # (list) modules loaded, by 'module load' or 'depends-on'
+])
+
+WHATIS_FIELDS = {
+    'Homepage': 'homepage',
+    'Description': 'description',
+    'Extensions': 'extensions',
+    'Compatible modules': 'compatible',
+}
+
+LUA_SUFFIX = '.lua'
+
+# The lines of a Tcl module file that we are interested in, each starting with a newline, which is quicker to
+# search for than the start of a line: the {braced}, "quoted" or bare text of a module-whatis, and the modules of
+# a module load, which can have backslash-newline continuations
+_re_tcl = re.compile(r"""
+    \n [ \t]*
+    (?:
+        module-whatis [ \t]+ (?: \{([^{}]*)\} | "([^"]*)" | ([^\n]*) )
+      | (?:module[ \t]+load|depends-on) [ \t]+ ([^\n;\\]* (?:\\\n[^\n;\\]*)*)
+    )
+""", re.VERBOSE)
+# The modules of a module load in the body of an if command on the same line, up to the closing brace
+_re_tcl_if_load = re.compile(r'\{[ \t]*(?:module[ \t]+load|depends-on)[ \t]+([^\n;}\\]*)')
+_re_continuation = re.compile(r'\\\n[ \t]*')
+
+
+class ModuleFileSyntaxError(Exception):
+    """
+    A module file that can't be parsed. Its module is the ModuleFile of what was parsed before the error.
+    """
+    module = None
+
+
+class LuaSyntaxError(ModuleFileSyntaxError):
+    pass
+
+
+def _add_whatis(fields, whatis):
+    """
+    Record a 'Key: value' module-whatis line, keeping the first of each key
+    """
+    key, sep, value = whatis.partition(':')
+    field = WHATIS_FIELDS.get(key.strip())
+    if not sep or field is None or fields[field] is not None:
+        return
+    if field == 'compatible':
+        fields[field] = [dep for dep in value.replace(',', '').split() if '(default)' not in dep]
+    else:
+        fields[field] = value.strip()
+
+
+def parse_tcl(text):
+    """
+    Parse the text of a Tcl module file into a ModuleFile
+    """
+    fields = {'homepage': None, 'description': None, 'extensions': None, 'compatible': None, 'loads': []}
+    text = '\n' + text
+    # from the end of the ModulesHelp proc, at the first closing brace at the start of a line
+    pos = text.find('\nproc ModulesHelp')
+    if pos >= 0:
+        pos = text.find('\n}', pos + 1)
+    pos = max(pos, 0)
+    for braced, quoted, bare, load in _re_tcl.findall(text, pos):
+        # most have no continuations, which are quicker to look for than to remove
+        if load:
+            if '\\' in load:
+                load = _re_continuation.sub(' ', load)
+            fields['loads'].extend(load.split())
+        else:
+            whatis = braced or quoted or bare
+            if '\\' in whatis:
+                whatis = _re_continuation.sub(' ', whatis)
+            _add_whatis(fields, whatis)
+    for load in _re_tcl_if_load.findall(text, pos):
+        fields['loads'].extend(load.split())
+    if fields['compatible'] is None:
+        fields['compatible'] = []
+    return ModuleFile(**fields)
+
+
+# Lua comments and strings, which are skipped over, the functions we are interested in and the punctuation
+# of their arguments
+_re_lua = re.compile(r"""
+    --\[(?P<comment_eq>=*)\[.*?\](?P=comment_eq)\]                 # --[[ long comment ]]
+  | --[^\n]*                                                      # -- comment
+  | \[(?P<eq>=*)\[\n?(?P<long>.*?)\](?P=eq)\]                    # [==[long string]==]
+  | "(?P<double>(?:[^"\\\n]|\\.)*)"
+  | '(?P<single>(?:[^'\\\n]|\\.)*)'
+  | (?P<bad>["']|\[=*\[)                                          # a string without an end
+  | (?P<name>[A-Za-z_][\w.:]*)
+  | (?P<punct>[(){},])
+""", re.VERBOSE | re.DOTALL)
+
+_re_lua_escape = re.compile(r'\\(.)', re.DOTALL)
+_LUA_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r'}
+
+LUA_FUNCTIONS = frozenset(['whatis', 'load', 'always_load', 'depends_on', 'extensions'])
+
+
+def _lua_args(tokens, text):
+    """
+    Returns the arguments of the function call whose opening parenthesis has just been read from tokens.
+    A string literal argument is its value, anything else, e.g. pathJoin(root, "lib"), is its source.
+    """
+    args = []
+    depth = 0
+    arg_tokens = []
+    for token in tokens:
+        punct = token.group('punct')
+        if punct and depth == 0 and punct in '),':
+            if len(arg_tokens) == 1 and _lua_string(arg_tokens[0]) is not None:
+                args.append(_lua_string(arg_tokens[0]))
+            elif arg_tokens:
+                args.append(text[arg_tokens[0].start():arg_tokens[-1].end()])
+            if punct == ')':
+                return args
+            arg_tokens = []
+            continue
+        if punct in ('(', '{'):
+            depth += 1
+        elif punct in (')', '}'):
+            depth -= 1
+        arg_tokens.append(token)
+    raise LuaSyntaxError("Unmatched ( in function call")
+
+
+def _lua_string(token):
+    """
+    Returns the value of a Lua string literal token, or None if it isn't one
+    """
+    if token.group('long') is not None:
+        return token.group('long')
+    for group in ('double', 'single'):
+        value = token.group(group)
+        if value is not None:
+            return _re_lua_escape.sub(lambda m: _LUA_ESCAPES.get(m.group(1), m.group(1)), value)
+    return None
+
+
+def lua_calls(text, functions=LUA_FUNCTIONS):
+    """
+    Yield (function, args) for each call of one of functions in the Lua text, wherever it is, e.g. in
+    the body of an if statement, but not in a string or comment
+    """
+    tokens = _re_lua.finditer(text)
+    previous = None
+    for token in tokens:
+        if token.group('bad'):
+            raise LuaSyntaxError("Unterminated string at %d" % token.start())
+        if token.group('punct') == '(' and previous is not None and previous.group('name') in functions:
+            yield previous.group('name'), _lua_args(tokens, text)
+            previous = None
+            continue
+        previous = token
+
+
+def _extensions_as_whatis(extensions):
+    """
+    Convert the Lmod extensions list, 'a/1.0,b/2.0', to the same form as the Extensions whatis, 'a-1.0, b-2.0'
+    """
+    return ', '.join(ext.strip().replace('/', '-', 1) for ext in extensions.split(',') if ext.strip())
+
+
+def parse_lua(text):
+    """
+    Parse the text of a Lua module file into a ModuleFile
+    """
+    fields = {'homepage': None, 'description': None, 'extensions': None, 'compatible': None, 'loads': []}
+    extensions = []
+    error = None
+    try:
+        for function, args in lua_calls(text):
+            if function == 'whatis':
+                if args:
+                    _add_whatis(fields, args[0])
+            elif function in ('load', 'always_load', 'depends_on'):
+                fields['loads'].extend(args)
+            elif function == 'extensions':
+                extensions.extend(args)
+    except LuaSyntaxError as e:
+        error = e
+    if fields['extensions'] is None and extensions:
+        fields['extensions'] = _extensions_as_whatis(','.join(extensions))
+    if fields['compatible'] is None:
+        fields['compatible'] = []
+    module = ModuleFile(**fields)
+    if error is not None:
+        error.module = module
+        raise error
+    return module
+
+
+def parse_whatis(whatis):
+    """
+    Parse a list of module-whatis strings, e.g. from Lmod spider, into a ModuleFile
+    """
+    fields = {'homepage': None, 'description': None, 'extensions': None, 'compatible': None, 'loads': []}
+    for line in whatis:
+        _add_whatis(fields, line)
+    if fields['compatible'] is None:
+        fields['compatible'] = []
+    return ModuleFile(**fields)
+
+
+def parse_modulefile(filename, text):
+    """
+    Parse the text of a module file, choosing the parser from its filename
+    """
+    if filename.endswith(LUA_SUFFIX):
+        return parse_lua(text)
+    return parse_tcl(text)
@@ -0,0 +1,178 @@
+#!venv/bin/python
+"""
+Generate a synthetic catalog straight into the database, at the scale of production or bigger, for
+benchmarking the website (see benchmark_web.py), e.g.
+
+    ./synthetic_catalog.py --applications 5000 --versions 12 --bavs 8 --archs 5
+
+Unlike synthetic_modules.py this doesn't write module files for the scripts to load, but creates the rows
+in bulk, so that 60,000 versions take a minute rather than hours. Each version is in one BEAR Apps Version,
+linked to every architecture, and depends on a few of the versions created just before it in the same BEAR
+Apps Version, which gives long chains of dependencies. Some versions have a long Extensions paragraph, and
+those built with foss have a fosscuda sibling.
+
+The database must be empty.
+"""
+import framework  # NOQA
+import argparse
+import logging
+import random
+from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
+from bear_applications.caching import bump_generation
+from bear_applications.models import (Application, Architecture, BearAppsVersion, CurrentVersion, Link,
+                                      ParagraphData, Version)
+from bear_applications.ordering import version_sort_key
+from bear_applications.search import update_documents
+from bear_applications.siblings import update_siblings
+from bear_applications.toolchains import toolchain_family
+from bear_applications.visibility import update_visibility
+from functions import _parse_ext_list_to_html, set_up_logging
+from synthetic_modules import ARCHS, BAVS, FAN_OUT, NAMES
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 2000
+# the versions that a version may depend on are this many of those created before it in its BEAR Apps Version
+WINDOW = 50
+EXTENSIONS_FRACTION = 0.15
+# the number of extensions in an Extensions paragraph, picked at random
+EXTENSIONS = (20, 400)
+CUDA_FRACTION = 0.1
+
+
+def _version_names(rng, count, bavs):
+    """
+    Returns count different (version, BEAR Apps Version name) for an application, some of them in pairs built
+    with foss and fosscuda
+    """
+    names = []
+    seen = set()
+    major = rng.randint(0, 9)
+    while len(names) < count:
+        bav, gcc = BAVS[len(names) % bavs]
+        version = '%d.%d.%d' % (major, rng.randint(0, 20), rng.randint(0, 10))
+        major += rng.randint(0, 1)
+        if (version, bav) in seen:
+            continue
+        seen.add((version, bav))
+        if rng.random() < CUDA_FRACTION and len(names) + 1 < count:
+            names.append(('%s-foss-%s' % (version, bav), bav))
+            names.append(('%s-fosscuda-%s' % (version, bav), bav))
+        else:
+            names.append(('%s-GCCcore-%s' % (version, gcc), bav))
+    return names
+
+
+def _extensions(rng):
+    return ', '.join('ext%d-%d.%d' % (i, rng.randint(0, 5), rng.randint(0, 20))
+                     for i in range(rng.randint(*EXTENSIONS)))
+
+
+def generate_catalog(applications, versions, bavs, archs, seed=0):
+    """
+    Fill the database with applications x versions versions, spread over the first bavs BEAR Apps Versions and
+    each linked to the first archs architectures. Returns {model name: number of rows}.
+    """
+    if bavs > len(BAVS) or archs > len(ARCHS):
+        raise ValueError("At most %d BEAR Apps Versions and %d architectures" % (len(BAVS), len(ARCHS)))
+    if Version.objects.exists():
+        raise ValueError("The database already has versions in it")
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    with transaction.atomic():
+        # the oldest quarter are deprecated
+        BearAppsVersion.objects.bulk_create([BearAppsVersion(name=bav, displayed_name=bav, deprecated=i < bavs // 4)
+                                             for i, (bav, _) in enumerate(BAVS[:bavs])], ignore_conflicts=True)
+        Architecture.objects.bulk_create([Architecture(name=arch, displayed_name=arch) for arch in ARCHS[:archs]],
+                                         ignore_conflicts=True)
+        bav_ids = dict(BearAppsVersion.objects.values_list('name', 'id'))
+        arch_ids = [pk for name, pk in Architecture.objects.values_list('name', 'id') if name in ARCHS[:archs]]
+
+        names = ['%s%s' % (NAMES[i % len(NAMES)], i // len(NAMES) or '') for i in range(applications)]
+        Application.objects.bulk_create([Application(name=name, description='%s is a synthetic application' % name,
+                                                     more_info='https://example.com/%s' % name.lower())
+                                         for name in names], batch_size=BATCH_SIZE)
+        app_ids = dict(Application.objects.values_list('name', 'id'))
+
+        # (Version, the name of its BEAR Apps Version)
+        new_versions = []
+        for name in names:
+            for version, bav in _version_names(rng, versions, bavs):
+                created = now - timedelta(days=rng.randint(0, 6 * 365))
+                new_versions.append((Version(application_id=app_ids[name], version=version,
+                                             module_load='%s/%s' % (name, version), created=created,
+                                             modified=created, version_sort_key=version_sort_key(version),
+                                             toolchain=toolchain_family(version)), bav))
+        Version.objects.bulk_create([ver for ver, _ in new_versions], batch_size=BATCH_SIZE)
+        version_ids = {(app_id, version): pk
+                       for app_id, version, pk in Version.objects.values_list('application_id', 'version', 'id')}
+        logger.info("Created %d versions", len(version_ids))
+
+        links = []
+        dependencies = []
+        paragraphs = []
+        # the versions created so far in each BEAR Apps Version
+        in_bav = {}
+        for ver, bav in new_versions:
+            pk = version_ids[(ver.application_id, ver.version)]
+            links.extend(Link(version_id=pk, bearappsversion_id=bav_ids[bav], architecture_id=arch_id)
+                         for arch_id in arch_ids)
+            before = in_bav.setdefault(bav, [])
+            for dep in rng.sample(before[-WINDOW:], min(len(before), WINDOW, rng.choice(FAN_OUT))):
+                dependencies.append(Version.dependencies.through(from_version_id=pk, to_version_id=dep))
+            before.append(pk)
+            if rng.random() < EXTENSIONS_FRACTION:
+                paragraphs.append(ParagraphData(version_id=pk, header='Extensions',
+                                                content=_parse_ext_list_to_html(_extensions(rng))))
+        Link.objects.bulk_create(links, batch_size=BATCH_SIZE)
+        Version.dependencies.through.objects.bulk_create(dependencies, batch_size=BATCH_SIZE)
+        ParagraphData.objects.bulk_create(paragraphs, batch_size=BATCH_SIZE)
+        logger.info("Created %d links and %d dependencies", len(links), len(dependencies))
+
+        latest = {}
+        for ver, _ in new_versions:
+            latest[ver.application_id] = version_ids[(ver.application_id, ver.version)]
+        CurrentVersion.objects.bulk_create([CurrentVersion(application_id=app_id, version_id=pk)
+                                            for app_id, pk in latest.items()], batch_size=BATCH_SIZE)
+
+        # bulk_create doesn't send the signals that keep the flags, search documents and cached pages up to date
+        update_visibility()
+        update_siblings()
+        update_documents()
+        bump_generation()
+
+    return {model.__name__: model.objects.count()
+            for model in (Application, Version, Link, Version.dependencies.through, ParagraphData)}
+
+
+def add_arguments(parser):
+    """
+    Add the arguments that describe the size of the catalog to an ArgumentParser
+    """
+    parser.add_argument('-n', '--applications', type=int, default=5000,
+                        help='Number of applications (default: %(default)s)')
+    parser.add_argument('-V', '--versions', type=int, default=12,
+                        help='Number of versions of each application (default: %(default)s)')
+    parser.add_argument('-b', '--bavs', type=int, default=len(BAVS),
+                        help='Number of BEAR Apps Versions, at most %d (default: %%(default)s)' % len(BAVS))
+    parser.add_argument('-a', '--archs', type=int, default=5,
+                        help='Number of architectures each version is linked to, at most %d (default: %%(default)s)'
+                             % len(ARCHS))
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the random choices (default: %(default)s)')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate a synthetic catalog in the (empty) database')
+    add_arguments(parser)
+    parser.add_argument('-v', '--verbose', action='store_true', help='Turn on debugging output')
+    args = parser.parse_args()
+
+    set_up_logging(args.verbose)
+    try:
+        counts = generate_catalog(args.applications, args.versions, args.bavs, args.archs, args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+    print(", ".join("%d %s" % (count, name) for name, count in counts.items()))
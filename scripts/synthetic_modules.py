@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+"""
+Generate a synthetic EasyBuild module tree, laid out as /rds/bear-apps, for testing and benchmarking
+the scripts that load module files, e.g.
+
+    ./synthetic_modules.py --bavs 2 --archs 3 --apps 500 /tmp/bear-apps
+
+Each BEAR Apps Version has a GCCcore and a foss toolchain and apps that load the toolchain and a
+few of the apps before them, with some having extension lists or compatible modules. The module
+file of an app is the same under every architecture apart from the paths.
+
+This does not need the database.
+"""
+import argparse
+import os
+import random
+import re
+
+# BEAR Apps Version -> GCCcore version
+BAVS = [('2019b', '8.3.0'), ('2020a', '9.3.0'), ('2020b', '10.2.0'), ('2021a', '10.3.0'),
+        ('2021b', '11.2.0'), ('2022a', '11.3.0'), ('2022b', '12.2.0'), ('2023a', '12.3.0')]
+ARCHS = ['EL8-icelake', 'EL8-cascadelake', 'EL8-haswell', 'EL8-sapphirerapids', 'EL7-cascadelake', 'EL7-haswell']
+NAMES = ['zlib', 'bzip2', 'XZ', 'libpng', 'libjpeg-turbo', 'ncurses', 'libreadline', 'SQLite', 'Tcl', 'Perl',
+         'Python', 'CMake', 'Boost', 'HDF5', 'netCDF', 'FFTW', 'GSL', 'Eigen', 'SciPy-bundle', 'matplotlib',
+         'R', 'GROMACS', 'OpenFOAM', 'PyTorch', 'TensorFlow', 'Qt5', 'VTK', 'GDAL', 'PROJ', 'GEOS']
+# the number of apps, other than the toolchain, that an app loads, picked at random
+FAN_OUT = [0, 0, 1, 1, 1, 2, 2, 3, 3, 4, 5, 6, 8, 12]
+EXTENSIONS_FRACTION = 0.15
+COMPATIBLE_FRACTION = 0.05
+
+MODULE_FILE = """#%Module
+proc ModulesHelp {{ }} {{
+    puts stderr {{
+
+Description
+===========
+{description}
+
+
+More information
+================
+ - Homepage: {homepage}
+    }}
+}}
+
+module-whatis {{Description: {description}}}
+module-whatis {{Homepage: {homepage}}}
+module-whatis {{URL: {homepage}}}
+{whatis}
+set root {root}
+
+conflict {name}
+{loads}
+prepend-path	CMAKE_PREFIX_PATH		$root
+prepend-path	LD_LIBRARY_PATH		$root/lib
+prepend-path	PATH		$root/bin
+
+setenv	EBROOT{env}		"$root"
+setenv	EBVERSION{env}		"{version}"
+
+# Built with EasyBuild version 4.7.1
+"""
+
+LOAD = """
+if {{ ![ is-loaded {module} ] }} {{
+    module load {module}
+}}
+"""
+
+LOAD_COMPATIBLE = """
+if {{ [ module-info mode remove ] || [ is-loaded {second} ] }} {{
+    module load {second}
+}} else {{
+    module load {first}
+}}
+"""
+
+
+def filename_regex(base):
+    """
+    Returns the regex for add_module_info.re_filename_eb that recognises the module files under base
+    """
+    return re.compile(r"^%s/([^/]+)/([^/]+)/modules/all/([^/]+)/(.*)$" % re.escape(os.path.realpath(base)))
+
+
+def _apps(rng, bav, gcc, count):
+    """
+    Returns a list of count dicts describing the apps of a BEAR Apps Version, each of which only loads
+    apps before it
+    """
+    apps = [{'name': 'GCCcore', 'version': gcc, 'loads': [], 'compatible': [], 'extensions': []},
+            {'name': 'foss', 'version': bav, 'loads': ['GCCcore/%s' % gcc], 'compatible': [], 'extensions': []}]
+    for i in range(count - 2):
+        toolchain = rng.choice(['GCCcore-%s' % gcc, 'foss-%s' % bav])
+        name = NAMES[i % len(NAMES)]
+        if i >= len(NAMES):
+            name = '%s-%d' % (name, i // len(NAMES))
+        app = {'name': name,
+               'version': '%d.%d.%d-%s' % (rng.randint(0, 12), rng.randint(0, 20), rng.randint(0, 9), toolchain),
+               'loads': [toolchain.replace('-', '/', 1)],
+               'compatible': [],
+               'extensions': []}
+        # an app built with GCCcore can only load others built with GCCcore
+        earlier = ['%s/%s' % (other['name'], other['version']) for other in apps[2:]
+                   if toolchain.startswith('foss') or 'GCCcore' in other['version']]
+        app['loads'].extend(rng.sample(earlier, min(len(earlier), rng.choice(FAN_OUT))))
+        if len(earlier) >= 2 and rng.random() < COMPATIBLE_FRACTION:
+            app['compatible'] = rng.sample(earlier, 2)
+        if rng.random() < EXTENSIONS_FRACTION:
+            app['extensions'] = ['ext%d-%d.%d.%d' % (n, rng.randint(0, 5), rng.randint(0, 20), rng.randint(0, 9))
+                                 for n in range(int(rng.paretovariate(1.2) * 5))]
+        apps.append(app)
+    return apps[:count]
+
+
+def _module_file(app, root):
+    """
+    Returns the contents of the module file for app, installed in root
+    """
+    whatis = ''
+    if app['compatible']:
+        whatis += 'module-whatis {Compatible modules: %s (default), %s}\n' % tuple(app['compatible'])
+    if app['extensions']:
+        whatis += 'module-whatis {Extensions: %s}\n' % ', '.join(app['extensions'])
+    loads = ''.join(LOAD.format(module=module) for module in app['loads'] if module not in app['compatible'])
+    if app['compatible']:
+        loads += LOAD_COMPATIBLE.format(first=app['compatible'][0], second=app['compatible'][1])
+    return MODULE_FILE.format(name=app['name'], version=app['version'], root=root, whatis=whatis, loads=loads,
+                              description='%s is a synthetic piece of software for testing.' % app['name'],
+                              homepage='https://example.com/%s' % app['name'].lower(),
+                              env=re.sub(r'\W', '', app['name'].upper()))
+
+
+def generate_tree(base, bavs=1, archs=1, apps=100, seed=0):
+    """
+    Write a tree of bavs x archs x apps module files under base, returning their paths in an order where
+    every module file comes after those it loads
+    """
+    if bavs > len(BAVS) or archs > len(ARCHS):
+        raise ValueError("At most %d BEAR Apps Versions and %d architectures" % (len(BAVS), len(ARCHS)))
+    base = os.path.realpath(base)
+    rng = random.Random(seed)
+    module_files = []
+    for bav, gcc in BAVS[:bavs]:
+        bav_apps = _apps(rng, bav, gcc, apps)
+        for arch in ARCHS[:archs]:
+            for app in bav_apps:
+                directory = os.path.join(base, bav, arch, 'modules', 'all', app['name'])
+                os.makedirs(directory, exist_ok=True)
+                path = os.path.join(directory, app['version'])
+                root = os.path.join(base, bav, arch, 'software', app['name'], app['version'])
+                with open(path, 'w') as f:
+                    f.write(_module_file(app, root))
+                module_files.append(path)
+    return module_files
+
+
+def module_directories(base, bavs=1, archs=1):
+    """
+    Returns the modules/all directories of a tree from generate_tree
+    """
+    base = os.path.realpath(base)
+    return [os.path.join(base, bav, arch, 'modules', 'all') for bav, _ in BAVS[:bavs] for arch in ARCHS[:archs]]
+
+
+def add_arguments(parser):
+    """
+    Add the arguments that describe the size of the tree to an ArgumentParser
+    """
+    parser.add_argument('-b', '--bavs', type=int, default=1,
+                        help='Number of BEAR Apps Versions, at most %d (default: %%(default)s)' % len(BAVS))
+    parser.add_argument('-a', '--archs', type=int, default=1,
+                        help='Number of architectures, at most %d (default: %%(default)s)' % len(ARCHS))
+    parser.add_argument('-n', '--apps', type=int, default=100,
+                        help='Number of apps in each BEAR Apps Version (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the random choices (default: %(default)s)')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate a synthetic EasyBuild module tree')
+    add_arguments(parser)
+    parser.add_argument('directory', help='Directory to write the tree in, as for /rds/bear-apps')
+    args = parser.parse_args()
+
+    try:
+        module_files = generate_tree(args.directory, args.bavs, args.archs, args.apps, args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+    print("Wrote %d module files under %s" % (len(module_files), os.path.realpath(args.directory)))
@@ -0,0 +1,232 @@
+#!venv/bin/python
+from functions import set_up_logging
+from add_module_tree import find_module_files, load_module_files, load_trees
+from manifest import Manifest
+from inotify import Inotify, IN_CLOSE_WRITE, IN_CREATE, IN_IGNORED, IN_ISDIR, IN_MOVED_TO, IN_Q_OVERFLOW
+import os
+import time
+from django.db import close_old_connections
+
+import logging
+logger = logging.getLogger(__name__)
+
+DEBOUNCE = 5
+MAX_DELAY = 60
+POLL_INTERVAL = 60
+
+
+class PollingWatcher:
+    """
+    Finds the module files under the directories that are new or changed, by comparing the mtime and
+    size of every one with the previous scan. This works on any filesystem, including the shared ones
+    where inotify doesn't see changes made on other hosts.
+    """
+
+    def __init__(self, directories, interval=POLL_INTERVAL):
+        self.directories = [os.path.realpath(directory) for directory in directories]
+        self.interval = interval
+        self.stats = {}
+        self.scan()
+
+    def scan(self):
+        """
+        Returns the set of module files that are new or changed since the last scan
+        """
+        stats = {}
+        for directory in self.directories:
+            for module_file in find_module_files(directory):
+                try:
+                    stat = os.stat(module_file)
+                except OSError:
+                    continue
+                stats[module_file] = (stat.st_mtime_ns, stat.st_size)
+        changed = {module_file for module_file, stat in stats.items() if self.stats.get(module_file) != stat}
+        self.stats = stats
+        return changed
+
+    def poll(self, timeout=None):
+        """
+        Returns the module files that have changed, waiting up to timeout seconds, or forever if it is
+        None, for there to be any
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = self.scan()
+            if changed:
+                return changed
+            if deadline is None:
+                time.sleep(self.interval)
+            else:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return set()
+                time.sleep(min(self.interval, remaining))
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """
+    Finds the module files under the directories that are written, or moved or linked into place,
+    using inotify. New directories are watched as they are created.
+    """
+
+    MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    def __init__(self, directories):
+        self.directories = [os.path.realpath(directory) for directory in directories]
+        self.inotify = Inotify()
+        self.watches = {}
+        for directory in self.directories:
+            self._watch_tree(directory)
+
+    def _watch_tree(self, directory):
+        """
+        Watch directory and every directory under it, returning the module files already in them
+        """
+        found = []
+        try:
+            self.watches[self.inotify.add_watch(directory, self.MASK)] = directory
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError as e:
+            logger.warning("Unable to watch %s. Error: %s", directory, e)
+            return found
+        for entry in entries:
+            if entry.name.startswith('.'):
+                continue
+            if entry.is_dir():
+                found.extend(self._watch_tree(entry.path))
+            elif entry.is_file():
+                found.append(entry.path)
+        return found
+
+    def poll(self, timeout=None):
+        """
+        Returns the module files that have changed, waiting up to timeout seconds, or forever if it is
+        None, for there to be any
+        """
+        changed = set()
+        for wd, mask, cookie, name in self.inotify.read(timeout):
+            if mask & IN_Q_OVERFLOW:
+                logger.warning("Missed some file events, rescanning %s", ', '.join(self.directories))
+                for directory in self.directories:
+                    changed.update(find_module_files(directory))
+                continue
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            directory = self.watches.get(wd)
+            if directory is None or name.startswith('.'):
+                continue
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # anything written before the watch was added would be missed
+                    changed.update(self._watch_tree(path))
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO) or (mask & IN_CREATE and os.path.islink(path)):
+                # a new file is only read once it has been written and closed, unless it's a symlink
+                changed.add(path)
+        return changed
+
+    def close(self):
+        self.inotify.close()
+
+
+def make_watcher(directories, poll=False, interval=POLL_INTERVAL):
+    """
+    Returns an InotifyWatcher for the directories, or a PollingWatcher if poll is True or inotify
+    isn't available
+    """
+    if not poll:
+        try:
+            return InotifyWatcher(directories)
+        except OSError as e:
+            logger.warning("Polling every %d seconds as inotify can't be used. Error: %s", interval, e)
+    return PollingWatcher(directories, interval)
+
+
+def next_changes(watcher, debounce=DEBOUNCE, max_delay=MAX_DELAY):
+    """
+    Wait for module files to change, then keep collecting changes until there have been none for
+    debounce seconds, or for max_delay seconds since the first, so a burst of changes, e.g. an
+    EasyBuild installation, is returned at once
+    """
+    changed = watcher.poll()
+    deadline = time.monotonic() + max_delay
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        more = watcher.poll(min(debounce, remaining))
+        if not more:
+            break
+        changed |= more
+    return changed
+
+
+def watch(watcher, skip_deps=False, manifest=None, debounce=DEBOUNCE, max_delay=MAX_DELAY, max_loads=None):
+    """
+    Add the module files that change to the database, in one transaction for each burst of changes,
+    until max_loads bursts have been loaded, or forever if it is None
+    """
+    loads = 0
+    while max_loads is None or loads < max_loads:
+        module_files = sorted(path for path in next_changes(watcher, debounce, max_delay) if os.path.isfile(path))
+        if not module_files:
+            continue
+        logger.info("Loading %d new or changed module files", len(module_files))
+        # the connection may have been closed by the database while idle
+        close_old_connections()
+        try:
+            uploaded = load_module_files(module_files, skip_deps=skip_deps, jobs=1, batch_size=len(module_files),
+                                         manifest=manifest)
+        except Exception:
+            logger.exception("Unable to load %s", ', '.join(module_files))
+        else:
+            logger.info("Loaded %d module files", uploaded)
+        loads += 1
+
+
+if __name__ == "__main__":
+    import argparse
+    import signal
+    import sys
+    parser = argparse.ArgumentParser(description='Watch modules directories and add the info from every new or '
+                                                 'changed module to the bear_apps_docs database')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Turn on debugging output')
+    parser.add_argument('-s', '--skip-deps', action='store_true', help='Skip adding dependency relationships')
+    parser.add_argument('-m', '--manifest',
+                        help='Manifest file recording the module files already uploaded, so that module files '
+                             'are only uploaded once, including across restarts')
+    parser.add_argument('-d', '--debounce', type=float, default=DEBOUNCE,
+                        help='Seconds without changes before loading the changed module files (default: %(default)s)')
+    parser.add_argument('--max-delay', type=float, default=MAX_DELAY,
+                        help='Most seconds to wait for a burst of changes to end (default: %(default)s)')
+    parser.add_argument('--poll', action='store_true',
+                        help='Poll for changes rather than using inotify, e.g. when the module files are written '
+                             'on other hosts')
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL,
+                        help='Seconds between scans when polling (default: %(default)s)')
+    parser.add_argument('--no-initial-load', action='store_true',
+                        help="Don't load the module files that changed while this wasn't running")
+    parser.add_argument('directories', nargs='+', metavar='directory',
+                        help='Full path to the modules directory, e.g. /rds/bear-apps/2022a/EL8-icelake/modules/all')
+    args = parser.parse_args()
+
+    set_up_logging(args.verbose)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    manifest = Manifest(args.manifest) if args.manifest else None
+    # watch first, so nothing changed during the initial load is missed
+    watcher = make_watcher(args.directories, poll=args.poll, interval=args.interval)
+    try:
+        if not args.no_initial_load:
+            load_trees(args.directories, skip_deps=args.skip_deps, manifest=manifest)
+        watch(watcher, skip_deps=args.skip_deps, manifest=manifest, debounce=args.debounce,
+              max_delay=args.max_delay)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
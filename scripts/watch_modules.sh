@@ -0,0 +1,8 @@
+#!/bin/bash
+
+HERE=`dirname $(realpath $0)`
+cd ${HERE}
+
+source activate.sh
+./watch_modules.py $@
+
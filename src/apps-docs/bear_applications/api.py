@@ -0,0 +1,187 @@
+"""
+A read-only JSON API of the catalog, for the tools that would otherwise scrape the pages.
+
+The lists are paged by the key they are ordered on rather than by an offset, so a page costs the same however
+far into the catalog it is, and is stable as versions are added. Each page has the URL of the next in 'next'.
+The dump streams every version, looking up their links, dependencies and paragraphs a chunk of versions at a
+time, so that it runs in constant memory however big the catalog is.
+
+Like the pages, the responses have the ETag and Last-Modified of the catalog, and the pages of the lists are
+cached until the catalog changes, see caching.py.
+"""
+from itertools import islice
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from .caching import cache_by_generation, catalog_condition
+from .models import Application, CurrentVersion, Link, ParagraphData, Version
+
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+CHUNK_SIZE = 500
+
+
+def _limit(request):
+    """
+    Returns the number of results asked for, or None if it isn't valid
+    """
+    try:
+        limit = int(request.GET.get('limit', PAGE_SIZE))
+    except ValueError:
+        return None
+    if limit < 1:
+        return None
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def _bad_request(message):
+    return JsonResponse({'error': message}, status=400)
+
+
+def _page(request, results, limit, next_params):
+    """
+    Returns the response with the page of results, and the URL of the next page if there are more than limit
+    """
+    next_url = None
+    if len(results) > limit:
+        results = results[:limit]
+        next_url = request.build_absolute_uri('%s?%s' % (request.path, urlencode(dict(next_params(results[-1]),
+                                                                                      limit=limit))))
+    return JsonResponse({'results': results, 'next': next_url})
+
+
+def _visible_versions():
+    return (Version.objects.filter(is_visible=True)
+                           .order_by('application__name', 'version')
+                           .values('id', 'version', 'module_load', 'created', 'modified',
+                                   application_name=F('application__name')))
+
+
+def _serialise_versions(rows):
+    """
+    Returns the JSON of the versions in rows, looking up their links, dependencies and paragraphs
+    """
+    ids = [row['id'] for row in rows]
+    links = {}
+    for link in (Link.objects.filter(version_id__in=ids, bearappsversion__hidden=False, architecture__hidden=False)
+                             .order_by('bearappsversion__name', 'architecture__name')
+                             .values('version_id', bav=F('bearappsversion__displayed_name'),
+                                     arch=F('architecture__displayed_name'),
+                                     deprecated=F('bearappsversion__deprecated'),
+                                     supported=F('bearappsversion__supported'))):
+        links.setdefault(link.pop('version_id'), []).append(link)
+    dependencies = {}
+    for dependency in (Version.dependencies.through.objects.filter(from_version_id__in=ids)
+                                                           .order_by('to_version__application__name',
+                                                                     'to_version__version')
+                                                           .values('from_version_id',
+                                                                   application=F('to_version__application__name'),
+                                                                   version=F('to_version__version'))):
+        dependencies.setdefault(dependency.pop('from_version_id'), []).append(dependency)
+    paragraphs = {}
+    for paragraph in ParagraphData.objects.filter(version_id__in=ids).values('version_id', 'header', 'content'):
+        paragraphs.setdefault(paragraph.pop('version_id'), []).append(paragraph)
+
+    return [{'application': row['application_name'], 'version': row['version'], 'module_load': row['module_load'],
+             'created': row['created'], 'modified': row['modified'], 'links': links.get(row['id'], []),
+             'dependencies': dependencies.get(row['id'], []), 'paragraphs': paragraphs.get(row['id'], [])}
+            for row in rows]
+
+
+@catalog_condition
+@cache_by_generation
+def applications(request):
+    """
+    Page of the visible applications, ordered by name, starting after the one named 'after'
+    """
+    limit = _limit(request)
+    if limit is None:
+        return _bad_request("limit must be a positive number")
+
+    rows = (Application.objects.filter(reason_to_hide=None, version__is_visible=True)
+                               .order_by('name')
+                               .values('id', 'name', 'description', 'more_info')
+                               .distinct())
+    if request.GET.get('after'):
+        rows = rows.filter(name__gt=request.GET['after'])
+    rows = list(rows[:limit + 1])
+
+    ids = [row['id'] for row in rows]
+    current = dict(CurrentVersion.objects.filter(application_id__in=ids)
+                                         .values_list('application_id', 'version__version'))
+    paragraphs = {}
+    for paragraph in ParagraphData.objects.filter(application_id__in=ids).values('application_id', 'header',
+                                                                                 'content'):
+        paragraphs.setdefault(paragraph.pop('application_id'), []).append(paragraph)
+    versions_url = reverse('bear_applications:api_versions')
+    results = [{'name': row['name'], 'description': row['description'], 'more_info': row['more_info'],
+                'current_version': current.get(row['id']), 'paragraphs': paragraphs.get(row['id'], []),
+                'versions': request.build_absolute_uri(
+                    '%s?%s' % (versions_url, urlencode({'application': row['name']})))}
+               for row in rows]
+    return _page(request, results, limit, lambda result: {'after': result['name']})
+
+
+@catalog_condition
+@cache_by_generation
+def versions(request):
+    """
+    Page of the visible versions, ordered by application name and version, starting after the version
+    'after_version' of the application 'after', optionally only those of 'application'
+    """
+    limit = _limit(request)
+    if limit is None:
+        return _bad_request("limit must be a positive number")
+
+    rows = _visible_versions()
+    if request.GET.get('application'):
+        rows = rows.filter(application__name=request.GET['application'])
+    if request.GET.get('after'):
+        after, after_version = request.GET['after'], request.GET.get('after_version', '')
+        rows = rows.filter(Q(application__name__gt=after) | Q(application__name=after, version__gt=after_version))
+    results = _serialise_versions(list(rows[:limit + 1]))
+
+    def next_params(result):
+        params = {'after': result['application'], 'after_version': result['version']}
+        if request.GET.get('application'):
+            params['application'] = request.GET['application']
+        return params
+    return _page(request, results, limit, next_params)
+
+
+@catalog_condition
+@cache_by_generation
+def version(request, name, version):
+    """
+    A visible version of an application
+    """
+    row = get_object_or_404(_visible_versions(), application__name=name, version=version)
+    return JsonResponse(_serialise_versions([row])[0])
+
+
+def _dump():
+    """
+    Yield the JSON of every visible version, as a list, a chunk of versions at a time
+    """
+    encoder = DjangoJSONEncoder()
+    rows = _visible_versions().iterator(chunk_size=CHUNK_SIZE)
+    separator = '['
+    while True:
+        chunk = list(islice(rows, CHUNK_SIZE))
+        if not chunk:
+            break
+        yield separator + ',\n'.join(encoder.encode(result) for result in _serialise_versions(chunk))
+        separator = ',\n'
+    yield ']\n' if separator != '[' else '[]\n'
+
+
+@catalog_condition
+def dump(request):
+    """
+    Every visible version, streamed
+    """
+    return StreamingHttpResponse(_dump(), content_type='application/json')
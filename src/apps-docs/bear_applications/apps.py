@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class BearApplicationsConfig(AppConfig):
     name = 'bear_applications'
+
+    def ready(self):
+        from . import signals  # NOQA
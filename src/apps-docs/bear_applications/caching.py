@@ -0,0 +1,154 @@
+"""
+Caching of whole pages. The catalog only changes when the scripts (or the admin) write to it, and each
+write bumps the generation in CatalogState, see signals.py. Pages are cached under keys that include
+the generation, so a write means that the next request for each page renders it again, and the pages
+of the old generations expire from the cache in their own time.
+
+The cache is that of settings.CACHES['default'], which needs to be shared by the processes serving the
+site for the pages to be rendered once, e.g. a FileBasedCache or memcached.
+
+The generation and the time of the last change also give the ETag and Last-Modified of the pages, so that
+a client with the current page gets a 304 without the page being looked up or rendered.
+
+Data that several pages, or several URLs of a page, are built from can be cached the same way with
+cached_by_generation.
+
+The keys and ETags also include the version of the code, see code_version, so that a deployment that changes
+how the pages are rendered doesn't serve, or answer with a 304 for, pages rendered by the code before it.
+"""
+import hashlib
+import os
+from functools import lru_cache, wraps
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from .models import CatalogState
+
+
+def bump_generation():
+    """
+    Record that the catalog has changed
+    """
+    if not CatalogState.objects.filter(pk=1).update(generation=F('generation') + 1, modified=timezone.now()):
+        CatalogState.objects.get_or_create(pk=1, defaults={'generation': 1, 'modified': timezone.now()})
+
+
+def catalog_state():
+    """
+    Returns the CatalogState, which is unsaved if the catalog has never changed
+    """
+    return CatalogState.objects.filter(pk=1).first() or CatalogState(pk=1, generation=0, modified=None)
+
+
+# the code and templates that the pages are rendered by
+SOURCE_DIRS = [os.path.dirname(os.path.abspath(__file__)),
+               os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'core')]
+SOURCE_SUFFIXES = ('.py', '.html', '.txt', '.xml', '.json')
+
+
+@lru_cache(maxsize=None)
+def _source_hash():
+    """
+    Returns a hash of the contents of the files in SOURCE_DIRS, apart from the tests, read once per process
+    """
+    digest = hashlib.sha256()
+    for directory in SOURCE_DIRS:
+        for root, dirs, files in os.walk(directory):
+            dirs[:] = sorted(d for d in dirs if d not in ('tests', '__pycache__'))
+            for name in sorted(files):
+                if name.endswith(SOURCE_SUFFIXES):
+                    path = os.path.join(root, name)
+                    digest.update(os.path.relpath(path, directory).encode())
+                    with open(path, 'rb') as f:
+                        digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+def code_version():
+    """
+    Returns settings.PAGE_CACHE_VERSION, e.g. the release or commit being deployed, or if that isn't set
+    a hash of the code and templates
+    """
+    return settings.PAGE_CACHE_VERSION or _source_hash()
+
+
+def _request_state(request):
+    """
+    Returns the CatalogState, looking it up once per request
+    """
+    if not hasattr(request, 'catalog_state'):
+        request.catalog_state = catalog_state()
+    return request.catalog_state
+
+
+def _etag(request, *args, **kwargs):
+    """
+    Returns the ETag of the pages in the current state of the catalog
+    """
+    state = _request_state(request)
+    return '%s-%d-%f' % (code_version(), state.generation, state.modified.timestamp() if state.modified else 0)
+
+
+def _last_modified(request, *args, **kwargs):
+    """
+    Returns the time the catalog last changed
+    """
+    return _request_state(request).modified
+
+
+# Decorator that adds the ETag and Last-Modified of the catalog to the responses of a view, and answers
+# conditional requests that match them with a 304
+catalog_condition = condition(etag_func=_etag, last_modified_func=_last_modified)
+
+
+def cached_by_generation(name, compute, request=None):
+    """
+    Returns compute(), cached under name until the catalog changes
+    """
+    state = _request_state(request) if request is not None else catalog_state()
+    modified = state.modified.timestamp() if state.modified else 0
+    key = 'data:%s:%d:%f:%s' % (code_version(), state.generation, modified, name)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, settings.PAGE_CACHE_TIMEOUT)
+    return value
+
+
+def _page_key(request, state):
+    """
+    Returns the cache key of the page for request in this state of the catalog
+    """
+    # the time tells generations apart if the count is ever reset, e.g. when the database is restored
+    modified = state.modified.timestamp() if state.modified else 0
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return 'page:%s:%d:%f:%s:%s' % (code_version(), state.generation, modified, request.method, url)
+
+
+def cache_by_generation(view):
+    """
+    Decorator that caches the successful GET and HEAD responses of view until the catalog changes
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view(request, *args, **kwargs)
+
+        key = _page_key(request, _request_state(request))
+        response = cache.get(key)
+        if response is not None:
+            return response
+
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200 and not response.streaming:
+            def store(response):
+                cache.set(key, response, settings.PAGE_CACHE_TIMEOUT)
+            if callable(getattr(response, 'render', None)):
+                response.add_post_render_callback(store)
+            else:
+                store(response)
+        return response
+    return wrapper
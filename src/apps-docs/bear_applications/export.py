@@ -0,0 +1,216 @@
+"""
+Export the site as static files, which a web server can serve without Django or the database, e.g. with
+nginx using
+
+    root /var/www/apps-docs;
+    gzip_static on;
+    try_files $uri $uri/index.html =404;
+
+Each HTML page is written as index.html in the directory of its URL, and the other pages (the sitemap and
+the feed) at their URL, each with a gzipped copy alongside.
+
+The pages of an application and its versions are only rendered again if something they show about the
+application has changed since the last export, which is recorded in MANIFEST in the output directory.
+The other pages, which list across applications, are always rendered.
+"""
+import functools
+import gzip
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import unquote, urlsplit
+from django.db import connections
+from django.http import Http404
+from django.test import RequestFactory
+from django.urls import get_script_prefix, resolve, reverse
+
+from .models import Application, Architecture, BearAppsVersion, CurrentVersion, Gpu, Link, ParagraphData, Version
+from .urls import sitemaps
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = '.export.json'
+CHUNK_SIZE = 20
+
+
+def page_urls():
+    """
+    Returns {url: application id} for every page, where the id is None for pages that list across
+    applications. These are the pages in the sitemap, apart from there being a page for each version in
+    each BEAR Apps Version it is in.
+    """
+    urls = {get_script_prefix(): None,
+            reverse('bear_applications:sitemap'): None,
+            reverse('bear_applications:latest-applications-feed'): None}
+    for key, sitemap in sitemaps.items():
+        if key in ('applications', 'versions'):
+            continue
+        sitemap = sitemap()
+        for item in sitemap.items():
+            urls[sitemap.location(item)] = None
+
+    for pk, name in Application.objects.filter(version__is_visible=True).values_list('id', 'name').distinct():
+        urls[reverse('bear_applications:application', kwargs={'name': name})] = pk
+    # every version page that the filter and search pages link to, not only the one in the sitemap
+    for pk, name, version, bav in (Link.objects.filter(version__is_visible=True, bearappsversion__hidden=False,
+                                                       architecture__hidden=False)
+                                               .values_list('version__application_id', 'version__application__name',
+                                                            'version__version', 'bearappsversion__displayed_name')
+                                               .distinct()):
+        urls[reverse('bear_applications:application_version',
+                     kwargs={'bavname': bav, 'name': name, 'version': version})] = pk
+    return urls
+
+
+def fingerprints():
+    """
+    Returns {application id: hash} of what the pages of each application and its versions show, and a
+    hash of the BEAR Apps Versions and architectures, which they all show
+    """
+    hashes = {}
+
+    def add(pk, row):
+        hashes.setdefault(pk, hashlib.sha256()).update(repr(row).encode())
+
+    for row in Application.objects.order_by('id').values_list():
+        add(row[0], row)
+    fields = [field.attname for field in Version._meta.fields]
+    for row in Version.objects.order_by('id').values_list('application_id', *fields):
+        add(row[0], row)
+    for row in Link.objects.order_by('id').values_list('version__application_id', 'version_id', 'bearappsversion_id',
+                                                       'architecture_id'):
+        add(row[0], row)
+    for row in CurrentVersion.objects.order_by('id').values_list('application_id', 'version_id'):
+        add(row[0], row)
+    for row in ParagraphData.objects.order_by('id').values_list('application_id', 'version__application_id',
+                                                                'header', 'content'):
+        add(row[0] or row[1], row)
+    # which are listed on the pages of the versions at both ends
+    for row in (Version.dependencies.through.objects.order_by('id')
+                .values_list('from_version__application_id', 'to_version__application_id',
+                             'from_version__application__name', 'from_version__version',
+                             'to_version__application__name', 'to_version__version')):
+        add(row[0], row)
+        add(row[1], row)
+
+    shared = hashlib.sha256()
+    for model in (BearAppsVersion, Architecture, Gpu):
+        shared.update(repr(list(model.objects.order_by('id').values_list())).encode())
+    return {pk: h.hexdigest() for pk, h in hashes.items()}, shared.hexdigest()
+
+
+def _output_path(output, url, content_type):
+    """
+    Returns the path to write the page at url to, or None if it would be outside output
+    """
+    path = unquote(urlsplit(url).path).strip('/')
+    if content_type.startswith('text/html'):
+        path = os.path.join(path, 'index.html')
+    path = os.path.normpath(os.path.join(output, path))
+    if not path.startswith(os.path.join(output, '')):
+        return None
+    return path
+
+
+def _write(path, content):
+    """
+    Write content to path, and gzipped to path.gz, replacing them at once
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    for filename, data in [(path, content), (path + '.gz', gzip.compress(content, mtime=0))]:
+        with open(filename + '.tmp', 'wb') as f:
+            f.write(data)
+        os.replace(filename + '.tmp', filename)
+
+
+def render_pages(urls, output, base_url):
+    """
+    Render each of urls, as requested from base_url, and write them under output. Returns {url: path}
+    of the pages written, relative to output
+    """
+    base = urlsplit(base_url)
+    factory = RequestFactory()
+    written = {}
+    for url in urls:
+        request = factory.get(url, HTTP_HOST=base.netloc, secure=base.scheme == 'https')
+        match = resolve(request.path_info)
+        try:
+            response = match.func(request, *match.args, **match.kwargs)
+        except Http404:
+            logger.warning("Not exporting %s, which wasn't found", url)
+            continue
+        if callable(getattr(response, 'render', None)):
+            response.render()
+        if response.status_code != 200:
+            logger.warning("Not exporting %s, which gave %d", url, response.status_code)
+            continue
+        path = _output_path(output, url, response.get('Content-Type', ''))
+        if path is None:
+            logger.warning("Not exporting %s, which is outside the output directory", url)
+            continue
+        _write(path, response.content)
+        written[url] = os.path.relpath(path, output)
+    return written
+
+
+def _map(func, items, jobs):
+    """
+    Yield func(item) for each of items in a pool of jobs processes
+    """
+    if jobs == 1:
+        yield from map(func, items)
+        return
+
+    # the workers open their own connections
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(func, items)
+
+
+def export_site(output, base_url, jobs=None, full=False):
+    """
+    Export the site under output, as served from base_url, rendering pages in a pool of jobs processes.
+    Unless full is True, only the pages of applications that have changed since the last export are
+    rendered again. Returns the number of pages rendered.
+    """
+    output = os.path.realpath(output)
+    manifest_path = os.path.join(output, MANIFEST)
+    previous = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            previous = json.load(f)
+
+    urls = page_urls()
+    hashes, shared = fingerprints()
+    files = previous.get('files', {})
+    if full or previous.get('base_url') != base_url or previous.get('shared') != shared:
+        old_hashes = {}
+    else:
+        old_hashes = previous.get('applications', {})
+    to_render = sorted(url for url, pk in urls.items()
+                       if pk is None or url not in files or old_hashes.get(str(pk)) != hashes.get(pk))
+    logger.info("Rendering %d of %d pages", len(to_render), len(urls))
+
+    chunks = [to_render[i:i + CHUNK_SIZE] for i in range(0, len(to_render), CHUNK_SIZE)]
+    rendered = {}
+    for written in _map(functools.partial(render_pages, output=output, base_url=base_url), chunks, jobs):
+        rendered.update(written)
+    files = {url: path for url, path in files.items() if url in urls and url not in to_render}
+    files.update(rendered)
+
+    # remove the pages that are no longer on the site
+    paths = set(files.values())
+    for url, path in previous.get('files', {}).items():
+        if url not in files and path not in paths:
+            for filename in (path, path + '.gz'):
+                if os.path.exists(os.path.join(output, filename)):
+                    os.remove(os.path.join(output, filename))
+            logger.info("Removed %s", url)
+
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump({'base_url': base_url, 'shared': shared, 'applications': {str(pk): h for pk, h in hashes.items()},
+                   'files': files}, f, indent=1, sort_keys=True)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    return len(rendered)
@@ -0,0 +1,108 @@
+"""
+Facets of the search results: how many of the matching versions are in each BEAR Apps Version, architecture,
+status and toolchain family (see toolchains.py), which the search page shows as links that narrow the results
+down to those of one of them.
+
+The versions matching a search are cached until the catalog changes, see caching.cached_by_generation, and
+following a facet link only adds its parameter to the URL, so narrowing the results down doesn't match the text
+again. The results and the counts of the facets are then each worked out by the database from the visible links
+of the matching versions, the counts with a query that groups the links by each facet in turn.
+"""
+from django.conf import settings
+from django.db.models import Case, CharField, Count, F, Value, When
+
+from .models import Link
+
+# the URL parameter of each facet
+FACETS = ['bav', 'arch', 'status', 'toolchain']
+STATUSES = ['supported', 'deprecated', 'unsupported']
+# what the value of each facet is, on the visible links annotated by visible_links
+FIELDS = {'bav': 'bearappsversion__displayed_name', 'arch': 'architecture__displayed_name', 'status': 'status',
+          'toolchain': 'version__toolchain'}
+# the versions in each query, as in the rest of bear_applications. The facet counts repeat them in the query of
+# each facet, so that it has 4 x CHUNK_SIZE parameters, well under the most that SQLite (32766 since 3.32) and
+# MySQL (65535) allow
+CHUNK_SIZE = 500
+
+
+def visible_links(version_ids, selected):
+    """
+    Yields a queryset of the visible links of each chunk of the versions, with the values of the facets in
+    selected, {facet: value}
+    """
+    status = Case(When(bearappsversion__supported=False, then=Value('unsupported')),
+                  When(bearappsversion__deprecated=True, then=Value('deprecated')),
+                  default=Value('supported'), output_field=CharField())
+    for start in range(0, len(version_ids), CHUNK_SIZE):
+        yield (Link.objects.filter(version__in=version_ids[start:start + CHUNK_SIZE],
+                                   bearappsversion__hidden=False, architecture__hidden=False)
+                           .annotate(status=status)
+                           .filter(**{FIELDS[facet]: value for facet, value in selected.items()}))
+
+
+def result_rows(version_ids, rank, selected):
+    """
+    Returns a dict for each BEAR Apps Version of each of the versions that has a visible link with the values
+    of the facets in selected, with the name, version and sort order of the version, its rank (an expression on
+    the links) and whether all its links are deprecated or unsupported
+    """
+    rows = []
+    for links in visible_links(version_ids, selected):
+        rows.extend(links.values('version_id', app_sort_order=F('version__app_sort_order'),
+                                 name=F('version__application__name'), ver=F('version__version'),
+                                 bav=F('bearappsversion__displayed_name'),
+                                 deprecated=F('version__all_links_deprecated'),
+                                 unsupported=F('version__all_links_unsupported'), rank=rank)
+                         .order_by().distinct())
+    for row in rows:
+        row['supported'] = not row.pop('unsupported')
+    return rows
+
+
+def facet_counts(version_ids, selected):
+    """
+    Returns {facet: [(value, number of versions)]} for the versions with a visible link with the values of the
+    facets in selected, with the most common values first, apart from the statuses
+    """
+    counts = {facet: {} for facet in FACETS}
+    for links in visible_links(version_ids, selected):
+        # a GROUP BY for each facet, in one query
+        grouped = [links.values(value=F(FIELDS[facet])).order_by()
+                        .annotate(facet=Value(facet, output_field=CharField()),
+                                  versions=Count('version', distinct=True))
+                        .values_list('facet', 'value', 'versions')
+                   for facet in FACETS]
+        # a version is in only one chunk, so the counts of the chunks add up
+        for facet, value, versions in grouped[0].union(*grouped[1:], all=True):
+            counts[facet][value] = counts[facet].get(value, 0) + versions
+    for facet, by_value in counts.items():
+        counts[facet] = sorted(by_value.items())
+        if facet == 'status':
+            counts[facet].sort(key=lambda item: STATUSES.index(item[0]))
+        else:
+            counts[facet].sort(key=lambda item: -item[1])
+    return counts
+
+
+def facet_links(counts, selected, query):
+    """
+    Returns the facets for the search page, each with a URL query string for each of its values that narrows the
+    results down to it, or for a selected value that stops doing so. query is the QueryDict of the request.
+    """
+    names = {'bav': settings.WEBSITE_SITE_CONFIG['BAV_NAME'], 'arch': 'Architecture', 'status': 'Status',
+             'toolchain': 'Toolchain'}
+    facets = []
+    for facet in FACETS:
+        if not settings.WEBSITE_SITE_CONFIG['DISPLAY_ARCH'] and facet == 'arch':
+            continue
+        values = []
+        for value, count in counts[facet]:
+            params = query.copy()
+            if selected.get(facet) == value:
+                params.pop(facet)
+            else:
+                params[facet] = value
+            values.append({'value': value, 'count': count, 'selected': selected.get(facet) == value,
+                           'url': '?' + params.urlencode()})
+        facets.append({'name': names[facet], 'values': values})
+    return facets
@@ -11,8 +11,8 @@ class LatestApplicationsFeed(Feed):
                   "Provided by Advanced Research Computing for researchers at the University of Birmingham."
 
     def items(self):
-        return Version.objects.filter(reason_to_hide=None,
-                                      application__reason_to_hide=None).order_by('-modified')[:100]
+        return (Version.objects.filter(is_visible=True).select_related('application')
+                               .prefetch_related('link_set__bearappsversion').order_by('-modified')[:100])
 
     def item_title(self, item):
         return "{} - {}".format(item.application.name, item.version)
@@ -21,6 +21,8 @@ class LatestApplicationsFeed(Feed):
         return item.application.description.replace('\n', '')
 
     def item_link(self, item):
+        # the last link to be made, from those prefetched in items
+        link = max(item.link_set.all(), key=lambda link: link.id)
         return reverse('bear_applications:application_version',
-                       kwargs={'bavname': item.link_set.all().order_by('-id')[0].bearappsversion.displayed_name,
+                       kwargs={'bavname': link.bearappsversion.displayed_name,
                                'name': item.application.name, 'version': item.version})
@@ -0,0 +1,115 @@
+"""
+The rows of the pages that list applications, i.e. the applications page and the filter pages, which can have
+tens of thousands of them.
+
+Rather than the template reversing the URLs of each row, the URL of each page is reversed once with
+placeholders, see url_format, and the rows' URLs are made by filling them in, quoted in the same way that
+reverse() quotes them. The URLs and labels of the application and BEAR Apps Version, which are the same for
+many rows, are made once for each of them.
+
+The pages list every application unless they are given ?start=, in which case they list the next PAGE_SIZE
+applications from that (lowercase) name on, with a link to the next page starting at the application after
+them. This is keyset pagination, which reads only the rows of the page however far into the list it is. An
+alphabet index links to the pages starting at each letter, or to the letters within a page that lists
+everything.
+"""
+import re
+from urllib.parse import quote
+from django.db.models.functions import Lower, Substr
+from django.urls import reverse
+from django.utils.html import escape
+from django.utils.http import RFC3986_SUBDELIMS
+
+from .caching import cached_by_generation
+from .templatetags.app_filters import dot_wbr
+
+PAGE_SIZE = 200
+# what reverse() leaves unquoted
+SAFE = RFC3986_SUBDELIMS + '/~:@'
+# what quote() leaves as it is
+UNQUOTED = re.compile(r'[A-Za-z0-9_.\-%s]*' % re.escape(SAFE))
+
+
+def url_format(viewname, *names):
+    """
+    Returns the URL of viewname with a {name} placeholder for each of the keyword arguments in names, for
+    format_url
+    """
+    url = reverse(viewname, kwargs={name: '{%s}' % name for name in names})
+    return url.replace('%7B', '{').replace('%7D', '}')
+
+
+def quote_url(value):
+    """
+    Returns value quoted as reverse() quotes the arguments of URLs
+    """
+    # most need no quoting, which is quicker to find out than to quote them
+    return value if UNQUOTED.fullmatch(value) else quote(value, safe=SAFE)
+
+
+def format_url(url, **kwargs):
+    """
+    Returns url, from url_format, with the placeholders filled in by kwargs
+    """
+    return url.format(**{name: quote_url(value) for name, value in kwargs.items()})
+
+
+def page(rows, start, request):
+    """
+    Returns (the rows of the page starting at start, the name of the application that the next page starts at
+    or None, the letters of the alphabet index) where rows is a values() queryset annotated with sort_name
+    """
+    def all_letters():
+        return list(rows.annotate(letter=Substr('sort_name', 1, 1)).order_by('letter')
+                        .values_list('letter', flat=True).distinct())
+
+    # those of all the rows, whichever page this is
+    letters = cached_by_generation('letters:' + request.path, all_letters, request)
+    rows = rows.filter(sort_name__gte=start.lower())
+    following = list(rows.order_by('sort_name').values_list('sort_name', flat=True).distinct()[PAGE_SIZE:PAGE_SIZE + 1])
+    if following:
+        rows = rows.filter(sort_name__lt=following[0])
+    return rows, following[0] if following else None, letters
+
+
+def listing(rows, start, request):
+    """
+    Returns the context of a page listing the rows, with the URLs of each row and of the alphabet index and next
+    page. rows is a values() queryset with the application name as 'name', the version as 'ver' and the BEAR Apps
+    Version as 'bav', and start is None or the name to start the page at.
+    """
+    rows = rows.annotate(sort_name=Lower('name'))
+    following = None
+    if start is not None:
+        rows, following, letters = page(rows, start, request)
+    application = url_format('bear_applications:application', 'name')
+    version = url_format('bear_applications:application_version', 'bavname', 'name', 'version')
+    bav_url = url_format('bear_applications:filter', 'bearappsversion')
+
+    applications = list(rows)
+    anchors = []
+    # (quoted name, URL, label) of each application and (quoted name, URL) of each BEAR Apps Version, the label
+    # escaped here as it has <wbr>s in it, and the rest by the templates, as the base template turns off autoescape
+    names = {}
+    bavs = {}
+    for row in applications:
+        if not anchors or row['sort_name'][:1] != anchors[-1]:
+            # the first row of each letter, which the alphabet index of a page listing everything links to
+            anchors.append(row['sort_name'][:1])
+            row['anchor'] = anchors[-1]
+        if row['name'] not in names:
+            quoted = quote_url(row['name'])
+            names[row['name']] = (quoted, application.format(name=quoted), dot_wbr(escape(row['name'])))
+        if row['bav'] not in bavs:
+            quoted = quote_url(row['bav'])
+            bavs[row['bav']] = (quoted, bav_url.format(bearappsversion=quoted))
+        quoted_name, row['application_url'], row['label'] = names[row['name']]
+        quoted_bav, row['bav_url'] = bavs[row['bav']]
+        row['version_url'] = version.format(bavname=quoted_bav, name=quoted_name, version=quote_url(row['ver']))
+
+    if start is None:
+        index = [{'letter': letter, 'url': '#index-%s' % quote(letter)} for letter in anchors]
+    else:
+        index = [{'letter': letter, 'url': '?start=%s' % quote(letter)} for letter in letters]
+    return {'applications': applications, 'index': index, 'paged': start is not None,
+            'next_url': '?start=%s' % quote(following) if following else None}
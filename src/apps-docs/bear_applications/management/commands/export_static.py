@@ -0,0 +1,22 @@
+import os
+from django.core.management.base import BaseCommand
+
+from bear_applications.export import export_site
+
+
+class Command(BaseCommand):
+    help = ('Export every page of the site as static files, with gzipped copies, only rendering the pages of '
+            'applications again if they have changed since the last export')
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Directory to write the site to')
+        parser.add_argument('base_url', help='URL the site is served from, e.g. https://apps.example.com, '
+                                             'which the host must be in ALLOWED_HOSTS for')
+        parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                            help='Number of processes rendering pages (default: number of CPUs)')
+        parser.add_argument('--full', action='store_true', help='Render every page again')
+
+    def handle(self, *args, **options):
+        count = export_site(options['output'], options['base_url'].rstrip('/'), jobs=options['jobs'],
+                            full=options['full'])
+        self.stdout.write('Rendered %d pages' % count)
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from bear_applications.models import SearchDocument
+from bear_applications.search import update_documents
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the search documents of every visible version, e.g. after changing the database directly'
+
+    def handle(self, *args, **options):
+        update_documents()
+        self.stdout.write('Indexed %d versions' % SearchDocument.objects.count())
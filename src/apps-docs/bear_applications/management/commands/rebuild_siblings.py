@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from bear_applications.models import Version
+from bear_applications.siblings import update_siblings
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the CPU/GPU siblings and CUDA flags of every version, e.g. after changing the toolchains'
+
+    def handle(self, *args, **options):
+        changed = update_siblings()
+        self.stdout.write('Updated %d versions, %d of them with a sibling'
+                          % (changed, Version.objects.filter(sibling__isnull=False).count()))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from bear_applications.toolchains import update_toolchains
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the toolchain family of every version, e.g. after changing the toolchain families'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Updated %d versions' % update_toolchains())
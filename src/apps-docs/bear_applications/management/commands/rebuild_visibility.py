@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from bear_applications.models import Version
+from bear_applications.visibility import update_visibility
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the visibility and status flags of every version, e.g. after changing the database directly'
+
+    def handle(self, *args, **options):
+        update_visibility()
+        self.stdout.write('Updated %d versions, %d of them visible'
+                          % (Version.objects.count(), Version.objects.filter(is_visible=True).count()))
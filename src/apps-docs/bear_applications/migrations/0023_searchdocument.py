@@ -0,0 +1,109 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:31
+
+from django.db import migrations, models
+from django.db.models import Q
+from django.db.utils import OperationalError
+import django.db.models.deletion
+
+# as in bear_applications.search as of this migration
+SEPARATOR = '\x1f'
+COLUMNS = ['name', 'ver', 'module_load', 'other']
+FTS_TABLE = 'bear_applications_searchdocument_fts'
+CHUNK_SIZE = 500
+
+
+def fts_sql():
+    table = 'bear_applications_searchdocument'
+    columns = ', '.join(COLUMNS)
+    new = ', '.join('new.%s' % column for column in COLUMNS)
+    old = ', '.join('old.%s' % column for column in COLUMNS)
+    delete = "INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.version_id, {old});"
+    insert = "INSERT INTO {fts}(rowid, {columns}) VALUES (new.version_id, {new});"
+    return [s.format(fts=FTS_TABLE, table=table, columns=columns, new=new, old=old) for s in [
+        "CREATE VIRTUAL TABLE {fts} USING fts5({columns}, content='{table}', content_rowid='version_id', "
+        "tokenize='trigram')",
+        "CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN " + insert + " END",
+        "CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN " + delete + " END",
+        "CREATE TRIGGER {fts}_update AFTER UPDATE ON {table} BEGIN " + delete + " " + insert + " END",
+    ]]
+
+
+def create_index(apps, schema_editor):
+    """
+    Index the search documents for substring matching, if the database can
+    """
+    if schema_editor.connection.vendor == 'sqlite':
+        try:
+            for sql in fts_sql():
+                schema_editor.execute(sql)
+        except OperationalError:
+            # before SQLite 3.34 there is no trigram tokenizer, so the table is scanned
+            schema_editor.execute('DROP TABLE IF EXISTS %s' % FTS_TABLE)
+    elif schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for column in COLUMNS:
+            schema_editor.execute('CREATE INDEX bear_applications_searchdocument_%s_trgm ON '
+                                  'bear_applications_searchdocument USING gin (UPPER("%s"::text) gin_trgm_ops)'
+                                  % (column, column))
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS %s' % FTS_TABLE)
+
+
+def create_documents(apps, schema_editor):
+    """
+    Create the search documents of the visible versions
+    """
+    Version = apps.get_model('bear_applications', 'Version')
+    ParagraphData = apps.get_model('bear_applications', 'ParagraphData')
+    SearchDocument = apps.get_model('bear_applications', 'SearchDocument')
+    ids = list(Version.objects.order_by('id').values_list('id', flat=True))
+    for start in range(0, len(ids), CHUNK_SIZE):
+        versions = list(Version.objects.filter(id__in=ids[start:start + CHUNK_SIZE], reason_to_hide=None,
+                                               application__reason_to_hide=None, link__bearappsversion__hidden=False,
+                                               link__architecture__hidden=False)
+                                       .values('id', 'version', 'module_load', 'application_id', 'application__name',
+                                               'application__description', 'application__more_info')
+                                       .order_by().distinct())
+        paragraphs = {}
+        app_ids = {ver['application_id'] for ver in versions}
+        for version_id, application_id, header, content in (
+                ParagraphData.objects.filter(Q(version__in=[ver['id'] for ver in versions]) |
+                                             Q(application__in=app_ids))
+                                     .order_by('created', 'id')
+                                     .values_list('version_id', 'application_id', 'header', 'content')):
+            key = ('version', version_id) if version_id is not None else ('application', application_id)
+            paragraphs.setdefault(key, []).extend([header, content])
+        documents = []
+        for ver in versions:
+            other = ([ver['application__description'], ver['application__more_info']] +
+                     paragraphs.get(('version', ver['id']), []) +
+                     paragraphs.get(('application', ver['application_id']), []))
+            documents.append(SearchDocument(version_id=ver['id'], name=ver['application__name'], ver=ver['version'],
+                                            module_load=ver['module_load'],
+                                            other=SEPARATOR + SEPARATOR.join(other) + SEPARATOR))
+        SearchDocument.objects.bulk_create(documents)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bear_applications', '0022_gpu'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('version', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='bear_applications.version')),
+                ('name', models.TextField()),
+                ('ver', models.TextField()),
+                ('module_load', models.TextField(blank=True)),
+                ('other', models.TextField(blank=True)),
+            ],
+        ),
+        migrations.RunPython(create_index, drop_index),
+        migrations.RunPython(create_documents, migrations.RunPython.noop),
+    ]
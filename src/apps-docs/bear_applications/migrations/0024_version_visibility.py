@@ -0,0 +1,81 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:38
+
+from django.db import migrations, models
+from django.db.models import BooleanField, Case, Count, Exists, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+
+def set_visibility(apps, schema_editor):
+    """
+    Set the flags of every version, as bear_applications.visibility did as of this migration
+    """
+    Application = apps.get_model('bear_applications', 'Application')
+    Link = apps.get_model('bear_applications', 'Link')
+    Version = apps.get_model('bear_applications', 'Version')
+    all_links = Link.objects.filter(version=OuterRef('pk'))
+    links = all_links.filter(bearappsversion__hidden=False, architecture__hidden=False)
+    link_count = links.order_by().values('version').annotate(count=Count('id')).values('count')
+    Version.objects.update(
+        is_visible=Case(When(reason_to_hide=None,
+                             then=Exists(Application.objects.filter(pk=OuterRef('application_id'),
+                                                                    reason_to_hide=None))),
+                        default=Value(False), output_field=BooleanField()),
+        visible_link_count=Coalesce(Subquery(link_count, output_field=IntegerField()), Value(0)),
+        all_links_deprecated=Case(When(Exists(links.filter(bearappsversion__deprecated=False)), then=Value(False)),
+                                  When(Exists(links), then=Value(True)),
+                                  default=Value(False), output_field=BooleanField()),
+        all_links_unsupported=Case(When(Exists(links.filter(bearappsversion__supported=True)), then=Value(False)),
+                                   When(Exists(links), then=Value(True)),
+                                   default=Value(False), output_field=BooleanField()),
+        has_deprecated_link=Exists(all_links.filter(bearappsversion__deprecated=True)),
+        has_unsupported_link=Exists(all_links.filter(bearappsversion__supported=False)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bear_applications', '0023_searchdocument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='version',
+            name='all_links_deprecated',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='version',
+            name='all_links_unsupported',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='version',
+            name='has_deprecated_link',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='version',
+            name='has_unsupported_link',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='version',
+            name='is_visible',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='version',
+            name='visible_link_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='version',
+            index=models.Index(fields=['is_visible', 'visible_link_count'], name='version_visible_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='version',
+            index=models.Index(fields=['is_visible', 'has_deprecated_link', 'has_unsupported_link'], name='version_status_idx'),
+        ),
+        migrations.RunPython(set_visibility, migrations.RunPython.noop),
+    ]
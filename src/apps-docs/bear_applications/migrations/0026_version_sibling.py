@@ -0,0 +1,80 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# bear_applications.siblings as of this migration
+TOOLCHAIN_SIBLING_REPLACEMENTS = {
+    '-foss-': '-fosscuda-',
+    '-fosscuda-': '-foss-',
+    '-gompi-': '-gompic-',
+    '-gompic-': '-gompi-',
+    '-iomkl-': '-iomklc-',
+    '-iomklc-': '-iomkl-',
+    '-iompi-': '-iompic-',
+    '-iompic-': '-iompi-',
+    '2021a': '2021a-CUDA-11.3.1',
+    '2021a-CUDA-11.3.1': '2021a',
+}
+GPU_TOOLCHAINS = ['-fosscuda-', '-gompic-', '-iomklc-', '-iompic-']
+
+
+def _is_gpu(toolchain):
+    return toolchain in GPU_TOOLCHAINS or '-CUDA-' in toolchain
+
+
+def sibling_module_load(module_load):
+    sibling, sibling_is_gpu, cuda = None, False, False
+    for find, replace in TOOLCHAIN_SIBLING_REPLACEMENTS.items():
+        if find in module_load:
+            sibling = module_load.replace(find, replace)
+            sibling_is_gpu = _is_gpu(replace)
+            if _is_gpu(find):
+                cuda = True
+    return sibling, sibling_is_gpu, cuda
+
+
+def set_siblings(apps, schema_editor):
+    """
+    Set the sibling and flags of every version
+    """
+    Version = apps.get_model('bear_applications', 'Version')
+    rows = list(Version.objects.values_list('id', 'application_id', 'module_load', 'application__name'))
+    by_module_load = {}
+    for pk, app_id, module_load, _ in sorted(rows, reverse=True):
+        # the first of any versions with the same module load
+        by_module_load[(app_id, module_load)] = pk
+
+    changed = []
+    for pk, app_id, module_load, name in rows:
+        sibling, sibling_is_gpu, cuda = sibling_module_load(module_load)
+        sibling_id = by_module_load.get((app_id, sibling))
+        changed.append(Version(id=pk, sibling_id=sibling_id, sibling_is_gpu=sibling_is_gpu and sibling_id is not None,
+                               cuda=cuda or 'cuda' in name.lower()))
+    Version.objects.bulk_update(changed, ['sibling', 'sibling_is_gpu', 'cuda'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bear_applications', '0025_catalogstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='version',
+            name='cuda',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='version',
+            name='sibling',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='bear_applications.version'),
+        ),
+        migrations.AddField(
+            model_name='version',
+            name='sibling_is_gpu',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(set_siblings, migrations.RunPython.noop),
+    ]
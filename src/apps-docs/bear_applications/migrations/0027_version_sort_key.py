@@ -0,0 +1,61 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:52
+
+import re
+
+from django.db import migrations, models
+
+# bear_applications.ordering.version_sort_key as of this migration
+KEY_LENGTH = 255
+TOKEN = re.compile(r'\d+|[a-z]+')
+PRE_RELEASES = {'dev': 0, 'alpha': 1, 'beta': 2, 'pre': 3, 'preview': 3, 'rc': 3}
+PRE_RELEASE_LETTERS = {'a': 1, 'b': 2, 'c': 3}
+
+
+def version_sort_key(version):
+    version = version.lower()
+    key = []
+    for match in TOKEN.finditer(version):
+        token = match.group()
+        if token.isdigit():
+            digits = token.lstrip('0') or '0'
+            key.append('n%02d%s' % (len(digits), digits))
+        elif token in PRE_RELEASES:
+            key.append('b%d' % PRE_RELEASES[token])
+        elif token in PRE_RELEASE_LETTERS and version[match.end():match.end() + 1].isdigit():
+            key.append('b%d' % PRE_RELEASE_LETTERS[token])
+        else:
+            key.append('w%s0' % token)
+    key.append('e')
+    return ''.join(key)[:KEY_LENGTH]
+
+
+def set_sort_keys(apps, schema_editor):
+    Version = apps.get_model('bear_applications', 'Version')
+    versions = list(Version.objects.only('id', 'version'))
+    for ver in versions:
+        ver.version_sort_key = version_sort_key(ver.version)
+    Version.objects.bulk_update(versions, ['version_sort_key'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bear_applications', '0026_version_sibling'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='version',
+            options={'ordering': ['-app_sort_order', '-version_sort_key', '-version']},
+        ),
+        migrations.AddField(
+            model_name='version',
+            name='version_sort_key',
+            field=models.CharField(default='', max_length=255),
+        ),
+        migrations.RunPython(set_sort_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='version',
+            index=models.Index(fields=['application', 'app_sort_order', 'version_sort_key'], name='version_order_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 3.2.25 on 2026-10-18 09:05
+
+import re
+
+from django.db import migrations, models
+
+# bear_applications.toolchains as of this migration
+TOOLCHAIN_FAMILIES = {
+    'foss': 'foss',
+    'fosscuda': 'foss',
+    'gompi': 'foss',
+    'gompic': 'foss',
+    'GCC': 'GCC',
+    'GCCcore': 'GCC',
+    'gcccuda': 'GCC',
+    'intel': 'intel',
+    'intelcuda': 'intel',
+    'iimpi': 'intel',
+    'iimpic': 'intel',
+    'iccifort': 'intel',
+    'intel-compilers': 'intel',
+    'iomkl': 'iomkl',
+    'iomklc': 'iomkl',
+    'iompi': 'iomkl',
+    'iompic': 'iomkl',
+    'NVHPC': 'NVHPC',
+    'nvompi': 'NVHPC',
+}
+TOOLCHAIN = re.compile(r'-([A-Za-z][\w-]*?)-\d')
+
+
+def toolchain_family(version):
+    for toolchain in TOOLCHAIN.findall(version):
+        if toolchain in TOOLCHAIN_FAMILIES:
+            return TOOLCHAIN_FAMILIES[toolchain]
+    return 'system'
+
+
+def set_toolchains(apps, schema_editor):
+    Version = apps.get_model('bear_applications', 'Version')
+    versions = list(Version.objects.only('id', 'version'))
+    for ver in versions:
+        ver.toolchain = toolchain_family(ver.version)
+    Version.objects.bulk_update(versions, ['toolchain'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bear_applications', '0027_version_sort_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='version',
+            name='toolchain',
+            field=models.CharField(default='', max_length=64),
+        ),
+        migrations.RunPython(set_toolchains, migrations.RunPython.noop),
+    ]
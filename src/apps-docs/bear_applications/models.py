@@ -19,10 +19,31 @@ class Version(models.Model):
     reason_to_hide = models.TextField(null=True)
     dependencies = models.ManyToManyField('self', symmetrical=False, related_name='requires')
     app_sort_order = models.IntegerField(default=0)
+    # set from version as it is saved, see ordering.py
+    version_sort_key = models.CharField(max_length=255, default='')
+    # set from version as it is saved, see toolchains.py
+    toolchain = models.CharField(max_length=64, default='')
+    # worked out from the other models, see visibility.py
+    is_visible = models.BooleanField(default=True)
+    visible_link_count = models.IntegerField(default=0)
+    all_links_deprecated = models.BooleanField(default=False)
+    all_links_unsupported = models.BooleanField(default=False)
+    has_deprecated_link = models.BooleanField(default=False)
+    has_unsupported_link = models.BooleanField(default=False)
+    # worked out from the module loads, see siblings.py
+    sibling = models.ForeignKey('self', null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    sibling_is_gpu = models.BooleanField(default=False)
+    cuda = models.BooleanField(default=False)
 
     class Meta:
         unique_together = (('application', 'version'),)
-        ordering = ['-app_sort_order', '-version', ]
+        ordering = ['-app_sort_order', '-version_sort_key', '-version', ]
+        indexes = [
+            models.Index(fields=['application', 'app_sort_order', 'version_sort_key'], name='version_order_idx'),
+            models.Index(fields=['is_visible', 'visible_link_count'], name='version_visible_idx'),
+            models.Index(fields=['is_visible', 'has_deprecated_link', 'has_unsupported_link'],
+                         name='version_status_idx'),
+        ]
 
     @property
     def sorted_dependencies(self):
@@ -92,3 +113,23 @@ class Gpu(models.Model):
     class Meta:
         unique_together = (('name', 'architecture'),)
         ordering = ['name']
+
+
+class SearchDocument(models.Model):
+    """
+    The text that the search page matches a visible Version on, kept up to date by bear_applications.signals
+    """
+    version = models.OneToOneField(Version, primary_key=True, on_delete=models.CASCADE)
+    name = models.TextField()
+    ver = models.TextField()
+    module_load = models.TextField(blank=True)
+    # the description, more info and the headers and contents of the paragraphs, see search.SEPARATOR
+    other = models.TextField(blank=True)
+
+
+class CatalogState(models.Model):
+    """
+    A single row, whose generation goes up whenever the catalog changes, see bear_applications.caching
+    """
+    generation = models.BigIntegerField(default=0)
+    modified = models.DateTimeField()
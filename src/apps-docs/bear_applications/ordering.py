@@ -0,0 +1,59 @@
+"""
+The order of the versions of an application. Each Version stores version_sort_key(version), which compares
+as a plain string in the order that the versions should be listed in, so that they can be ordered by the
+database (with app_sort_order first, see the version_order_idx index) rather than parsed on each request.
+
+The key splits the version into runs of digits and of letters, where anything else separates them:
+
+- numbers compare by value, so 3.10.1 is after 3.8.6, and leading zeros are ignored
+- words compare alphabetically, ignoring case, so 3.8.6-GCCcore-8.3.0 is after 3.8.6-foss-2019b
+- a number is before a word in the same place, so 1.0.1 is before 1.0-foss-2019b
+- a version is before those that it is the start of, so 1.0 is before 1.0.1 and 1.0-foss-2019b
+- except for pre-releases, dev, alpha, beta, pre, rc and the like, which are before the release, so 1.0rc1
+  is before 1.0, in the order 1.0.dev1, 1.0a1, 1.0b1, 1.0rc1. The single letters a, b and c are only
+  pre-releases when followed by a number, as otherwise they are more often suffixes, e.g. 2019b or 1.1.1k.
+
+The key is made of digits and lowercase letters only, so it sorts the same way with any collation.
+
+The stored key is cut to KEY_LENGTH characters, which fits in an index on MySQL, so versions whose keys are
+the same up to there are ordered by the version itself. full_sort_key gives the whole key, for comparing
+versions in Python.
+"""
+import re
+
+KEY_LENGTH = 255
+TOKEN = re.compile(r'\d+|[a-z]+')
+# the rank of each pre-release among those of the same release
+PRE_RELEASES = {'dev': 0, 'alpha': 1, 'beta': 2, 'pre': 3, 'preview': 3, 'rc': 3}
+PRE_RELEASE_LETTERS = {'a': 1, 'b': 2, 'c': 3}
+
+
+def full_sort_key(version):
+    """
+    Returns the whole of the key that version sorts by
+    """
+    version = version.lower()
+    key = []
+    for match in TOKEN.finditer(version):
+        token = match.group()
+        if token.isdigit():
+            digits = token.lstrip('0') or '0'
+            # the length first, so that the longer numbers are the bigger ones
+            key.append('n%02d%s' % (len(digits), digits))
+        elif token in PRE_RELEASES:
+            key.append('b%d' % PRE_RELEASES[token])
+        elif token in PRE_RELEASE_LETTERS and version[match.end():match.end() + 1].isdigit():
+            key.append('b%d' % PRE_RELEASE_LETTERS[token])
+        else:
+            # ended with a 0, which is before any letter, so that a word is before those it is the start of
+            key.append('w%s0' % token)
+    # ended with an e, which is after the pre-releases (b) but before numbers (n) and words (w)
+    key.append('e')
+    return ''.join(key)
+
+
+def version_sort_key(version):
+    """
+    Returns the key that version sorts by, as stored
+    """
+    return full_sort_key(version)[:KEY_LENGTH]
@@ -0,0 +1,166 @@
+"""
+The search index: a SearchDocument for each visible Version, holding the text that the search page
+matches against, so that a search reads one table rather than joining Application, Version and
+ParagraphData.
+
+With SQLite the documents are also in an FTS5 table using the trigram tokenizer, which makes the
+LIKE matching of partial and exact searches use an index. With PostgreSQL the columns have pg_trgm
+GIN indexes, which do the same for icontains and iexact. Otherwise the table is scanned.
+"""
+import operator
+from functools import reduce
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import ParagraphData, SearchDocument, Version
+
+# Between the entries in SearchDocument.other, and at either end, so that exact searches can match any one
+SEPARATOR = '\x1f'
+COLUMNS = ['name', 'ver', 'module_load', 'other']
+FTS_TABLE = 'bear_applications_searchdocument_fts'
+CHUNK_SIZE = 500
+
+_fts_tables = {}
+
+
+def fts_sql():
+    """
+    Returns the SQL that creates the FTS5 table of the search documents, and the triggers that keep
+    it in step with them
+    """
+    table = 'bear_applications_searchdocument'
+    columns = ', '.join(COLUMNS)
+    new = ', '.join('new.%s' % column for column in COLUMNS)
+    old = ', '.join('old.%s' % column for column in COLUMNS)
+    delete = "INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.version_id, {old});"
+    insert = "INSERT INTO {fts}(rowid, {columns}) VALUES (new.version_id, {new});"
+    return [s.format(fts=FTS_TABLE, table=table, columns=columns, new=new, old=old) for s in [
+        "CREATE VIRTUAL TABLE {fts} USING fts5({columns}, content='{table}', content_rowid='version_id', "
+        "tokenize='trigram')",
+        "CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN " + insert + " END",
+        "CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN " + delete + " END",
+        "CREATE TRIGGER {fts}_update AFTER UPDATE ON {table} BEGIN " + delete + " " + insert + " END",
+    ]]
+
+
+def has_fts():
+    """
+    True if the database has the FTS5 table, i.e. it is SQLite with the trigram tokenizer
+    """
+    name = connection.settings_dict['NAME']
+    if name not in _fts_tables:
+        _fts_tables[name] = (connection.vendor == 'sqlite' and
+                             FTS_TABLE in connection.introspection.table_names(include_views=False))
+    return _fts_tables[name]
+
+
+def update_documents(version_ids=None):
+    """
+    Bring the search documents of these versions, or of all of them if version_ids is None, up to date,
+    creating them for the visible versions and deleting them for the others.
+    """
+    if version_ids is None:
+        with transaction.atomic():
+            SearchDocument.objects.all().delete()
+            for start in range(0, Version.objects.count(), CHUNK_SIZE):
+                ids = list(Version.objects.order_by('id').values_list('id', flat=True)[start:start + CHUNK_SIZE])
+                _create_documents(ids)
+        return
+
+    version_ids = sorted(set(version_ids))
+    # this is run on every write, so there is no savepoint of its own
+    with transaction.atomic(savepoint=False):
+        for start in range(0, len(version_ids), CHUNK_SIZE):
+            ids = version_ids[start:start + CHUNK_SIZE]
+            SearchDocument.objects.filter(version__in=ids).delete()
+            _create_documents(ids)
+
+
+def _create_documents(ids):
+    """
+    Create the search documents of the visible versions in ids
+    """
+    versions = list(Version.objects.filter(id__in=ids, reason_to_hide=None, application__reason_to_hide=None,
+                                           link__bearappsversion__hidden=False, link__architecture__hidden=False)
+                                   .values('id', 'version', 'module_load', 'application_id', 'application__name',
+                                           'application__description', 'application__more_info')
+                                   .order_by().distinct())
+    if not versions:
+        return
+
+    paragraphs = {}
+    app_ids = {ver['application_id'] for ver in versions}
+    for version_id, application_id, header, content in (
+            ParagraphData.objects.filter(Q(version__in=[ver['id'] for ver in versions]) | Q(application__in=app_ids))
+                                 .order_by('created', 'id')
+                                 .values_list('version_id', 'application_id', 'header', 'content')):
+        key = ('version', version_id) if version_id is not None else ('application', application_id)
+        paragraphs.setdefault(key, []).extend([header, content])
+
+    documents = []
+    for ver in versions:
+        other = ([ver['application__description'], ver['application__more_info']] +
+                 paragraphs.get(('version', ver['id']), []) +
+                 paragraphs.get(('application', ver['application_id']), []))
+        documents.append(SearchDocument(version_id=ver['id'], name=ver['application__name'], ver=ver['version'],
+                                        module_load=ver['module_load'],
+                                        other=SEPARATOR + SEPARATOR.join(other) + SEPARATOR))
+    SearchDocument.objects.bulk_create(documents)
+
+
+def _condition_q(columns, term, exact):
+    """
+    Returns a Q matching documents where any of columns contains, or if exact is True equals, term
+    (case insensitively)
+    """
+    lookups = []
+    for column in columns:
+        if column == 'other' and exact:
+            lookups.append(Q(other__icontains=SEPARATOR + term + SEPARATOR))
+        else:
+            lookups.append(Q(**{'%s__%s' % (column, 'iexact' if exact else 'icontains'): term}))
+    return reduce(operator.or_, lookups)
+
+
+def _condition_sql(columns, term, exact):
+    """
+    Returns SQL, and its params, selecting the rowids of the FTS5 table where any of columns contains,
+    or if exact is True equals, term (case insensitively, as LIKE does)
+    """
+    like = 'LIKE %s'
+    if any(c in term for c in '%_\\'):
+        # which the trigram index can't be used for
+        like = "LIKE %s ESCAPE '\\'"
+        term = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    selects = []
+    params = []
+    for column in columns:
+        selects.append('SELECT rowid FROM %s WHERE %s %s' % (FTS_TABLE, column, like))
+        if column == 'other' and exact:
+            params.append('%%%s%s%s%%' % (SEPARATOR, term, SEPARATOR))
+        else:
+            params.append(term if exact else '%%%s%%' % term)
+    return ' UNION '.join(selects), params
+
+
+def search_documents(conditions, match_all):
+    """
+    Returns a queryset of the SearchDocuments that match all of the conditions if match_all is True, or
+    any of them if not. Each condition is (columns, term, exact), and matches if any of columns contains,
+    or if exact is True equals, term.
+    """
+    from .models import SearchDocument
+
+    if not has_fts():
+        combine = operator.and_ if match_all else operator.or_
+        return SearchDocument.objects.filter(reduce(combine, [_condition_q(*condition) for condition in conditions]))
+
+    selects = []
+    params = []
+    for condition in conditions:
+        sql, condition_params = _condition_sql(*condition)
+        selects.append('SELECT rowid FROM (%s)' % sql)
+        params.extend(condition_params)
+    sql = (' INTERSECT ' if match_all else ' UNION ').join(selects)
+    return SearchDocument.objects.filter(version_id__in=RawSQL(sql, params))
@@ -0,0 +1,90 @@
+"""
+The CPU/GPU sibling of each Version, and whether it is built with CUDA, which are worked out from the module
+loads of the versions of its application and stored on it, so that the version page doesn't have to:
+
+- sibling: the version of the same application whose module load is this one's with the toolchain swapped
+  for its CPU or GPU counterpart, see TOOLCHAIN_SIBLING_REPLACEMENTS
+- sibling_is_gpu: whether the sibling is the GPU one
+- cuda: whether it is built with a GPU toolchain, or is of an application with CUDA in its name
+
+After changing TOOLCHAIN_SIBLING_REPLACEMENTS or GPU_TOOLCHAINS, run the rebuild_siblings command.
+"""
+from django.db import transaction
+
+from .models import Version
+
+CHUNK_SIZE = 500
+
+TOOLCHAIN_SIBLING_REPLACEMENTS = {
+    '-foss-': '-fosscuda-',
+    '-fosscuda-': '-foss-',
+    '-gompi-': '-gompic-',
+    '-gompic-': '-gompi-',
+    '-iomkl-': '-iomklc-',
+    '-iomklc-': '-iomkl-',
+    '-iompi-': '-iompic-',
+    '-iompic-': '-iompi-',
+    '2021a': '2021a-CUDA-11.3.1',  # must be before the reverse
+    '2021a-CUDA-11.3.1': '2021a',
+}
+GPU_TOOLCHAINS = ['-fosscuda-', '-gompic-', '-iomklc-', '-iompic-']
+
+
+def _is_gpu(toolchain):
+    return toolchain in GPU_TOOLCHAINS or '-CUDA-' in toolchain
+
+
+def sibling_module_load(module_load):
+    """
+    Returns (the module load of the sibling or None, whether the sibling is the GPU one, whether module_load
+    is built with a GPU toolchain)
+    """
+    sibling, sibling_is_gpu, cuda = None, False, False
+    for find, replace in TOOLCHAIN_SIBLING_REPLACEMENTS.items():
+        if find in module_load:
+            sibling = module_load.replace(find, replace)
+            sibling_is_gpu = _is_gpu(replace)
+            if _is_gpu(find):
+                cuda = True
+    return sibling, sibling_is_gpu, cuda
+
+
+def _update(versions):
+    """
+    Set the sibling and flags of versions, which must include all the versions of their applications
+    """
+    rows = list(versions.values_list('id', 'application_id', 'module_load', 'application__name', 'sibling_id',
+                                     'sibling_is_gpu', 'cuda'))
+    by_module_load = {}
+    for pk, app_id, module_load, *_ in sorted(rows, reverse=True):
+        # the first of any versions with the same module load
+        by_module_load[(app_id, module_load)] = pk
+
+    changed = []
+    for pk, app_id, module_load, name, *current in rows:
+        sibling, sibling_is_gpu, cuda = sibling_module_load(module_load)
+        sibling_id = by_module_load.get((app_id, sibling))
+        new = [sibling_id, sibling_is_gpu and sibling_id is not None, cuda or 'cuda' in name.lower()]
+        if new != current:
+            changed.append(Version(id=pk, sibling_id=new[0], sibling_is_gpu=new[1], cuda=new[2]))
+    Version.objects.bulk_update(changed, ['sibling', 'sibling_is_gpu', 'cuda'], batch_size=CHUNK_SIZE)
+    return len(changed)
+
+
+def update_siblings(version_ids=None):
+    """
+    Bring the siblings and flags of these versions, and of the other versions of their applications, whose
+    siblings they may be, up to date, or those of all of them if version_ids is None. Returns the number of
+    versions that changed.
+    """
+    if version_ids is None:
+        return _update(Version.objects.all())
+
+    version_ids = sorted(set(version_ids))
+    changed = 0
+    # this is run on every write, so there is no savepoint of its own
+    with transaction.atomic(savepoint=False):
+        for start in range(0, len(version_ids), CHUNK_SIZE):
+            chunk = Version.objects.filter(id__in=version_ids[start:start + CHUNK_SIZE])
+            changed += _update(Version.objects.filter(application__in=chunk.values('application')))
+    return changed
@@ -0,0 +1,180 @@
+"""
+Keeping what is worked out from the catalog up to date as it is written to: the sort key and toolchain of each
+version as it is saved, the visibility, siblings and search documents of the versions that a write affects, and
+the generation of the catalog that the cached pages are keyed by.
+
+Each save or delete does so straight away, which takes several queries. A script that writes many rows can
+instead do so once for all of them, with deferred_updates.
+"""
+import threading
+from contextlib import contextmanager
+from django.db import connection
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .caching import bump_generation
+from .models import Application, Architecture, BearAppsVersion, CurrentVersion, Gpu, Link, ParagraphData, Version
+from .ordering import version_sort_key
+from .search import update_documents
+from .siblings import update_siblings
+from .toolchains import toolchain_family
+from .visibility import update_visibility
+
+
+# what has changed within deferred_updates, per thread
+_deferred = threading.local()
+# well under the most parameters that SQLite allows in a query
+CHUNK_SIZE = 500
+
+
+def _update_versions(version_ids):
+    """
+    Bring what is worked out from the versions up to date
+    """
+    version_ids = list(version_ids)
+    update_visibility(version_ids)
+    update_siblings(version_ids)
+    update_documents(version_ids)
+
+
+def _flush(changed):
+    """
+    Bring what is worked out from the versions, and those of the applications, changed within deferred_updates
+    up to date
+    """
+    version_ids = set(changed['versions'])
+    applications = sorted(changed['applications'])
+    for start in range(0, len(applications), CHUNK_SIZE):
+        version_ids.update(Version.objects.filter(application__in=applications[start:start + CHUNK_SIZE])
+                                          .values_list('id', flat=True).order_by())
+    if version_ids:
+        _update_versions(version_ids)
+    if changed['catalog']:
+        bump_generation()
+
+
+@contextmanager
+def deferred_updates():
+    """
+    Context manager within which saves and deletes only record which versions and applications they affect,
+    and whether the catalog has changed, which are then brought up to date once at the end. Nested uses are
+    part of the outermost one.
+
+    If an exception is raised in a transaction, which is expected to roll the writes back, nothing is brought up
+    to date. Otherwise it is, as the writes before the exception have been made.
+    """
+    if getattr(_deferred, 'changed', None) is not None:
+        yield
+        return
+    changed = _deferred.changed = {'versions': set(), 'applications': set(), 'catalog': False}
+    try:
+        yield
+    except BaseException:
+        _deferred.changed = None
+        if not connection.in_atomic_block:
+            _flush(changed)
+        raise
+    _deferred.changed = None
+    _flush(changed)
+
+
+def _versions_changed(version_ids):
+    """
+    Bring what is worked out from the versions up to date, or record that they have changed
+    """
+    changed = getattr(_deferred, 'changed', None)
+    if changed is not None:
+        changed['versions'].update(version_ids)
+    else:
+        _update_versions(version_ids)
+
+
+def _applications_changed(application_ids):
+    """
+    Bring what is worked out from the versions of the applications up to date, or record that they have changed
+    """
+    changed = getattr(_deferred, 'changed', None)
+    if changed is not None:
+        changed['applications'].update(application_ids)
+    else:
+        _update_versions(Version.objects.filter(application__in=application_ids).values_list('id', flat=True))
+
+
+@receiver(pre_save, sender=Version)
+def version_saving(sender, instance, **kwargs):
+    instance.version_sort_key = version_sort_key(instance.version)
+    instance.toolchain = toolchain_family(instance.version)
+
+
+@receiver(post_save, sender=Version)
+def version_saved(sender, instance, **kwargs):
+    _versions_changed([instance.pk])
+
+
+@receiver(post_delete, sender=Version)
+def version_deleted(sender, instance, **kwargs):
+    # it may have been the sibling of another version of the application
+    if getattr(_deferred, 'changed', None) is not None:
+        _deferred.changed['applications'].add(instance.application_id)
+    else:
+        update_siblings(Version.objects.filter(application=instance.application_id).values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Application)
+def application_saved(sender, instance, **kwargs):
+    _applications_changed([instance.pk])
+
+
+@receiver(post_save, sender=ParagraphData)
+@receiver(post_delete, sender=ParagraphData)
+def paragraph_changed(sender, instance, **kwargs):
+    if getattr(_deferred, 'changed', None) is not None:
+        # brought up to date along with everything else worked out from the versions
+        if instance.version_id is not None:
+            _deferred.changed['versions'].add(instance.version_id)
+        elif instance.application_id is not None:
+            _deferred.changed['applications'].add(instance.application_id)
+    elif instance.version_id is not None:
+        update_documents([instance.version_id])
+    elif instance.application_id is not None:
+        update_documents(Version.objects.filter(application=instance.application_id).values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Link)
+@receiver(post_delete, sender=Link)
+def link_changed(sender, instance, **kwargs):
+    _versions_changed([instance.version_id])
+
+
+@receiver(post_save, sender=BearAppsVersion)
+@receiver(post_save, sender=Architecture)
+def hidden_changed(sender, instance, **kwargs):
+    # which may change whether the versions linked to it are visible, deprecated or supported
+    links = Link.objects.filter(**{sender._meta.model_name: instance})
+    _versions_changed(links.values_list('version_id', flat=True))
+
+
+@receiver(post_save, sender=Application)
+@receiver(post_delete, sender=Application)
+@receiver(post_save, sender=Version)
+@receiver(post_delete, sender=Version)
+@receiver(post_save, sender=CurrentVersion)
+@receiver(post_delete, sender=CurrentVersion)
+@receiver(post_save, sender=ParagraphData)
+@receiver(post_delete, sender=ParagraphData)
+@receiver(post_save, sender=Link)
+@receiver(post_delete, sender=Link)
+@receiver(post_save, sender=BearAppsVersion)
+@receiver(post_delete, sender=BearAppsVersion)
+@receiver(post_save, sender=Architecture)
+@receiver(post_delete, sender=Architecture)
+@receiver(post_save, sender=Gpu)
+@receiver(post_delete, sender=Gpu)
+@receiver(m2m_changed, sender=Version.dependencies.through)
+def catalog_changed(sender, action=None, **kwargs):
+    # so that the cached pages are rendered again, where m2m_changed is sent both before and after a change
+    if action is None or action.startswith('post_'):
+        if getattr(_deferred, 'changed', None) is not None:
+            _deferred.changed['catalog'] = True
+        else:
+            bump_generation()
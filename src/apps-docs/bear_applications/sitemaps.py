@@ -1,5 +1,5 @@
 from django.contrib.sitemaps import Sitemap
-from django.db.models import Count, F
+from django.db.models import F, OuterRef, Subquery
 from django.urls import reverse
 from .models import Application, Link, Version
 from .views import SPECIAL_PAGE_NAMES
@@ -44,9 +44,9 @@ class VersionSitemap(Sitemap):
     changefreq = "monthly"
 
     def items(self):
-        return Version.objects.annotate(numlink=Count('link')).filter(
-            reason_to_hide=None, numlink__gt=0, application__reason_to_hide=None).exclude(
-            version__in=SPECIAL_PAGE_NAMES).order_by('application__name', 'version')
+        return (Version.objects.filter(is_visible=True, visible_link_count__gt=0)
+                               .exclude(version__in=SPECIAL_PAGE_NAMES).order_by('application__name', 'version')
+                               .select_related('application').prefetch_related('link_set__bearappsversion'))
 
     def lastmod(self, obj):
         return obj.modified
@@ -61,12 +61,12 @@ class ApplicationSitemap(Sitemap):
     changefreq = "monthly"
 
     def items(self):
-        return (Application.objects.annotate(num_versions=Count('version'))
-                                   .filter(reason_to_hide=None, version__reason_to_hide=None, num_versions__gt=0)
-                                   .order_by('name'))
+        last_modified = Version.objects.filter(application=OuterRef('pk')).order_by('-modified').values('modified')
+        return (Application.objects.filter(version__is_visible=True).distinct().order_by('name')
+                                   .annotate(last_modified=Subquery(last_modified[:1])))
 
     def lastmod(self, obj):
-        return Version.objects.filter(application=obj).order_by('-modified')[0].modified
+        return obj.last_modified
 
     def location(self, obj):
         return reverse('bear_applications:application', kwargs={'name': obj.name})
@@ -76,8 +76,7 @@ class FilterSitemap(Sitemap):
     changefreq = "daily"
 
     def items(self):
-        return (Link.objects.filter(version__reason_to_hide=None, version__application__reason_to_hide=None,
-                                    bearappsversion__hidden=False, architecture__hidden=False)
+        return (Link.objects.filter(version__is_visible=True, bearappsversion__hidden=False, architecture__hidden=False)
                             .exclude(bearappsversion__name='system', architecture__name='system')
                             .values(bav=F('bearappsversion__displayed_name'), arch=F('architecture__displayed_name'))
                             .distinct().order_by('bav', 'arch'))
@@ -91,8 +90,7 @@ class ArchitectureSitemap(Sitemap):
     changefreq = "daily"
 
     def items(self):
-        return (Link.objects.filter(version__reason_to_hide=None, version__application__reason_to_hide=None,
-                                    bearappsversion__hidden=False, architecture__hidden=False)
+        return (Link.objects.filter(version__is_visible=True, bearappsversion__hidden=False, architecture__hidden=False)
                             .exclude(architecture__name='system')
                             .values(arch=F('architecture__displayed_name')).distinct().order_by('arch'))
 
@@ -104,8 +102,7 @@ class BEARAppsVersionSitemap(Sitemap):
     changefreq = "daily"
 
     def items(self):
-        return (Link.objects.filter(version__reason_to_hide=None, version__application__reason_to_hide=None,
-                                    bearappsversion__hidden=False, architecture__hidden=False)
+        return (Link.objects.filter(version__is_visible=True, bearappsversion__hidden=False, architecture__hidden=False)
                             .exclude(bearappsversion__name='system')
                             .values(bav=F('bearappsversion__displayed_name')).distinct().order_by('bav'))
 
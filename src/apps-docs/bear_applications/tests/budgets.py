@@ -0,0 +1,42 @@
+"""
+The most queries that each page may run, however big the catalog is. The tests check these against the
+fixture and a synthetic catalog, see test_timing.py, so that a page that starts running a query per row fails.
+"""
+from bear_applications.timing import Timing
+
+QUERY_BUDGETS = {
+    'bear_applications:home': 5,
+    # with ?start=, two of which are the letters of the index and where the next page starts, see listing.py
+    'bear_applications:applications': 4,
+    'bear_applications:application': 4,
+    'bear_applications:application_version': 10,
+    'bear_applications:filter_options': 2,
+    # as applications, with ?start=
+    'bear_applications:filter': 7,
+    'bear_applications:search': 4,
+    'bear_applications:sitemap': 15,
+    'bear_applications:latest-applications-feed': 4,
+    'bear_applications:api_applications': 4,
+    'bear_applications:api_versions': 5,
+    'bear_applications:api_version': 5,
+}
+
+
+class QueryBudgetMixin:
+    """
+    Mixin for a TestCase, to check the queries the pages run against their budgets
+    """
+
+    def assertWithinBudget(self, url):
+        """
+        Get url, and check that it runs no more queries than the budget of the page. Returns the response.
+        """
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        timing = response.wsgi_request.timing
+        self.assertIsInstance(timing, Timing)
+        self.assertIn(timing.view, QUERY_BUDGETS, url)
+        budget = QUERY_BUDGETS[timing.view]
+        self.assertLessEqual(timing.queries, budget,
+                             "%s ran %d queries, over its budget of %d" % (url, timing.queries, budget))
+        return response
@@ -0,0 +1,36 @@
+help([==[
+
+Description
+===========
+Tensors and Dynamic neural networks in Python with strong GPU acceleration.
+PyTorch is a deep learning framework that puts Python first.
+
+
+More information
+================
+ - Homepage: https://pytorch.org/
+]==])
+
+whatis([==[Description: Tensors and Dynamic neural networks in Python with strong GPU acceleration.
+PyTorch is a deep learning framework that puts Python first.]==])
+whatis([==[Homepage: https://pytorch.org/]==])
+whatis([==[URL: https://pytorch.org/]==])
+
+local root = "/bask/apps/live/EL8-ice/software/PyTorch/1.12.0-foss-2022a-CUDA-11.7.0"
+
+conflict("PyTorch")
+
+depends_on("CUDA/11.7.0")
+depends_on("Ninja/1.10.2-GCCcore-11.3.0", "Python/3.10.4-GCCcore-11.3.0")
+depends_on("SciPy-bundle/2022.05-foss-2022a")
+
+prepend_path("CMAKE_PREFIX_PATH", root)
+prepend_path("LD_LIBRARY_PATH", pathJoin(root, "lib"))
+prepend_path("PATH", pathJoin(root, "bin"))
+prepend_path("PYTHONPATH", pathJoin(root, "lib/python3.10/site-packages"))
+setenv("EBROOTPYTORCH", root)
+setenv("EBVERSIONPYTORCH", "1.12.0")
+
+extensions("PyTorch/1.12.0")
+
+-- Built with EasyBuild version 4.6.0
@@ -0,0 +1,56 @@
+help([==[
+
+Description
+===========
+Bundle of Python packages for scientific software
+
+
+More information
+================
+ - Homepage: https://python.org/
+
+
+Included extensions
+===================
+beniget-0.4.1, Bottleneck-1.3.4, deap-1.3.1, gast-0.5.3, mpi4py-3.1.3, mpmath-1.2.1, numexpr-2.8.1,
+numpy-1.22.3, pandas-1.4.2, ply-3.11, pythran-0.11.0, scipy-1.8.1
+
+To use this with an older Python:
+module load Python/3.9.5-GCCcore-10.3.0
+]==])
+
+whatis([==[Description: Bundle of Python packages for scientific software]==])
+whatis([==[Homepage: https://python.org/]==])
+whatis([==[URL: https://python.org/]==])
+whatis([==[Extensions: beniget-0.4.1, Bottleneck-1.3.4, deap-1.3.1, gast-0.5.3, mpi4py-3.1.3, mpmath-1.2.1, numexpr-2.8.1, numpy-1.22.3, pandas-1.4.2, ply-3.11, pythran-0.11.0, scipy-1.8.1]==])
+
+local root = "/bask/apps/live/EL8-ice/software/SciPy-bundle/2022.05-foss-2022a"
+
+conflict("SciPy-bundle")
+
+if not ( isloaded("foss/2022a") ) then
+    load("foss/2022a")
+end
+
+if not ( isloaded("Python/3.10.4-GCCcore-11.3.0") ) then
+    load("Python/3.10.4-GCCcore-11.3.0")
+end
+
+-- load("not/a-dependency")
+--[[
+depends_on("also/not-a-dependency")
+]]
+depends_on('pybind11/2.9.2-GCCcore-11.3.0')
+
+prepend_path("CMAKE_PREFIX_PATH", root)
+prepend_path("LD_LIBRARY_PATH", pathJoin(root, "lib"))
+prepend_path("LIBRARY_PATH", pathJoin(root, "lib"))
+prepend_path("PATH", pathJoin(root, "bin"))
+setenv("EBROOTSCIPYMINBUNDLE", root)
+setenv("EBVERSIONSCIPYMINBUNDLE", "2022.05")
+
+prepend_path("PYTHONPATH", pathJoin(root, "lib/python3.10/site-packages"), ":")
+
+extensions("beniget/0.4.1,Bottleneck/1.3.4,deap/1.3.1,gast/0.5.3,mpi4py/3.1.3,mpmath/1.2.1,numexpr/2.8.1,numpy/1.22.3,pandas/1.4.2,ply/3.11,pythran/0.11.0,scipy/1.8.1")
+
+-- Built with EasyBuild version 4.6.0
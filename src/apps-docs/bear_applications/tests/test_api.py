@@ -0,0 +1,90 @@
+import json
+from django.test import TestCase
+from django.urls import reverse
+from bear_applications.models import Application, Version
+
+
+class APITestCase(TestCase):
+    """
+    Test the JSON API
+    """
+    fixtures = ['db.json']
+
+    def _pages(self, url):
+        """
+        Returns the results of every page, following 'next' from url
+        """
+        results = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.has_header('ETag'))
+            page = response.json()
+            results.extend(page['results'])
+            url = page['next']
+        return results
+
+    def test_applications(self):
+        """
+        Test that every visible application is listed once, in order, across the pages
+        """
+        names = self._pages(reverse('bear_applications:api_applications') + '?limit=2')
+        expected = sorted(Application.objects.filter(reason_to_hide=None, version__is_visible=True)
+                                             .values_list('name', flat=True).distinct())
+        self.assertEqual([result['name'] for result in names], expected)
+        self.assertNotIn('Python', expected)
+
+        matlab = [result for result in names if result['name'] == 'MATLAB'][0]
+        self.assertEqual(matlab['current_version'], 'R2018b')
+        self.assertEqual(len(self._pages(matlab['versions'])),
+                         Version.objects.filter(application__name='MATLAB', is_visible=True).count())
+
+    def test_versions(self):
+        """
+        Test that the pages of versions give every visible version once, with the same as the dump
+        """
+        results = self._pages(reverse('bear_applications:api_versions') + '?limit=3')
+        self.assertEqual(len(results), Version.objects.filter(is_visible=True).count())
+        keys = [(result['application'], result['version']) for result in results]
+        self.assertEqual(keys, sorted(set(keys)))
+
+        response = self.client.get(reverse('bear_applications:api_dump'))
+        self.assertTrue(response.streaming)
+        self.assertTrue(response.has_header('ETag'))
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), json.loads(json.dumps(results)))
+
+    def test_version(self):
+        """
+        Test a version, with its links, dependencies and paragraphs
+        """
+        response = self.client.get(reverse('bear_applications:api_version',
+                                           kwargs={'name': 'MATLAB', 'version': 'R2018b'}))
+        self.assertEqual(response.status_code, 200)
+        version = response.json()
+        self.assertEqual(version['module_load'], Version.objects.get(application__name='MATLAB',
+                                                                     version='R2018b').module_load)
+        self.assertIn('2018b', [link['bav'] for link in version['links']])
+        self.assertIn('some text', [paragraph['content'] for paragraph in version['paragraphs']])
+
+        response = self.client.get(reverse('bear_applications:api_version',
+                                           kwargs={'name': 'Python', 'version': '2.7.12-foss-2012a'}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_bad_limit(self):
+        """
+        Test that a limit that isn't a positive number is an error
+        """
+        for limit in ['none', '0', '-1']:
+            response = self.client.get(reverse('bear_applications:api_versions'), {'limit': limit})
+            self.assertEqual(response.status_code, 400)
+
+    def test_query_count(self):
+        """
+        Test that a page of versions takes the same number of queries however many there are on it
+        """
+        url = reverse('bear_applications:api_versions')
+        # the generation, the versions and their links, dependencies and paragraphs
+        with self.assertNumQueries(5):
+            self.client.get(url, {'limit': 1})
+        with self.assertNumQueries(5):
+            self.client.get(url, {'limit': 100})
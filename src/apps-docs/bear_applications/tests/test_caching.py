@@ -0,0 +1,119 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from bear_applications.caching import bump_generation, catalog_state, code_version
+from bear_applications.models import Application, CatalogState, ParagraphData, Version
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CachingTestCase(TestCase):
+    """
+    Test the caching of pages until the catalog changes
+    """
+    fixtures = ['db.json']
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_bump_generation(self):
+        """
+        Test that the generation goes up by one each time, starting from nothing
+        """
+        CatalogState.objects.all().delete()
+        self.assertEqual(catalog_state().generation, 0)
+        bump_generation()
+        self.assertEqual(catalog_state().generation, 1)
+        bump_generation()
+        self.assertEqual(catalog_state().generation, 2)
+
+    def test_cached(self):
+        """
+        Test that the pages are only rendered once, until the catalog changes
+        """
+        for url in [reverse('bear_applications:home'), reverse('bear_applications:applications'),
+                    reverse('bear_applications:application', kwargs={'name': 'MATLAB'}),
+                    reverse('bear_applications:application_version',
+                            kwargs={'bavname': '2019a', 'name': 'MATLAB', 'version': 'R2018b'}),
+                    reverse('bear_applications:filter_options'),
+                    reverse('bear_applications:filter', kwargs={'bearappsversion': '2019a'}),
+                    reverse('bear_applications:sitemap'), reverse('bear_applications:latest-applications-feed')]:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            # only to look up the generation
+            with self.assertNumQueries(1):
+                cached = self.client.get(url)
+            self.assertEqual(cached.content, response.content, url)
+
+    def test_invalidated(self):
+        """
+        Test that writes to the catalog mean the pages are rendered again
+        """
+        url = reverse('bear_applications:filter', kwargs={'bearappsversion': '2019a'})
+        self.assertContains(self.client.get(url), 'TensorFlow')
+
+        application = Application.objects.get(name='TensorFlow')
+        application.reason_to_hide = 'Bye Bye'
+        application.save()
+        self.assertNotContains(self.client.get(url), 'TensorFlow')
+
+        url = reverse('bear_applications:application', kwargs={'name': 'MATLAB'})
+        self.assertNotContains(self.client.get(url), 'A new paragraph')
+        ParagraphData.objects.create(application=Application.objects.get(name='MATLAB'), header='New',
+                                     content='A new paragraph')
+        self.assertContains(self.client.get(url), 'A new paragraph')
+
+        generation = catalog_state().generation
+        Version.objects.get(application__name='MATLAB', version='R2018b').dependencies.clear()
+        self.assertEqual(catalog_state().generation, generation + 1)
+
+    def test_not_cached(self):
+        """
+        Test that missing pages and searches aren't cached
+        """
+        url = reverse('bear_applications:application', kwargs={'name': 'Nothing'})
+        self.assertEqual(self.client.get(url).status_code, 404)
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get(url).status_code, 404)
+
+        url = reverse('bear_applications:search')
+        self.client.get(url, {'search': 'matlab'})
+        self.assertTrue(self.client.get(url, {'search': 'matlab'}).context)
+
+    def test_conditional_get(self):
+        """
+        Test that a request for a page the client has is answered with a 304, until the catalog changes
+        """
+        bump_generation()
+        for url in [reverse('bear_applications:applications'),
+                    reverse('bear_applications:filter', kwargs={'bearappsversion': '2019a'}),
+                    reverse('bear_applications:search') + '?search=matlab',
+                    reverse('bear_applications:sitemap'), reverse('bear_applications:latest-applications-feed')]:
+            response = self.client.get(url)
+            self.assertTrue(response.has_header('Last-Modified'), url)
+            # only to look up the generation
+            with self.assertNumQueries(1):
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304, url)
+            with self.assertNumQueries(1):
+                self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code,
+                                 304, url)
+
+        bump_generation()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_code_version(self):
+        """
+        Test that the pages are rendered again, and aren't answered with a 304, when the code changes
+        """
+        url = reverse('bear_applications:applications')
+        with override_settings(PAGE_CACHE_VERSION='1'):
+            response = self.client.get(url)
+            with self.assertNumQueries(1):
+                self.client.get(url)
+        with override_settings(PAGE_CACHE_VERSION='2'):
+            rendered = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(rendered.status_code, 200)
+            self.assertTrue(rendered.context)
+            self.assertNotEqual(rendered['ETag'], response['ETag'])
+        self.assertEqual(code_version(), code_version())
+        self.assertNotIn(code_version(), ('1', '2'))
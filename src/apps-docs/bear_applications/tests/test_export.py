@@ -0,0 +1,91 @@
+import gzip
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import TestCase
+from bear_applications.export import export_site, page_urls
+from bear_applications.models import Application, CurrentVersion, ParagraphData
+
+
+class ExportTestCase(TestCase):
+    """
+    Test exporting the site as static files
+    """
+    fixtures = ['db.json']
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.output = self.tmpdir.name
+
+    def _read(self, path):
+        with open(os.path.join(self.output, path), 'rb') as f:
+            content = f.read()
+        with gzip.open(os.path.join(self.output, path + '.gz')) as f:
+            self.assertEqual(f.read(), content)
+        return content.decode()
+
+    def test_export_site(self):
+        """
+        Test that every page is written, with a gzipped copy
+        """
+        urls = page_urls()
+        self.assertEqual(export_site(self.output, 'https://apps.example.com', jobs=1), len(urls))
+
+        self.assertIn('MATLAB', self._read('index.html'))
+        self.assertIn('https://apps.example.com/applications/MATLAB', self._read('sitemap.xml'))
+        self.assertIn('<rss', self._read('latest-applications-feed'))
+        self.assertIn('R2018b', self._read('applications/MATLAB/index.html'))
+        self.assertIn('R2018b', self._read('applications/2018b/MATLAB/R2018b/index.html'))
+        self.assertTrue(os.path.exists(os.path.join(self.output, 'search', 'index.html')))
+        self.assertTrue(os.path.exists(os.path.join(self.output, 'filter', '2019a', 'index.html')))
+        self.assertFalse(os.path.exists(os.path.join(self.output, 'applications', 'Python')))
+
+    def test_export_changed(self):
+        """
+        Test that only the pages of the applications that have changed are rendered again, and that the
+        pages of hidden applications are removed
+        """
+        urls = page_urls()
+        listings = len([url for url, pk in urls.items() if pk is None])
+        export_site(self.output, 'https://apps.example.com', jobs=1)
+        self.assertEqual(export_site(self.output, 'https://apps.example.com', jobs=1), listings)
+
+        matlab = Application.objects.get(name='MATLAB')
+        ParagraphData.objects.create(application=matlab, header='New', content='A new paragraph')
+        matlab_pages = len([url for url, pk in urls.items() if pk == matlab.id])
+        self.assertEqual(export_site(self.output, 'https://apps.example.com', jobs=1), listings + matlab_pages)
+        self.assertIn('A new paragraph', self._read('applications/MATLAB/index.html'))
+
+        matlab.reason_to_hide = 'Bye Bye'
+        matlab.save()
+        export_site(self.output, 'https://apps.example.com', jobs=1)
+        self.assertFalse(os.path.exists(os.path.join(self.output, 'applications', 'MATLAB', 'index.html')))
+        self.assertFalse(os.path.exists(os.path.join(self.output, 'applications', 'MATLAB', 'index.html.gz')))
+
+        self.assertEqual(export_site(self.output, 'https://apps.example.com', jobs=1, full=True),
+                         len(page_urls()))
+
+    def test_export_current_version(self):
+        """
+        Test that the pages of an application are rendered again when only its current version changes
+        """
+        urls = page_urls()
+        listings = len([url for url, pk in urls.items() if pk is None])
+        export_site(self.output, 'https://apps.example.com', jobs=1)
+
+        current = CurrentVersion.objects.annotate(versions=Count('application__version')).filter(versions__gt=1)[0]
+        current.version = current.application.version_set.exclude(id=current.version_id).first()
+        current.save()
+        pages = len([url for url, pk in urls.items() if pk == current.application_id])
+        self.assertEqual(export_site(self.output, 'https://apps.example.com', jobs=1), listings + pages)
+
+    def test_export_static(self):
+        """
+        Test the command
+        """
+        out = StringIO()
+        call_command('export_static', self.output, 'https://apps.example.com/', jobs=1, stdout=out)
+        self.assertEqual(out.getvalue(), "Rendered %d pages\n" % len(page_urls()))
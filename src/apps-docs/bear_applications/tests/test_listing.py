@@ -0,0 +1,94 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import escape
+from unittest.mock import patch
+from bear_applications.listing import format_url, url_format
+from bear_applications.models import Application, Link, Version
+
+
+class ListingTestCase(TestCase):
+    """
+    Test the rows, alphabet index and pages of the pages listing applications
+    """
+    fixtures = ['db.json']
+
+    def test_format_url(self):
+        """
+        Test that the URLs filled in are those that reverse() gives
+        """
+        application = url_format('bear_applications:application', 'name')
+        version = url_format('bear_applications:application_version', 'bavname', 'name', 'version')
+        for name in ['MATLAB', 'libstdc++', "A&B's tool", 'x y.z', 'ü', 'q?r#s', '{name}', '50%']:
+            self.assertEqual(format_url(application, name=name),
+                             reverse('bear_applications:application', kwargs={'name': name}))
+            self.assertEqual(format_url(version, bavname='2019a', name=name, version=name),
+                             reverse('bear_applications:application_version',
+                                     kwargs={'bavname': '2019a', 'name': name, 'version': name}))
+
+    def test_rows(self):
+        """
+        Test that the rows link to the application, version and BEAR Apps Version, with the names escaped
+        """
+        link = Link.objects.filter(version__application__name='MATLAB').first()
+        application = Application.objects.create(name="<A&B's.tool>", description='')
+        version = Version.objects.create(application=application, version='1.0', created=timezone.now(),
+                                         modified=timezone.now())
+        Link.objects.create(version=version, bearappsversion=link.bearappsversion, architecture=link.architecture)
+        bav = link.bearappsversion.displayed_name
+
+        response = self.client.get(reverse('bear_applications:filter', args=['all', link.architecture.displayed_name]))
+        application_url = reverse('bear_applications:application', kwargs={'name': application.name})
+        self.assertContains(response, '<a href="%s">&lt;A&amp;B&#x27;s.<wbr>tool&gt;</a>' % escape(application_url))
+        version_url = reverse('bear_applications:application_version',
+                              kwargs={'bavname': bav, 'name': application.name, 'version': '1.0'})
+        self.assertContains(response, '<a href="%s">1.0</a>' % escape(version_url))
+        self.assertContains(response, '<a href="%s">%s</a>' % (
+            reverse('bear_applications:filter', kwargs={'bearappsversion': bav}), bav))
+
+    def test_index(self):
+        """
+        Test that the alphabet index of a page listing everything links to the first row of each letter
+        """
+        response = self.client.get(reverse('bear_applications:filter', args=['all', 'EL7-haswell']))
+        names = sorted({row['name'].lower() for row in response.context['applications']})
+        letters = sorted({name[0] for name in names})
+        self.assertEqual([entry['letter'] for entry in response.context['index']], letters)
+        for letter in letters:
+            self.assertContains(response, '<a href="#index-%s">%s</a>' % (letter, letter.upper()))
+            self.assertContains(response, '<span id="index-%s"></span>' % letter, count=1)
+        self.assertFalse(response.context['paged'])
+        self.assertIsNone(response.context['next_url'])
+
+    @patch('bear_applications.listing.PAGE_SIZE', 1)
+    def test_pages(self):
+        """
+        Test that the pages starting at ?start= list the versions of PAGE_SIZE applications, and link to the next
+        """
+        url = reverse('bear_applications:filter', args=['all', 'EL7-haswell'])
+        everything = [(row['name'], row['ver'], row['bav'])
+                      for row in self.client.get(url).context['applications']]
+        names = sorted({name.lower() for name, _, _ in everything})
+        self.assertGreater(len(names), 2)
+
+        listed = []
+        start = ''
+        pages = 0
+        while start is not None:
+            response = self.client.get(url, {'start': start})
+            self.assertTrue(response.context['paged'])
+            rows = [(row['name'], row['ver'], row['bav']) for row in response.context['applications']]
+            self.assertEqual(len({name.lower() for name, _, _ in rows}), 1)
+            listed.extend(rows)
+            pages += 1
+            next_url = response.context['next_url']
+            start = next_url[len('?start='):] if next_url else None
+        self.assertEqual(listed, everything)
+        self.assertEqual(pages, len(names))
+
+        # the index links to the pages starting at each letter
+        response = self.client.get(url, {'start': names[-1][0].upper()})
+        self.assertEqual(response.context['index'], [{'letter': letter, 'url': '?start=' + letter}
+                                                     for letter in sorted({name[0] for name in names})])
+        self.assertEqual({row['name'].lower() for row in response.context['applications']}, {names[-1]})
+        self.assertContains(response, '<a href="%s">All</a>' % url)
@@ -0,0 +1,70 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from bear_applications.models import Application, Link, Version
+from bear_applications.ordering import KEY_LENGTH, full_sort_key, version_sort_key
+
+
+class OrderingTestCase(TestCase):
+    """
+    Test the order of the versions of an application
+    """
+    fixtures = ['db.json']
+
+    def test_version_sort_key(self):
+        """
+        Test that the keys sort versions by number, then word
+        """
+        ordered = ['1.0', '1.0.1', '1.0-foss-2019b', '1.2', '1.10', '2', '3.8.6-foss-2019b', '3.8.6-GCCcore-8.3.0',
+                   '3.10.1-GCCcore-10.2.0', '2017b', 'R2017a', 'R2018b']
+        self.assertEqual(sorted(ordered, key=version_sort_key), ordered)
+        self.assertEqual(version_sort_key('1.01'), version_sort_key('1.1'))
+
+    def test_pre_releases(self):
+        """
+        Test that pre-releases are before the release, and single letters are only pre-releases before a number
+        """
+        ordered = ['0.9', '1.0.dev1', '1.0a1', '1.0alpha2', '1.0b1', '1.0-beta.2', '1.0rc1', '1.0-rc2', '1.0',
+                   '1.0.1', '1.0-foss-2019b']
+        self.assertEqual(sorted(ordered, key=version_sort_key), ordered)
+        ordered = ['1.1.1', '1.1.1k', '1.1.1l', '2019a', '2019b']
+        self.assertEqual(sorted(ordered, key=version_sort_key), ordered)
+
+    def test_long_versions(self):
+        """
+        Test that the stored keys fit in KEY_LENGTH, and that versions with the same stored key are ordered by
+        the version
+        """
+        prefix = '.'.join(['1'] * 70)
+        self.assertGreater(len(full_sort_key(prefix)), KEY_LENGTH)
+        self.assertEqual(version_sort_key(prefix + '.1'), version_sort_key(prefix + '.2'))
+        self.assertLess(full_sort_key(prefix + '.1'), full_sort_key(prefix + '.2'))
+
+        application = Application.objects.create(name='Long', description='Long')
+        link = Link.objects.filter(version__application__name='MATLAB').first()
+        for version in [prefix + '.1', prefix + '.2']:
+            ver = Version.objects.create(application=application, version=version, created=timezone.now(),
+                                         modified=timezone.now())
+            self.assertEqual(len(ver.version_sort_key), KEY_LENGTH)
+            Link.objects.create(version=ver, bearappsversion=link.bearappsversion, architecture=link.architecture)
+        response = self.client.get(reverse('bear_applications:application', kwargs={'name': 'Long'}))
+        self.assertEqual([version['version'] for version in response.context['versions']],
+                         [prefix + '.2', prefix + '.1'])
+
+    def test_application_page(self):
+        """
+        Test that the versions are listed with the newest first, as ordered by the database
+        """
+        application = Application.objects.create(name='Perl', description='Perl')
+        link = Link.objects.filter(version__application__name='MATLAB').first()
+        for version in ['5.28.0-GCCcore-7.3.0', '5.30.2-GCCcore-9.3.0', '5.8.8-GCCcore-6.4.0', '5.32.0-GCCcore-10.2.0']:
+            ver = Version.objects.create(application=application, version=version, created=timezone.now(),
+                                         modified=timezone.now())
+            Link.objects.create(version=ver, bearappsversion=link.bearappsversion, architecture=link.architecture)
+        self.assertEqual(Version.objects.get(application=application, version='5.8.8-GCCcore-6.4.0').version_sort_key,
+                         version_sort_key('5.8.8-GCCcore-6.4.0'))
+
+        response = self.client.get(reverse('bear_applications:application', kwargs={'name': 'Perl'}))
+        self.assertEqual([version['version'] for version in response.context['versions']],
+                         ['5.32.0-GCCcore-10.2.0', '5.30.2-GCCcore-9.3.0', '5.28.0-GCCcore-7.3.0',
+                          '5.8.8-GCCcore-6.4.0'])
@@ -23,6 +23,13 @@ if { ![ is-loaded PyTorch/1.2.0-fosscuda-2019a-Python-3.7.2 ] } {
 NOTADEP = "module load not/a-dep"
 """
 
+FAKE_MODULE_FILE3 = """whatis("Homepage: https://test.com")
+whatis("Description: A new piece of software")
+whatis("Compatible modules: MATLAB/2014a")
+setenv("BROKEN", "never closed)
+load("not/a-dep")
+"""
+
 
 class AddModuleInfoTestCase(TestCase):
     """
@@ -110,3 +117,22 @@ class AddModuleInfoTestCase(TestCase):
         )
         app = Version.objects.get(version='1.13.1-fosscuda-2018b-Python-3.8.2', application__name='TensorFlow')
         self.assertEqual(app.dependencies.count(), 1)
+
+    @log_capture()
+    @patch("os.stat")
+    @patch("builtins.open", new_callable=mock_open, read_data=FAKE_MODULE_FILE3)
+    def test_add_module_syntax_error(self, mock_file, os_stat, log):
+        """
+        Test add_module with a module file that can't all be parsed, which keeps what was parsed before the error
+        """
+        os_stat.return_value = Mock(st_ctime=1530346690, st_mtime=1530347690)
+        module_file = "/rds/bear-apps/2020a/EL7-cascadelake/modules/all/Cardinal/2.6.0-foss-2020a-R-4.0.0.lua"
+        add_module(module_file, False)
+        log.check_present(
+            ("root", "WARNING", "Couldn't parse all of %s: Unterminated string at 144" % module_file),
+            ("functions", "INFO", "Set MATLAB/2014a as dependency"),
+        )
+        ver = Version.objects.get(version='2.6.0-foss-2020a-R-4.0.0', application__name='Cardinal')
+        self.assertEqual(ver.application.description, 'A new piece of software')
+        # but nothing after it
+        self.assertNotIn(('functions', 'DEBUG', 'Checking dep not/a-dep'), log.actual())
@@ -0,0 +1,99 @@
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime
+from unittest.mock import patch
+import pytz
+from django.test import TestCase
+from testfixtures import log_capture
+from bear_applications.models import Application, CurrentVersion, Link, Version
+
+sys.path.insert(0, "../../scripts")
+from add_module_spider import load_spider, read_json_array
+
+SPIDER_JSON = os.path.join(os.path.dirname(__file__), 'spider', 'jsonSoftwarePage.json')
+
+
+class AddModuleSpiderTestCase(TestCase):
+    """
+    Test the add_module_spider.py script
+    """
+
+    fixtures = ["db.json"]
+
+    def test_read_json_array(self):
+        """
+        Test that reading the array in small chunks gives the same items as reading it all at once
+        """
+        with open(SPIDER_JSON) as f:
+            expected = json.load(f)
+        with open(SPIDER_JSON) as f:
+            self.assertEqual(list(read_json_array(f, read_size=7)), expected)
+        self.assertEqual(list(read_json_array(io.StringIO(' [ ] '))), [])
+        with self.assertRaises(ValueError):
+            list(read_json_array(io.StringIO('[{"a": 1}, {"b": '), read_size=4))
+
+    @log_capture()
+    def test_load_spider(self, log):
+        """
+        Test loading the spider output, with one version under two architectures
+        """
+        matlab = Version.objects.get(application__name='MATLAB', version='2017b')
+        time = datetime(2022, 6, 1, tzinfo=pytz.utc)
+        with patch('add_module_spider.module_file_times', return_value=(time, time)) as times:
+            load_spider(SPIDER_JSON, batch_size=2)
+        # each module file is stat'd, apart from the one that isn't in a module tree
+        self.assertEqual(times.call_count, 4)
+
+        gromacs = Version.objects.get(application__name='GROMACS', version='2022.3-foss-2022a')
+        self.assertEqual(gromacs.module_load, 'GROMACS/2022.3-foss-2022a')
+        self.assertEqual(gromacs.application.more_info, 'https://www.gromacs.org')
+        self.assertEqual(gromacs.modified, time)
+        self.assertEqual(sorted(Link.objects.filter(version=gromacs).values_list('architecture__name', flat=True)),
+                         ['EL8-haswell', 'EL8-icelake'])
+
+        # the 'Compatible modules' aren't set as dependencies
+        matplotlib = Version.objects.get(application__name='matplotlib', version='3.5.2-foss-2022a')
+        self.assertFalse(matplotlib.dependencies.exists())
+        self.assertFalse(Version.objects.filter(application__name='Local').exists())
+        self.assertEqual(Version.objects.get(pk=matlab.pk).dependencies.count(), matlab.dependencies.count())
+        log.check_present(
+            ("add_module_tree", "WARNING",
+             "Skipping /usr/share/modulefiles/Local/1.0 as it is not in a recognised module tree"),
+            ("add_module_spider", "INFO", "Loaded 3 modules from %s" % SPIDER_JSON),
+        )
+
+    def test_load_spider_keeps_dependencies(self):
+        """
+        Test that loading a version from the spider output keeps the dependencies set from its module file
+        """
+        matlab = Version.objects.get(application__name='MATLAB', version='2017b')
+        matplotlib = Version.objects.create(application=Application.objects.create(name='matplotlib'),
+                                            version='3.5.2-foss-2022a', module_load='matplotlib/3.5.2-foss-2022a',
+                                            created=datetime(2022, 6, 1, tzinfo=pytz.utc),
+                                            modified=datetime(2022, 6, 1, tzinfo=pytz.utc))
+        matplotlib.dependencies.add(matlab)
+        load_spider(SPIDER_JSON, spider_times=True)
+        self.assertEqual(list(matplotlib.dependencies.all()), [matlab])
+
+    def test_load_spider_current_version(self):
+        """
+        Test that of the versions with the time of the spider output the latest is the current version
+        """
+        base = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, base)
+        filename = os.path.join(base, 'spider.json')
+        with open(filename, 'w') as f:
+            json.dump([{'package': 'Zed', 'url': 'https://zed.dev', 'versions': [
+                {'path': '/rds/bear-apps/2022a/EL8-icelake/modules/all/Zed/%s-foss-2022a.lua' % version,
+                 'whatis': ['Description: Zed %s' % version]} for version in ['1.0', '2.0']]}], f)
+        load_spider(filename, spider_times=True)
+        self.assertEqual(CurrentVersion.objects.get(application__name='Zed').version.version, '2.0-foss-2022a')
+        # and the same with each version in its own batch
+        Version.objects.filter(application__name='Zed').delete()
+        CurrentVersion.objects.filter(application__name='Zed').delete()
+        load_spider(filename, batch_size=1, spider_times=True)
+        self.assertEqual(CurrentVersion.objects.get(application__name='Zed').version.version, '2.0-foss-2022a')
@@ -0,0 +1,242 @@
+import os
+import re
+import sys
+import tempfile
+from django.test import TestCase
+from testfixtures import log_capture
+from unittest.mock import patch
+from bear_applications.models import Link, Version
+
+sys.path.insert(0, "../../scripts")
+import add_module_info
+from add_module_tree import find_module_files, load_tree, load_trees, upload_batch
+from manifest import Manifest
+
+FAKE_MODULE_FILE = """module-whatis {{Homepage: https://test.com }}
+module-whatis {{Description: {name} is a new piece of software }}
+{deps}
+"""
+
+
+class AddModuleTreeTestCase(TestCase):
+    """
+    Test the add_module_tree.py script
+    """
+
+    fixtures = ["db.json"]
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.base = os.path.realpath(self.tmpdir.name)
+        self.modules = os.path.join(self.base, '2022a', 'EL8-icelake', 'modules', 'all')
+        re_filename = re.compile(r"^%s/([^/]+)/([^/]+)/modules/all/([^/]+)/(.*)$" % re.escape(self.base))
+        patcher = patch("add_module_info.re_filename_eb", re_filename)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _write_module(self, name, version, deps=(), modules=None, extra=''):
+        modules = modules or self.modules
+        os.makedirs(os.path.join(modules, name), exist_ok=True)
+        with open(os.path.join(modules, name, version), 'w') as f:
+            f.write(FAKE_MODULE_FILE.format(name=name, deps='\n'.join('module load %s' % d for d in deps)) + extra)
+        return os.path.join(modules, name, version)
+
+    def test_find_module_files(self):
+        """
+        Test that hidden files are skipped and the walk is in a stable order
+        """
+        self._write_module('Beta', '2.0')
+        self._write_module('Alpha', '1.0')
+        self._write_module('Alpha', '.modulerc')
+        self.assertEqual(list(find_module_files(self.modules)),
+                         [os.path.join(self.modules, 'Alpha', '1.0'), os.path.join(self.modules, 'Beta', '2.0')])
+
+    @log_capture()
+    def test_load_tree(self, log):
+        """
+        Test loading a tree, where a module depends on one that is later in the walk
+        """
+        self._write_module('Alpha', '1.0-GCCcore-11.3.0', deps=['Zeta/3.0-GCCcore-11.3.0'])
+        self._write_module('Zeta', '3.0-GCCcore-11.3.0')
+
+        load_tree(self.modules, jobs=1, batch_size=1)
+
+        alpha = Version.objects.get(application__name='Alpha', version='1.0-GCCcore-11.3.0')
+        self.assertEqual(alpha.application.description, 'Alpha is a new piece of software')
+        self.assertEqual(alpha.module_load, 'Alpha/1.0-GCCcore-11.3.0')
+        self.assertEqual([d.application.name for d in alpha.dependencies.all()], ['Zeta'])
+        self.assertTrue(Link.objects.filter(version=alpha, bearappsversion__name='2022a',
+                                            architecture__name='EL8-icelake').exists())
+        log.check_present(
+            ("add_module_tree", "INFO", "Found 2 module files in %s" % self.modules),
+            ("functions", "INFO", "Set 1 dependencies for 1 versions"),
+            ("add_module_tree", "INFO", "Loaded 2 module files from %s" % self.modules),
+        )
+
+    @log_capture()
+    def test_load_tree_missing_dependency(self, log):
+        """
+        Test that a dependency that is not in the database is reported, and the others are still set
+        """
+        self._write_module('Alpha', '1.0', deps=['Missing/1.0', 'MATLAB/2017b'])
+
+        load_tree(self.modules, jobs=1)
+
+        alpha = Version.objects.get(application__name='Alpha', version='1.0')
+        self.assertEqual([d.version for d in alpha.dependencies.all()], ['2017b'])
+        log.check_present(
+            ("functions", "WARNING", "Can't find dependency Missing/1.0 of Alpha/1.0"),
+            ("functions", "WARNING", "1 dependencies could not be found"),
+            ("add_module_tree", "INFO", "Loaded 1 module files from %s" % self.modules),
+        )
+
+    def test_load_tree_lua(self):
+        """
+        Test loading a tree with Lua module files
+        """
+        os.makedirs(os.path.join(self.modules, 'Alpha'))
+        with open(os.path.join(self.modules, 'Alpha', '1.0.lua'), 'w') as f:
+            f.write('whatis([==[Description: Alpha in Lua]==])\nwhatis("Homepage: https://test.com")\n'
+                    'depends_on("MATLAB/2017b")\n')
+
+        load_tree(self.modules, jobs=1)
+
+        alpha = Version.objects.get(application__name='Alpha', version='1.0')
+        self.assertEqual(alpha.application.description, 'Alpha in Lua')
+        self.assertEqual(alpha.module_load, 'Alpha/1.0')
+        self.assertEqual([d.version for d in alpha.dependencies.all()], ['2017b'])
+
+    @log_capture()
+    def test_load_tree_unrecognised_path(self, log):
+        """
+        Test that module files outside a recognised tree are skipped
+        """
+        self._write_module('Alpha', '1.0')
+        num_vers = Version.objects.count()
+
+        with patch("add_module_info.re_filename_eb", re.compile(r"^/nowhere/(.*)$")):
+            load_tree(self.modules, jobs=1)
+
+        self.assertEqual(num_vers, Version.objects.count())
+        log.check_present(
+            ("add_module_tree", "WARNING",
+             "Skipping %s as it is not in a recognised module tree" % os.path.join(self.modules, 'Alpha', '1.0')),
+        )
+
+    @log_capture()
+    def test_load_tree_incremental(self, log):
+        """
+        Test that a manifest skips unchanged, or only touched, module files on later runs
+        """
+        self._write_module('Alpha', '1.0')
+        self._write_module('Beta', '2.0')
+        manifest_file = os.path.join(self.base, 'manifest.json')
+
+        load_tree(self.modules, jobs=1, manifest=Manifest(manifest_file))
+        log.check_present(
+            ("add_module_tree", "INFO", "0 module files are unchanged since the last run"),
+            ("add_module_tree", "INFO", "Loaded 2 module files from %s" % self.modules),
+        )
+        log.clear()
+
+        load_tree(self.modules, jobs=1, manifest=Manifest(manifest_file))
+        log.check_present(
+            ("add_module_tree", "INFO", "2 module files are unchanged since the last run"),
+            ("add_module_tree", "INFO", "Loaded 0 module files from %s" % self.modules),
+        )
+        log.clear()
+
+        os.utime(os.path.join(self.modules, 'Alpha', '1.0'), (1530346690, 1530346690))
+        self._write_module('Beta', '2.0', deps=['Alpha/1.0'])
+        load_tree(self.modules, jobs=1, manifest=Manifest(manifest_file))
+        log.check_present(
+            ("add_module_tree", "INFO", "0 module files are unchanged since the last run"),
+            ("add_module_tree", "INFO", "Loaded 1 module files from %s" % self.modules),
+        )
+        beta = Version.objects.get(application__name='Beta', version='2.0')
+        self.assertEqual([d.application.name for d in beta.dependencies.all()], ['Alpha'])
+
+    @log_capture()
+    def test_load_tree_incremental_missing_dependency(self, log):
+        """
+        Test that a module file with a dependency that is not in the database is not recorded in the manifest,
+        so that its dependencies are set on a later run once the dependency has been added
+        """
+        beta = self._write_module('Beta', '2.0', deps=['Alpha/1.0'])
+        manifest_file = os.path.join(self.base, 'manifest.json')
+
+        load_tree(self.modules, jobs=1, manifest=Manifest(manifest_file))
+        self.assertNotIn(beta, Manifest(manifest_file).entries)
+        log.check_present(
+            ("add_module_tree", "INFO",
+             "Not recording %s in the manifest, as some of its dependencies could not be found" % beta),
+        )
+
+        self._write_module('Alpha', '1.0')
+        load_tree(self.modules, jobs=1, manifest=Manifest(manifest_file))
+        self.assertIn(beta, Manifest(manifest_file).entries)
+        version = Version.objects.get(application__name='Beta', version='2.0')
+        self.assertEqual([d.application.name for d in version.dependencies.all()], ['Alpha'])
+
+    @log_capture()
+    def test_load_trees_dedupe(self, log):
+        """
+        Test that a module file that is the same under two architectures, apart from its paths, is only
+        parsed once but gives a link for each
+        """
+        haswell = os.path.join(self.base, '2022a', 'EL8-haswell', 'modules', 'all')
+        for modules in (self.modules, haswell):
+            arch = modules.split(os.sep)[-3]
+            self._write_module('Alpha', '1.0', deps=['MATLAB/2017b'], modules=modules,
+                               extra='prepend-path PATH /rds/bear-apps/2022a/%s/software/Alpha/1.0/bin\n' % arch)
+            # which has to be parsed under each architecture
+            self._write_module('Gamma', '3.0', deps=['Tools/%s/1.0' % arch], modules=modules)
+        self._write_module('Beta', '2.0', modules=haswell, extra='setenv BETA_ARCH EL8-haswell\n')
+
+        parsed = []
+
+        def parse_module(module_file, *args, **kwargs):
+            parsed.append(module_file)
+            return add_module_info.parse_module(module_file, *args, **kwargs)
+
+        with patch("add_module_tree.parse_module", parse_module):
+            load_trees([self.modules, haswell], jobs=1)
+
+        self.assertEqual(parsed, [os.path.join(self.modules, 'Alpha', '1.0'),
+                                  os.path.join(self.modules, 'Gamma', '3.0'),
+                                  os.path.join(haswell, 'Gamma', '3.0'),
+                                  os.path.join(haswell, 'Beta', '2.0')])
+        alpha = Version.objects.get(application__name='Alpha', version='1.0')
+        self.assertEqual(sorted(Link.objects.filter(version=alpha).values_list('architecture__name', flat=True)),
+                         ['EL8-haswell', 'EL8-icelake'])
+        self.assertEqual([d.version for d in alpha.dependencies.all()], ['2017b'])
+        log.check_present(
+            ("add_module_tree", "INFO", "Parsing 3 distinct module files for 5 module files"),
+            ("add_module_tree", "INFO", "Loaded 5 module files from %s, %s" % (self.modules, haswell)),
+        )
+
+    def test_load_trees_dependencies_per_architecture(self):
+        """
+        Test that a version whose module files load different modules under each architecture depends on all
+        of them
+        """
+        haswell = os.path.join(self.base, '2022a', 'EL8-haswell', 'modules', 'all')
+        self._write_module('Alpha', '1.0', deps=['MATLAB/2017b'])
+        self._write_module('Alpha', '1.0', deps=['MATLAB/2017b', 'MATLAB/2017a'], modules=haswell)
+
+        load_trees([self.modules, haswell], jobs=1)
+
+        alpha = Version.objects.get(application__name='Alpha', version='1.0')
+        self.assertEqual(sorted(d.version for d in alpha.dependencies.all()), ['2017a', '2017b'])
+
+    def test_upload_batch_keeps_data(self):
+        """
+        Test that uploading parsed data leaves it as it was, as it can be shared by the module files of a group
+        """
+        module_file = self._write_module('Alpha', '1.0', deps=['MATLAB/2017b'])
+        data = add_module_info.parse_module(module_file, False)
+        parsed = dict(data)
+        upload_batch([(module_file, 'digest', data)])
+        self.assertEqual(data, parsed)
+        self.assertEqual(data['deps'], ['MATLAB/2017b'])
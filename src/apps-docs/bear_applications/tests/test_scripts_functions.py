@@ -1,12 +1,15 @@
 import pytz
-from datetime import datetime
+from datetime import datetime, timedelta
+from django.db import transaction
 from django.test import TestCase
 from testfixtures import log_capture
-from bear_applications.models import Application, Version, BearAppsVersion, Architecture, Link
+from bear_applications.models import (Application, Version, BearAppsVersion, Architecture, Link, CurrentVersion,
+                                      ParagraphData, SearchDocument)
 
 import sys
 sys.path.insert(0, "../../scripts")
-from functions import abort, get_application, set_dependencies, set_up_logging, upload_data, _parse_ext_list_to_html
+from functions import (abort, get_application, set_dependencies, set_dependencies_batch, set_up_logging,
+                       upload_data, upload_data_batch, _parse_ext_list_to_html)
 
 
 class FunctionsTestCase(TestCase):
@@ -117,6 +120,47 @@ class FunctionsTestCase(TestCase):
         self.assertEqual(ver.dependencies.count(), 1)
         self.assertEqual(ver.sorted_dependencies[0].version, '2.7.12-foss-2012a')
 
+    @log_capture()
+    def test_set_dependencies_batch(self, log):
+        """
+        Test setting dependencies for several versions at once, including ones that can't be found
+        """
+        _, tf_cuda = get_application(name='TensorFlow', version='1.13.1-fosscuda-2018b-Python-3.6.6')
+        _, tf_foss = get_application(name='TensorFlow', version='1.13.1-foss-2018b-Python-3.6.6')
+        self.assertEqual(tf_foss.dependencies.count(), 2)
+
+        # including 1 to record that the catalog has changed
+        with self.assertNumQueries(7):
+            unresolved = set_dependencies_batch([
+                (tf_cuda, ['Python/2.7.12-foss-2012a', 'MATLAB/2017b', 'Python/2016a', 'not-a-dep']),
+                (tf_foss, ['Python/2.7.12-foss-2012a', 'Python/2.7.12-foss-2012a']),
+            ])
+
+        self.assertEqual(unresolved, [(tf_cuda, 'Python/2016a')])
+        self.assertEqual([v.version for v in tf_cuda.sorted_dependencies], ['2017b', '2.7.12-foss-2012a'])
+        self.assertEqual([v.version for v in tf_foss.sorted_dependencies], ['2.7.12-foss-2012a'])
+        log.check(
+            ('functions', 'WARNING', "Discarding potential dep 'not-a-dep' as it doesn't match 'a/b'"),
+            ('functions', 'WARNING',
+             "Can't find dependency Python/2016a of TensorFlow/1.13.1-fosscuda-2018b-Python-3.6.6"),
+            ('functions', 'INFO', 'Set 3 dependencies for 2 versions'),
+            ('functions', 'WARNING', '1 dependencies could not be found'),
+        )
+
+    @log_capture()
+    def test_set_dependencies_batch_unresolved_queries(self, log):
+        """
+        Test that the warnings about dependencies that can't be found don't take a query each
+        """
+        versions = list(Version.objects.filter(application__name='TensorFlow'))
+        # with 1 for the names of the versions' applications, however many dependencies can't be found
+        with self.assertNumQueries(6):
+            unresolved = set_dependencies_batch([(ver, ['Python/2016a', 'MATLAB/2016a']) for ver in versions])
+        self.assertEqual(len(unresolved), 2 * len(versions))
+        log.check_present(
+            ('functions', 'WARNING', "Can't find dependency MATLAB/2016a of TensorFlow/%s" % versions[-1].version),
+        )
+
     def test_one_splittable_ext(self):
         """
         Test one splittable extension
@@ -193,3 +237,88 @@ class FunctionsTestCase(TestCase):
         new_link = Link.objects.get(version__version="new", version__application__name="New",
                                     bearappsversion__name="new", architecture__name="new")
         self.assertEqual(new_link.version.application.description, "new")
+
+    def test_upload_data_queries(self):
+        """
+        Test that upload_data brings the flags, search documents and generation up to date once, at the end
+        """
+        time = datetime.utcnow().replace(tzinfo=pytz.utc)
+        # 10 to upload it, 7 to bring the flags, siblings and search documents up to date and 1 to record that the
+        # catalog has changed
+        with self.assertNumQueries(18):
+            ver = upload_data("New", "1.0", "EL7-haswell", "2019a", "New/1.0", "https://new.com", "new", time, time)
+        ver = Version.objects.get(pk=ver.pk)
+        self.assertEqual((ver.is_visible, ver.visible_link_count), (True, 1))
+        self.assertTrue(SearchDocument.objects.filter(version=ver).exists())
+
+    def _snapshot(self):
+        """
+        The state of the database, as compared by the upload_data_batch tests
+        """
+        return {
+            'applications': set(Application.objects.values_list('name', 'description', 'more_info')),
+            'versions': set(Version.objects.values_list('application__name', 'version', 'module_load', 'created',
+                                                        'modified')),
+            'architectures': set(Architecture.objects.values_list('name', 'displayed_name', 'hidden')),
+            'bavs': set(BearAppsVersion.objects.values_list('name', 'displayed_name', 'auto_loaded', 'hidden',
+                                                            'deprecated', 'supported')),
+            'links': set(Link.objects.values_list('version__application__name', 'version__version',
+                                                  'bearappsversion__name', 'architecture__name')),
+            'paragraphs': set(ParagraphData.objects.values_list('version__application__name', 'version__version',
+                                                                'application__name', 'header', 'content')),
+            'current_versions': set(CurrentVersion.objects.values_list('application__name', 'version__version')),
+            'dependencies': set(Version.dependencies.through.objects.values_list(
+                'from_version__application__name', 'from_version__version',
+                'to_version__application__name', 'to_version__version')),
+        }
+
+    def test_upload_data_batch_same_as_upload_data(self):
+        """
+        Test that upload_data_batch gives the same result as calling upload_data for each record
+        """
+        time = datetime.utcnow().replace(tzinfo=pytz.utc)
+        later = time + timedelta(days=1)
+        records = [
+            # existing version, new link
+            dict(name="MATLAB", version="2017b", arch="EL8-icelake", bav_family="2019a", module_load="MATLAB/2017b",
+                 home="https://test.com", desc="MATLAB", created=time, modified=time),
+            # new version of an existing application
+            dict(name="MATLAB", version="R2025a", arch="EL8-icelake", bav_family="2025a",
+                 module_load="MATLAB/R2025a", home="https://test.com", desc="MATLAB", created=later, modified=later),
+            # new application, with the newer version first
+            dict(name="New", version="2.0", arch="EL8-icelake", bav_family="2025a", module_load="New/2.0",
+                 home="https://new.com", desc="new", created=later, modified=later, ext="A-4,B-5",
+                 deps=["MATLAB/2017b"]),
+            dict(name="New", version="1.0", arch="EL8-icelake", bav_family="2025a", module_load="New/1.0",
+                 home="https://new.com", desc="new", created=time, modified=time),
+            dict(name="New", version="1.0", arch="EL8-sapphirerapids", bav_family="2025a", module_load="New/1.0",
+                 home="https://new.com", desc="new", created=time, modified=time),
+            # no architecture, as from add_application_version.py
+            dict(name="Other", version="3.0", arch=None, bav_family="2025a", module_load="Other/3.0",
+                 home="https://other.com", desc="other", created=time, modified=time, ext="C-1"),
+        ]
+
+        with transaction.atomic():
+            for record in records:
+                upload_data(**record)
+            expected = self._snapshot()
+            transaction.set_rollback(True)
+
+        self.assertNotEqual(expected, self._snapshot())
+        versions = upload_data_batch(records)
+        self.assertEqual(expected, self._snapshot())
+        self.assertEqual([(v.application.name, v.version) for v in versions],
+                         [(r['name'], r['version']) for r in records])
+
+    def test_upload_data_batch_queries(self):
+        """
+        Test that the number of queries for upload_data_batch does not depend on the number of records
+        """
+        time = datetime.utcnow().replace(tzinfo=pytz.utc)
+        records = [dict(name="New%d" % i, version="1.0", arch="EL7-haswell", bav_family="2019a",
+                        module_load="New%d/1.0" % i, home="https://new.com", desc="new", created=time, modified=time)
+                   for i in range(50)]
+        # including 6 to update the flags, siblings and search documents, and 1 to record that the catalog has changed
+        with self.assertNumQueries(20):
+            upload_data_batch(records)
+        self.assertEqual(Link.objects.filter(version__application__name__startswith="New").count(), 50)
@@ -0,0 +1,81 @@
+import os
+import sys
+import tempfile
+from django.test import SimpleTestCase
+
+sys.path.insert(0, "../../scripts")
+from manifest import Manifest, content_hash
+
+
+class ManifestTestCase(SimpleTestCase):
+    """
+    Test the manifest.py script
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.filename = os.path.join(self.tmpdir.name, 'manifest.json')
+        self.module_file = os.path.join(self.tmpdir.name, 'all', 'Alpha', '1.0')
+        os.makedirs(os.path.dirname(self.module_file))
+        with open(self.module_file, 'w') as f:
+            f.write('module-whatis {Homepage: https://test.com }')
+
+    def test_content_hash(self):
+        """
+        Test the content hash
+        """
+        self.assertEqual(content_hash(b'abc'), 'a9993e364706816aba3e25717850c26c9cd0d89d')
+
+    def test_record_and_save(self):
+        """
+        Test that recorded files are unchanged after saving and reading the manifest again
+        """
+        manifest = Manifest(self.filename)
+        stat = os.stat(self.module_file)
+        self.assertFalse(manifest.unchanged(self.module_file, stat))
+        self.assertFalse(manifest.same_content(self.module_file, 'abc'))
+
+        manifest.record(self.module_file, stat, 'abc')
+        manifest.save()
+
+        manifest = Manifest(self.filename)
+        self.assertTrue(manifest.unchanged(self.module_file, stat))
+        self.assertTrue(manifest.same_content(self.module_file, 'abc'))
+        self.assertFalse(os.path.exists('%s.tmp' % self.filename))
+
+    def test_changed(self):
+        """
+        Test that a change of mtime is noticed
+        """
+        manifest = Manifest(self.filename)
+        manifest.record(self.module_file, os.stat(self.module_file), 'abc')
+        os.utime(self.module_file, (1530346690, 1530346690))
+        self.assertFalse(manifest.unchanged(self.module_file, os.stat(self.module_file)))
+        self.assertTrue(manifest.same_content(self.module_file, 'abc'))
+
+    def test_prune(self):
+        """
+        Test that only removed files under the directory are forgotten
+        """
+        manifest = Manifest(self.filename)
+        stat = os.stat(self.module_file)
+        manifest.record(self.module_file, stat, 'abc')
+        manifest.record(os.path.join(self.tmpdir.name, 'all', 'Beta', '2.0'), stat, 'def')
+        manifest.record('/elsewhere/Gamma/3.0', stat, 'ghi')
+
+        manifest.prune(os.path.join(self.tmpdir.name, 'all'), {self.module_file})
+        self.assertEqual(sorted(manifest.entries), ['/elsewhere/Gamma/3.0', self.module_file])
+
+    def test_forget(self):
+        """
+        Test that a forgotten file is neither unchanged nor the same content, and that forgetting one that
+        isn't recorded does nothing
+        """
+        manifest = Manifest(self.filename)
+        stat = os.stat(self.module_file)
+        manifest.record(self.module_file, stat, 'abc')
+        manifest.forget(self.module_file)
+        manifest.forget(self.module_file)
+        self.assertFalse(manifest.unchanged(self.module_file, stat))
+        self.assertFalse(manifest.same_content(self.module_file, 'abc'))
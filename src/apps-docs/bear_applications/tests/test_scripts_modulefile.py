@@ -0,0 +1,129 @@
+import os
+import sys
+from django.test import SimpleTestCase
+
+sys.path.insert(0, "../../scripts")
+from modulefile import LuaSyntaxError, lua_calls, parse_lua, parse_modulefile, parse_tcl
+
+MODULEFILES = os.path.join(os.path.dirname(__file__), 'modulefiles')
+
+
+def read_modulefile(name):
+    with open(os.path.join(MODULEFILES, name)) as f:
+        return f.read()
+
+
+class ModuleFileTestCase(SimpleTestCase):
+    """
+    Test the modulefile.py script
+    """
+
+    def test_syntax_error_partial(self):
+        """
+        Test that a syntax error has the fields parsed before it
+        """
+        with self.assertRaises(LuaSyntaxError) as cm:
+            parse_lua('whatis("Homepage: https://a.com")\nload("A/1")\nload("B/1"')
+        self.assertEqual(cm.exception.module.homepage, 'https://a.com')
+        self.assertEqual(cm.exception.module.loads, ['A/1'])
+        self.assertEqual(cm.exception.module.compatible, [])
+
+    def test_parse_python(self):
+        """
+        Test a module file with help text, extensions and dependencies loaded in if commands
+        """
+        module = parse_tcl(read_modulefile('Python-3.9.6-GCCcore-11.2.0'))
+        self.assertEqual(module.homepage, 'https://python.org/')
+        self.assertEqual(module.description, 'Python is a programming language that lets you work more quickly and '
+                                             'integrate your systems\n more effectively.')
+        self.assertTrue(module.extensions.startswith('alabaster-0.7.12, appdirs-1.4.4, '))
+        self.assertTrue(module.extensions.endswith(', clikit-0.6.2'))
+        self.assertEqual(module.compatible, [])
+        # and not the 'module load' in the help text
+        self.assertEqual(module.loads, ['GCCcore/11.2.0', 'bzip2/1.0.8-GCCcore-11.2.0', 'zlib/1.2.11-GCCcore-11.2.0',
+                                        'libreadline/8.1-GCCcore-11.2.0', 'OpenSSL/1.1'])
+
+    def test_parse_continuation(self):
+        """
+        Test a module file with a continuation and a one line if command
+        """
+        module = parse_tcl(read_modulefile('TensorFlow-2.7.1-foss-2021b-CUDA-11.4.1'))
+        self.assertNotIn('\\', module.extensions)
+        self.assertIn('google-pasta-0.2.0,  grpcio-1.41.1', module.extensions)
+        self.assertEqual(module.loads[-1], 'h5py/3.6.0-foss-2021b')
+
+    def test_parse_compatible(self):
+        """
+        Test a module file with compatible modules and if/elseif/else
+        """
+        module = parse_tcl(read_modulefile('matplotlib-3.4.3-foss-2021b'))
+        self.assertEqual(module.compatible, ['Python/3.9.6-GCCcore-11.2.0', 'Python/2.7.18-GCCcore-11.2.0'])
+        self.assertEqual(module.loads, ['foss/2021b', 'Python/2.7.18-GCCcore-11.2.0', 'Python/3.9.6-GCCcore-11.2.0',
+                                        'Python/3.9.6-GCCcore-11.2.0', 'libpng/1.6.37-GCCcore-11.2.0'])
+
+    def test_parse_no_extensions(self):
+        """
+        Test a module file without extensions or dependencies
+        """
+        module = parse_tcl(read_modulefile('GCCcore-11.2.0'))
+        self.assertEqual(module.homepage, 'https://gcc.gnu.org/')
+        self.assertIsNone(module.extensions)
+        self.assertEqual(module.loads, [])
+
+    def test_parse_first_whatis(self):
+        """
+        Test that the first of each module-whatis field is used
+        """
+        module = parse_tcl('module-whatis "Homepage: https://a.com"\nmodule-whatis {Homepage: https://b.com}\n'
+                           'module-whatis Description: one line\n')
+        self.assertEqual(module.homepage, 'https://a.com')
+        self.assertEqual(module.description, 'one line')
+
+    def test_parse_loads(self):
+        """
+        Test module loads of several modules, with a continuation, and depends-on, but not in a comment
+        """
+        module = parse_tcl('module load A/1 B/1\n  depends-on C/1\n# module load D/1\nmodule load E/1 \\\n    F/1\n'
+                           'if { 1 } { module load G/1 }\n')
+        self.assertEqual(module.loads, ['A/1', 'B/1', 'C/1', 'E/1', 'F/1', 'G/1'])
+
+    def test_lua_calls(self):
+        """
+        Test finding function calls in Lua, but not in strings or comments
+        """
+        lua = ('help([[ load("A/1") ]])\n-- load("B/1")\n--[==[\nload("C/1")\n]==]\n'
+               'if not isloaded("D/1") then load("D/1", \'E/1\') end\n'
+               'load(pathJoin("F", "1"))\nwhatis("Homepage: \\"x\\"")\n')
+        self.assertEqual(list(lua_calls(lua)), [
+            ('load', ['D/1', 'E/1']),
+            ('load', ['pathJoin("F", "1")']),
+            ('whatis', ['Homepage: "x"']),
+        ])
+        with self.assertRaises(LuaSyntaxError):
+            list(lua_calls('help([==[ never ends ]])'))
+        with self.assertRaises(LuaSyntaxError):
+            list(lua_calls('load("A/1"'))
+
+    def test_parse_lua(self):
+        """
+        Test a Lua module file with help text, comments and dependencies from load and depends_on
+        """
+        module = parse_lua(read_modulefile('SciPy-bundle-2022.05-foss-2022a.lua'))
+        self.assertEqual(module.homepage, 'https://python.org/')
+        self.assertEqual(module.description, 'Bundle of Python packages for scientific software')
+        self.assertTrue(module.extensions.startswith('beniget-0.4.1, Bottleneck-1.3.4, '))
+        self.assertEqual(module.compatible, [])
+        self.assertEqual(module.loads, ['foss/2022a', 'Python/3.10.4-GCCcore-11.3.0', 'pybind11/2.9.2-GCCcore-11.3.0'])
+
+    def test_parse_lua_extensions(self):
+        """
+        Test that the Lmod extensions are used when there is no Extensions whatis
+        """
+        module = parse_modulefile('PyTorch-1.12.0-foss-2022a-CUDA-11.7.0.lua',
+                                  read_modulefile('PyTorch-1.12.0-foss-2022a-CUDA-11.7.0.lua'))
+        self.assertEqual(module.extensions, 'PyTorch-1.12.0')
+        self.assertEqual(module.description, 'Tensors and Dynamic neural networks in Python with strong GPU '
+                                             'acceleration.\nPyTorch is a deep learning framework that puts Python '
+                                             'first.')
+        self.assertEqual(module.loads, ['CUDA/11.7.0', 'Ninja/1.10.2-GCCcore-11.3.0', 'Python/3.10.4-GCCcore-11.3.0',
+                                        'SciPy-bundle/2022.05-foss-2022a'])
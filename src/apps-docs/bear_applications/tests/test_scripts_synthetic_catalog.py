@@ -0,0 +1,65 @@
+import sys
+from django.test import TestCase, override_settings
+from testfixtures import log_capture
+from bear_applications.models import Application, CurrentVersion, Version
+
+sys.path.insert(0, "../../scripts")
+from benchmark_web import ClientRequester, page_urls, percentile, run_benchmark
+from synthetic_catalog import generate_catalog
+
+
+class SyntheticCatalogTestCase(TestCase):
+    """
+    Test the synthetic_catalog.py and benchmark_web.py scripts
+    """
+
+    def test_generate_catalog(self):
+        """
+        Test that the catalog has the versions asked for, with dependencies and siblings, and is visible
+        """
+        counts = generate_catalog(applications=30, versions=6, bavs=3, archs=2)
+        self.assertEqual(counts['Application'], 30)
+        self.assertEqual(counts['Version'], 30 * 6)
+        self.assertEqual(counts['Link'], 30 * 6 * 2)
+        self.assertGreater(counts['Version_dependencies'], 0)
+        self.assertEqual(CurrentVersion.objects.count(), 30)
+        self.assertEqual(Version.objects.filter(is_visible=True, visible_link_count=2).count(), 30 * 6)
+        self.assertTrue(Version.objects.filter(sibling_is_gpu=True).exists())
+
+        with self.assertRaises(ValueError):
+            generate_catalog(applications=1, versions=1, bavs=1, archs=1)
+
+    def test_too_many(self):
+        """
+        Test that asking for more BEAR Apps Versions or architectures than there are is an error
+        """
+        with self.assertRaises(ValueError):
+            generate_catalog(applications=1, versions=1, bavs=100, archs=1)
+        self.assertFalse(Application.objects.exists())
+
+    def test_percentile(self):
+        """
+        Test the nearest rank percentiles
+        """
+        values = list(range(1, 101))
+        self.assertEqual([percentile(values, percent) for percent in (50, 95, 99, 100)], [50, 95, 99, 100])
+        self.assertEqual(percentile([7], 99), 7)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    @log_capture()
+    def test_run_benchmark(self, log):
+        """
+        Test that every page is requested, and that the pages with arguments are sampled
+        """
+        generate_catalog(applications=10, versions=4, bavs=2, archs=2)
+        pages = page_urls(3)
+        # which has no template
+        log.check_present(('root', 'WARNING', 'Not benchmarking accessibility'))
+        results = run_benchmark(ClientRequester(), pages, repeat=2)
+        self.assertEqual(results['all']['requests'], len(pages) * 2)
+        self.assertEqual(results['application_version']['requests'], 3 * 2)
+        self.assertEqual(results['all']['errors'], 0)
+        for result in results.values():
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+            self.assertLessEqual(result['p95_ms'], result['p99_ms'])
+        self.assertGreater(results['application_version']['max_queries'], results['home']['mean_queries'])
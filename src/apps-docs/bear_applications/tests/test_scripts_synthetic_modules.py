@@ -0,0 +1,79 @@
+import os
+import sys
+import tempfile
+from django.test import TestCase
+from testfixtures import log_capture
+from unittest.mock import patch
+from bear_applications.models import Link, Version
+
+sys.path.insert(0, "../../scripts")
+from add_module_tree import load_trees
+from benchmark_ingest import measure
+from modulefile import parse_tcl
+from synthetic_modules import filename_regex, generate_tree, module_directories
+
+
+class SyntheticModulesTestCase(TestCase):
+    """
+    Test the synthetic_modules.py and benchmark_ingest.py scripts
+    """
+
+    fixtures = ["db.json"]
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.base = os.path.realpath(self.tmpdir.name)
+
+    def test_generate_tree(self):
+        """
+        Test that the tree has a module file for each app under each architecture, which only differ in
+        their paths, and only load module files before them
+        """
+        module_files = generate_tree(self.base, bavs=2, archs=2, apps=40)
+        self.assertEqual(len(module_files), 2 * 2 * 40)
+        self.assertEqual(len(set(module_files)), len(module_files))
+        self.assertEqual(module_directories(self.base, bavs=2, archs=2),
+                         [os.path.join(self.base, bav, arch, 'modules', 'all')
+                          for bav in ('2019b', '2020a') for arch in ('EL8-icelake', 'EL8-cascadelake')])
+
+        with open(module_files[5]) as f:
+            icelake = f.read()
+        with open(module_files[45]) as f:
+            cascadelake = f.read()
+        self.assertNotEqual(icelake, cascadelake)
+        self.assertEqual(icelake.replace('/EL8-icelake/', '/EL8-cascadelake/'), cascadelake)
+
+        regex = filename_regex(self.base)
+        seen = set()
+        compatible = 0
+        for module_file in module_files:
+            match = regex.match(module_file)
+            module = parse_tcl(open(module_file).read())
+            self.assertTrue(set(module.loads + module.compatible) <= seen, module_file)
+            compatible += bool(module.compatible)
+            seen.add('%s/%s' % (match.group(3), match.group(4)))
+        self.assertGreater(compatible, 0)
+
+        # the same seed gives the same tree
+        other = os.path.join(self.base, 'other')
+        self.assertEqual([os.path.relpath(path, other) for path in generate_tree(other, bavs=2, archs=2, apps=40)],
+                         [os.path.relpath(path, self.base) for path in module_files])
+
+    @log_capture()
+    def test_load_generated_tree(self, log):
+        """
+        Test that every dependency in a generated tree is found when it is loaded
+        """
+        module_files = generate_tree(self.base, bavs=1, archs=2, apps=30)
+        num_vers = Version.objects.count()
+        num_links = Link.objects.count()
+
+        with patch("add_module_info.re_filename_eb", filename_regex(self.base)):
+            elapsed, queries = measure(lambda: load_trees(module_directories(self.base, archs=2), jobs=1))
+
+        self.assertGreater(queries, 0)
+        self.assertEqual(Version.objects.count(), num_vers + 30)
+        self.assertEqual(Link.objects.count(), num_links + len(module_files))
+        self.assertTrue(Version.objects.get(application__name='foss', version='2019b').dependencies.exists())
+        self.assertFalse([record for record in log.records if record.levelname == 'WARNING'])
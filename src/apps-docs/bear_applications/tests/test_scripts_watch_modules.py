@@ -0,0 +1,142 @@
+import os
+import re
+import sys
+import tempfile
+from django.test import TestCase
+from testfixtures import log_capture
+from unittest import skipUnless
+from unittest.mock import patch
+from bear_applications.models import Link, Version
+
+sys.path.insert(0, "../../scripts")
+from manifest import Manifest
+from watch_modules import InotifyWatcher, PollingWatcher, next_changes, watch
+
+FAKE_MODULE_FILE = """module-whatis {{Homepage: https://test.com }}
+module-whatis {{Description: {name} is a new piece of software }}
+"""
+
+try:
+    InotifyWatcher([tempfile.gettempdir()]).close()
+    HAVE_INOTIFY = True
+except OSError:
+    HAVE_INOTIFY = False
+
+
+class FakeWatcher:
+    """
+    A watcher that returns each of changes in turn
+    """
+
+    def __init__(self, changes):
+        self.changes = list(changes)
+        self.timeouts = []
+
+    def poll(self, timeout=None):
+        self.timeouts.append(timeout)
+        return self.changes.pop(0) if self.changes else set()
+
+
+class WatchModulesTestCase(TestCase):
+    """
+    Test the watch_modules.py script
+    """
+
+    fixtures = ["db.json"]
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.base = os.path.realpath(self.tmpdir.name)
+        self.modules = os.path.join(self.base, '2022a', 'EL8-icelake', 'modules', 'all')
+        os.makedirs(self.modules)
+        re_filename = re.compile(r"^%s/([^/]+)/([^/]+)/modules/all/([^/]+)/(.*)$" % re.escape(self.base))
+        for target, value in [("add_module_info.re_filename_eb", re_filename),
+                              # which would end the transaction of the test
+                              ("watch_modules.close_old_connections", lambda: None)]:
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _write_module(self, name, version):
+        os.makedirs(os.path.join(self.modules, name), exist_ok=True)
+        path = os.path.join(self.modules, name, version)
+        with open(path, 'w') as f:
+            f.write(FAKE_MODULE_FILE.format(name=name))
+        return path
+
+    def test_polling_watcher(self):
+        """
+        Test that polling finds new and changed module files, but not hidden or unchanged ones
+        """
+        alpha = self._write_module('Alpha', '1.0')
+        watcher = PollingWatcher([self.modules], interval=0.01)
+        self.assertEqual(watcher.poll(0), set())
+
+        beta = self._write_module('Beta', '2.0')
+        self._write_module('Beta', '.modulerc')
+        os.utime(alpha, (1530346690, 1530346690))
+        self.assertEqual(watcher.poll(1), {alpha, beta})
+        self.assertEqual(watcher.poll(0), set())
+
+    @skipUnless(HAVE_INOTIFY, "inotify is not available")
+    def test_inotify_watcher(self):
+        """
+        Test that inotify finds module files that are written, including in new directories, or linked
+        """
+        watcher = InotifyWatcher([self.modules])
+        self.addCleanup(watcher.close)
+        self.assertEqual(watcher.poll(0), set())
+
+        alpha = self._write_module('Alpha', '1.0')
+        self._write_module('Alpha', '.modulerc')
+        link = os.path.join(self.modules, 'Alpha', 'default')
+        os.symlink(alpha, link)
+        self.assertEqual(next_changes(watcher, debounce=0.1), {alpha, link})
+
+        beta = self._write_module('Alpha', '2.0')
+        self.assertEqual(watcher.poll(1), {beta})
+
+    def test_next_changes(self):
+        """
+        Test that a burst of changes is returned at once, until there is a pause or max_delay passes
+        """
+        watcher = FakeWatcher([{'a'}, {'b'}, {'a', 'c'}, set(), {'d'}])
+        self.assertEqual(next_changes(watcher, debounce=2), {'a', 'b', 'c'})
+        self.assertEqual(watcher.timeouts, [None, 2, 2, 2])
+
+        watcher = FakeWatcher([{'a'}, {'b'}])
+        self.assertEqual(next_changes(watcher, debounce=2, max_delay=0), {'a'})
+
+    @log_capture()
+    def test_watch(self, log):
+        """
+        Test that each burst of changes is loaded, and that a module file is only loaded again once its
+        contents change
+        """
+        manifest = Manifest(os.path.join(self.base, 'manifest.json'))
+        watcher = PollingWatcher([self.modules], interval=0.01)
+        self._write_module('Alpha', '1.0')
+        self._write_module('Beta', '2.0')
+
+        watch(watcher, manifest=manifest, debounce=0.05, max_loads=1)
+
+        alpha = Version.objects.get(application__name='Alpha', version='1.0')
+        self.assertTrue(Link.objects.filter(version=alpha, bearappsversion__name='2022a',
+                                            architecture__name='EL8-icelake').exists())
+        self.assertTrue(Version.objects.filter(application__name='Beta', version='2.0').exists())
+        log.check_present(
+            ("watch_modules", "INFO", "Loading 2 new or changed module files"),
+            ("functions", "INFO", "Uploading 2 records"),
+            ("watch_modules", "INFO", "Loaded 2 module files"),
+        )
+        log.clear()
+
+        # rewritten with the same contents
+        self._write_module('Alpha', '1.0')
+        os.utime(os.path.join(self.modules, 'Alpha', '1.0'), (1530346690, 1530346690))
+        watch(watcher, manifest=manifest, debounce=0.05, max_loads=1)
+        log.check_present(
+            ("watch_modules", "INFO", "Loading 1 new or changed module files"),
+            ("watch_modules", "INFO", "Loaded 0 module files"),
+        )
@@ -0,0 +1,118 @@
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from bear_applications.models import (Application, Architecture, BearAppsVersion, Link, ParagraphData,
+                                      SearchDocument, Version)
+from bear_applications.search import has_fts, search_documents
+
+
+class SearchDocumentTestCase(TestCase):
+    """
+    Test the search index
+    """
+    fixtures = ['db.json']
+
+    def _search(self, conditions, match_all=True):
+        return sorted(search_documents(conditions, match_all).values_list('name', 'ver'))
+
+    def test_documents(self):
+        """
+        Test that only the visible versions have documents, holding their text
+        """
+        self.assertFalse(SearchDocument.objects.filter(version__reason_to_hide__isnull=False).exists())
+        self.assertFalse(SearchDocument.objects.filter(version__application__reason_to_hide__isnull=False).exists())
+        document = SearchDocument.objects.get(name='MATLAB', ver='R2018b')
+        self.assertIn('\x1fsome text\x1f', document.other)
+        self.assertIn('\x1fhere is some text\x1f', document.other)
+
+    def test_kept_up_to_date(self):
+        """
+        Test that changes to versions, applications and paragraphs change the documents
+        """
+        version = Version.objects.get(application__name='MATLAB', version='2017b')
+        self.assertEqual(self._search([(['other'], 'quantum', False)]), [])
+
+        ParagraphData.objects.create(version=version, header='Quantum', content='Some new text')
+        self.assertEqual(self._search([(['other'], 'quantum', False)]), [('MATLAB', '2017b')])
+
+        version.reason_to_hide = 'replaced'
+        version.save()
+        self.assertEqual(self._search([(['other'], 'quantum', False)]), [])
+
+        application = Application.objects.get(name='Singularity')
+        application.description = 'Containers for quantum computing'
+        application.save()
+        self.assertTrue(self._search([(['other'], 'quantum', False)]))
+        self.assertTrue(all(name == 'Singularity' for name, _ in self._search([(['other'], 'quantum', False)])))
+
+        application.delete()
+        self.assertEqual(self._search([(['other'], 'quantum', False)]), [])
+
+    def test_link_visibility(self):
+        """
+        Test that a version only has a document while it has a visible link
+        """
+        application = Application.objects.create(name='Apptainer', description='Containers')
+        version = Version.objects.create(application=application, version='1.1.9', module_load='Apptainer/1.1.9',
+                                         created=timezone.now(), modified=timezone.now())
+        self.assertFalse(SearchDocument.objects.filter(version=version).exists())
+
+        Link.objects.create(version=version, bearappsversion=BearAppsVersion.objects.get(name='2019a'),
+                            architecture=Architecture.objects.get(name='BB-Hidden-Arch'))
+        self.assertFalse(SearchDocument.objects.filter(version=version).exists())
+
+        Architecture.objects.filter(name='BB-Hidden-Arch').update(hidden=False)
+        architecture = Architecture.objects.get(name='BB-Hidden-Arch')
+        architecture.save()
+        self.assertTrue(SearchDocument.objects.filter(version=version).exists())
+
+    def test_exact(self):
+        """
+        Test that an exact search of the other text matches a whole description or paragraph
+        """
+        self.assertIn(('MATLAB', 'R2018b'), self._search([(['other'], 'Some Text', True)]))
+        self.assertNotIn(('MATLAB', 'R2018b'), self._search([(['other'], 'some', True)]))
+        self.assertEqual(self._search([(['name'], 'matlab', True)]), self._search([(['name'], 'MATLAB', True)]))
+        self.assertNotIn(('matlab_toolbox', '1.0'), self._search([(['name'], 'matlab', True)]))
+
+    def test_wildcards(self):
+        """
+        Test that % and _ in a search are matched literally
+        """
+        self.assertEqual(self._search([(['name'], '%', False)]), [])
+        self.assertEqual(self._search([(['name'], 'matlab_', False)]), [('matlab_toolbox', '1.0')])
+
+    def test_fallback(self):
+        """
+        Test that searching without the FTS5 table gives the same results
+        """
+        searches = [([(['name', 'ver', 'module_load', 'other'], 'matlab', False)], True),
+                    ([(['other'], 'some text', True)], True),
+                    ([(['name'], 'matlab', False), (['ver'], '2017', False)], True),
+                    ([(['name'], 'pytorch', True), (['ver'], 'r2018b', True)], False),
+                    ([(['name'], 'matlab_', False)], True)]
+        results = [self._search(*search) for search in searches]
+        self.assertTrue(all(results))
+        with patch('bear_applications.search.has_fts', lambda: False):
+            self.assertEqual([self._search(*search) for search in searches], results)
+
+    def test_has_fts(self):
+        """
+        Test that the FTS5 table is used with SQLite
+        """
+        self.assertTrue(has_fts())
+
+    def test_rebuild_search_index(self):
+        """
+        Test that the command recreates the documents
+        """
+        count = SearchDocument.objects.count()
+        SearchDocument.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertEqual(SearchDocument.objects.count(), count)
+        self.assertEqual(out.getvalue(), "Indexed %d versions\n" % count)
+        self.assertIn(('TensorFlow', '1.13.1-foss-2018b-Python-3.6.6'),
+                      self._search([(['name'], 'tensorflow', True)]))
@@ -0,0 +1,71 @@
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from bear_applications.models import Application, Version
+from bear_applications.siblings import sibling_module_load, update_siblings
+
+
+class SiblingsTestCase(TestCase):
+    """
+    Test the CPU/GPU siblings and CUDA flags of versions
+    """
+    fixtures = ['db.json']
+
+    def test_sibling_module_load(self):
+        """
+        Test the module load of the sibling for the different toolchains
+        """
+        self.assertEqual(sibling_module_load('TensorFlow/1.13.1-foss-2018b-Python-3.6.6'),
+                         ('TensorFlow/1.13.1-fosscuda-2018b-Python-3.6.6', True, False))
+        self.assertEqual(sibling_module_load('TensorFlow/1.13.1-fosscuda-2018b-Python-3.6.6'),
+                         ('TensorFlow/1.13.1-foss-2018b-Python-3.6.6', False, True))
+        self.assertEqual(sibling_module_load('PyTorch/1.10.0-foss-2021a-CUDA-11.3.1'),
+                         ('PyTorch/1.10.0-foss-2021a', False, True))
+        self.assertEqual(sibling_module_load('MATLAB/R2018b'), (None, False, False))
+
+    def test_fixture_siblings(self):
+        """
+        Test the siblings set as the fixture is loaded, which are those that a rebuild sets
+        """
+        gpu = Version.objects.get(application__name='TensorFlow', version='1.13.1-fosscuda-2018b-Python-3.6.6')
+        cpu = Version.objects.get(application__name='TensorFlow', version='1.13.1-foss-2018b-Python-3.6.6')
+        self.assertEqual((gpu.sibling, gpu.sibling_is_gpu, gpu.cuda), (cpu, False, True))
+        self.assertEqual((cpu.sibling, cpu.sibling_is_gpu, cpu.cuda), (gpu, True, False))
+        self.assertIsNone(Version.objects.get(application__name='MATLAB', version='R2018b').sibling)
+        self.assertEqual(update_siblings(), 0)
+
+    def test_kept_up_to_date(self):
+        """
+        Test that a version becomes the sibling of another as it is added, and stops as it is deleted
+        """
+        application = Application.objects.create(name='GROMACS', description='Molecular dynamics')
+        cpu = Version.objects.create(application=application, version='2021.3-foss-2021a',
+                                     module_load='GROMACS/2021.3-foss-2021a', created=timezone.now(),
+                                     modified=timezone.now())
+        self.assertIsNone(cpu.sibling)
+
+        gpu = Version.objects.create(application=application, version='2021.3-foss-2021a-CUDA-11.3.1',
+                                     module_load='GROMACS/2021.3-foss-2021a-CUDA-11.3.1', created=timezone.now(),
+                                     modified=timezone.now())
+        cpu.refresh_from_db()
+        gpu.refresh_from_db()
+        self.assertEqual((cpu.sibling, cpu.sibling_is_gpu, cpu.cuda), (gpu, True, False))
+        self.assertEqual((gpu.sibling, gpu.sibling_is_gpu, gpu.cuda), (cpu, False, True))
+
+        gpu.delete()
+        cpu.refresh_from_db()
+        self.assertEqual((cpu.sibling, cpu.sibling_is_gpu), (None, False))
+
+    def test_rebuild_siblings(self):
+        """
+        Test that the command sets the siblings of every version
+        """
+        Version.objects.update(sibling=None, sibling_is_gpu=False, cuda=False)
+        out = StringIO()
+        call_command('rebuild_siblings', stdout=out)
+        self.assertTrue(Version.objects.get(application__name='PyTorch').cuda)
+        with_sibling = Version.objects.filter(sibling__isnull=False).count()
+        self.assertEqual(with_sibling, 4)
+        self.assertEqual(out.getvalue(), "Updated %d versions, %d of them with a sibling\n"
+                         % (Version.objects.filter(cuda=True).count() + with_sibling // 2, with_sibling))
@@ -0,0 +1,111 @@
+import json
+import os
+import re
+import sys
+import tempfile
+from django.db import connection
+from django.db.models import Count
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from unittest.mock import patch
+from bear_applications.models import Link, Version
+from bear_applications.tests.budgets import QUERY_BUDGETS, QueryBudgetMixin
+
+sys.path.insert(0, "../../scripts")
+from add_module_tree import load_trees
+from synthetic_modules import filename_regex, generate_tree, module_directories
+
+
+def page_urls():
+    """
+    Returns the URL of each page, for the version with the most dependents and its application
+    """
+    version = (Version.objects.filter(is_visible=True, visible_link_count__gt=0).annotate(dependents=Count('requires'))
+                              .order_by('-dependents', 'id').select_related('application')[0])
+    link = Link.objects.filter(version=version, bearappsversion__hidden=False, architecture__hidden=False)[0]
+    bav, arch = link.bearappsversion.displayed_name, link.architecture.displayed_name
+    name = version.application.name
+    return [reverse('bear_applications:home'),
+            reverse('bear_applications:applications'),
+            reverse('bear_applications:applications') + '?start=' + name[0],
+            reverse('bear_applications:application', kwargs={'name': name}),
+            reverse('bear_applications:application_version',
+                    kwargs={'bavname': bav, 'name': name, 'version': version.version}),
+            reverse('bear_applications:filter_options'),
+            reverse('bear_applications:filter', kwargs={'bearappsversion': bav}),
+            reverse('bear_applications:filter', kwargs={'bearappsversion': bav, 'arch': arch}),
+            reverse('bear_applications:filter', kwargs={'bearappsversion': 'all', 'arch': arch}),
+            reverse('bear_applications:filter', kwargs={'bearappsversion': bav, 'arch': arch}) + '?start=' + name[0],
+            reverse('bear_applications:search') + '?search=' + name[:3],
+            reverse('bear_applications:sitemap'),
+            reverse('bear_applications:latest-applications-feed'),
+            reverse('bear_applications:api_applications'),
+            reverse('bear_applications:api_versions'),
+            reverse('bear_applications:api_version', kwargs={'name': name, 'version': version.version})]
+
+
+class TimingTestCase(QueryBudgetMixin, TestCase):
+    """
+    Test the per-request timings, and the query budgets of the pages
+    """
+    fixtures = ['db.json']
+
+    def test_timing(self):
+        """
+        Test that the queries and the view are recorded
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('bear_applications:application', kwargs={'name': 'MATLAB'}))
+        timing = response.wsgi_request.timing
+        self.assertEqual(timing.view, 'bear_applications:application')
+        self.assertEqual(timing.queries, len(queries))
+        self.assertGreater(timing.template, 0)
+        self.assertGreaterEqual(timing.total, timing.template)
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    @override_settings(SERVER_TIMING=True)
+    def test_server_timing(self):
+        """
+        Test the Server-Timing header
+        """
+        response = self.client.get(reverse('bear_applications:applications'))
+        self.assertRegex(response['Server-Timing'],
+                         r'^db;dur=[\d.]+;desc="2 queries", template;dur=[\d.]+, total;dur=[\d.]+$')
+
+    @override_settings(TIMING_LOG_SAMPLE_RATE=1)
+    def test_log(self):
+        """
+        Test that the timings are logged as JSON
+        """
+        with self.assertLogs('bear_applications.timing', 'INFO') as log:
+            self.client.get(reverse('bear_applications:applications'))
+            self.client.get(reverse('bear_applications:application', kwargs={'name': 'Nothing'}))
+        logged = [json.loads(re.sub(r'^INFO:bear_applications.timing:', '', line)) for line in log.output]
+        self.assertEqual([(line['view'], line['status'], line['queries']) for line in logged],
+                         [('bear_applications:applications', 200, 2), ('bear_applications:application', 404, 2)])
+        self.assertEqual(set(logged[0]), {'view', 'method', 'path', 'status', 'queries', 'db_ms', 'template_ms',
+                                          'total_ms'})
+
+    def test_budgets(self):
+        """
+        Test that the pages are within their budgets with the fixture
+        """
+        urls = page_urls()
+        for url in urls:
+            self.assertWithinBudget(url)
+        self.assertEqual({self.client.get(url).wsgi_request.timing.view for url in urls}, set(QUERY_BUDGETS))
+
+    def test_budgets_synthetic(self):
+        """
+        Test that the pages are within the same budgets with a bigger, synthetic catalog
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            base = os.path.realpath(tmpdir)
+            generate_tree(base, bavs=2, archs=2, apps=150)
+            with patch("add_module_info.re_filename_eb", filename_regex(base)):
+                load_trees(module_directories(base, bavs=2, archs=2), jobs=1)
+        self.assertGreater(Version.objects.count(), 300)
+
+        for url in page_urls():
+            self.assertWithinBudget(url)
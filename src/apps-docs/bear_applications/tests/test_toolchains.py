@@ -0,0 +1,38 @@
+from django.core.management import call_command
+from django.test import TestCase
+from io import StringIO
+from bear_applications.models import Version
+from bear_applications.toolchains import toolchain_family
+
+
+class ToolchainsTestCase(TestCase):
+    """
+    Test the toolchain families of the versions
+    """
+    fixtures = ['db.json']
+
+    def test_toolchain_family(self):
+        """
+        Test that the toolchains are mapped to their families
+        """
+        self.assertEqual(toolchain_family('3.8.6-foss-2019b'), 'foss')
+        self.assertEqual(toolchain_family('1.2-fosscuda-2020a'), 'foss')
+        self.assertEqual(toolchain_family('3.10.1-GCCcore-10.2.0'), 'GCC')
+        self.assertEqual(toolchain_family('0.5-GCCcore-8.3.0-Python-3.7.4'), 'GCC')
+        self.assertEqual(toolchain_family('4.1-foss-2021a-CUDA-11.3.1'), 'foss')
+        self.assertEqual(toolchain_family('2021.2.0-intel-compilers-2021.2.0'), 'intel')
+        self.assertEqual(toolchain_family('11.1-CUDA-11.1.1'), 'system')
+        self.assertEqual(toolchain_family('R2018b'), 'system')
+
+    def test_rebuild(self):
+        """
+        Test that the versions store their families, and that the command rebuilds them
+        """
+        self.assertFalse([ver.version for ver in Version.objects.all()
+                          if ver.toolchain != toolchain_family(ver.version)])
+        Version.objects.update(toolchain='')
+        out = StringIO()
+        call_command('rebuild_toolchains', stdout=out)
+        self.assertEqual(out.getvalue(), 'Updated %d versions\n' % Version.objects.count())
+        self.assertFalse([ver.version for ver in Version.objects.all()
+                          if ver.toolchain != toolchain_family(ver.version)])
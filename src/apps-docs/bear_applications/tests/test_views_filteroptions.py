@@ -2,6 +2,7 @@ from collections import ChainMap
 from django.conf import settings
 from django.test import TestCase, override_settings
 from django.urls import reverse
+from bear_applications.models import Link
 
 
 class FilterOptionsTestCase(TestCase):
@@ -54,3 +55,31 @@ class FilterOptionsTestCase(TestCase):
         self.assertEqual("2019h", response.context['bearappversions'][4]['bav'])
         self.assertEqual(len(response.context['architectures']), 2)
         self.assertEqual(len(response.context['combos']), 5)
+
+    @override_settings(WEBSITE_SITE_CONFIG=ChainMap({'DISPLAY_ARCH': True, 'BAV_ORDER': 'desc'},
+                       settings.WEBSITE_SITE_CONFIG),
+                       CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_filter_options_counts(self):
+        """
+        Test the number of applications in each combination, and that the page is cached until the catalog
+        changes
+        """
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('bear_applications:filter_options'))
+        for combo in response.context['combos']:
+            self.assertEqual(combo['applications'],
+                             Link.objects.filter(version__is_visible=True, bearappsversion__displayed_name=combo['bav'],
+                                                 architecture__displayed_name=combo['arch'])
+                                         .values('version__application').distinct().count())
+        self.assertContains(response, '%s: %s</a> (%d application' % (
+            combo['bav'], combo['arch'], combo['applications']))
+
+        # only looking up the state of the catalog
+        with self.assertNumQueries(1):
+            self.client.get(reverse('bear_applications:filter_options'))
+
+        Link.objects.filter(bearappsversion__displayed_name=combo['bav'], architecture__displayed_name=combo['arch'],
+                            version__is_visible=True).delete()
+        response = self.client.get(reverse('bear_applications:filter_options'))
+        self.assertNotIn((combo['bav'], combo['arch']),
+                         [(other['bav'], other['arch']) for other in response.context['combos']])
@@ -1,5 +1,12 @@
-from django.test import TestCase
+from django.db import connection
+from django.db.models import Value
+from django.test import TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
+from bear_applications.facets import facet_counts, result_rows
+from bear_applications.models import Application, Architecture, BearAppsVersion, Link, Version
+from bear_applications.search import has_fts, update_documents
+from bear_applications.visibility import update_visibility
 
 
 class SearchTestCase(TestCase):
@@ -272,3 +279,100 @@ class SearchTestCase(TestCase):
         self.assertEqual(len(response.context['appversions']), 1)
         self.assertEqual(response.context['searched'],
                          {'name': 'unusual', 'and_or': 'and', 'partial_exact': 'partial'})
+
+    def test_search_ranked_by_name(self):
+        """
+        search page, versions of an application whose name matches come before those that only mention it
+        """
+        application = Application.objects.create(name='Apptainer', description='Formerly known as Singularity')
+        version = Version.objects.create(application=application, version='1.1.9', module_load='Apptainer/1.1.9',
+                                         created=timezone.now(), modified=timezone.now())
+        Link.objects.create(version=version, bearappsversion=BearAppsVersion.objects.get(name='system'),
+                            architecture=Architecture.objects.get(name='system'))
+        response = self.client.get(reverse('bear_applications:search'), {'search': 'singularity'})
+        self.assertEqual([appver['name'] for appver in response.context['appversions']], ['Singularity', 'Apptainer'])
+
+    def test_search_query_count(self):
+        """
+        search page, the number of queries doesn't grow with the number of results
+        """
+        application = Application.objects.create(name='Manyversions', description='An application with many versions')
+        Version.objects.bulk_create([Version(application=application, version='1.%d' % i,
+                                             module_load='Manyversions/1.%d' % i,
+                                             created=timezone.now(), modified=timezone.now()) for i in range(300)])
+        versions = Version.objects.filter(application=application)
+        Link.objects.bulk_create([Link(version=version, bearappsversion=bav, architecture=arch)
+                                  for version in versions
+                                  for bav in BearAppsVersion.objects.filter(name__in=['2019a', '2017a'])
+                                  for arch in Architecture.objects.filter(name__in=['EL7-haswell', 'EL7-p9'])])
+        # which bulk_create doesn't update
+        update_visibility([version.id for version in versions])
+        update_documents([version.id for version in versions])
+        # which looks up the tables once
+        has_fts()
+
+        # the state of the catalog for the ETag, the matching versions, their links and the counts of the facets
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('bear_applications:search'), {'search': 'manyversions'})
+        appversions = response.context['appversions']
+        self.assertEqual(len(appversions), 600)
+        self.assertTrue(all(appver['supported'] and not appver['deprecated'] for appver in appversions))
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_search_facets(self):
+        """
+        search page, the facets count the versions in the results, and narrow them down without matching the
+        text again
+        """
+        response = self.client.get(reverse('bear_applications:search'), {'search': 'a'})
+        facets = {facet['name']: {value['value']: value for value in facet['values']}
+                  for facet in response.context['facets']}
+        self.assertEqual(set(facets), {'BEAR Apps Version', 'Architecture', 'Status', 'Toolchain'})
+        versions = {(appver['name'], appver['ver']) for appver in response.context['appversions']}
+        self.assertEqual(sum(value['count'] for value in facets['Toolchain'].values()), len(versions))
+        self.assertEqual(sum(value['count'] for value in facets['Status'].values()), len(versions))
+
+        foss = facets['Toolchain']['foss']
+        self.assertEqual(foss['url'], '?search=a&toolchain=foss')
+        # the state of the catalog, and the links and the counts of the facets of the cached matching versions
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('bear_applications:search') + foss['url'])
+        self.assertEqual(len({(appver['name'], appver['ver']) for appver in response.context['appversions']}),
+                         foss['count'])
+        self.assertEqual({Version.objects.get(application__name=appver['name'], version=appver['ver']).toolchain
+                          for appver in response.context['appversions']}, {'foss'})
+        self.assertEqual(response.context['selected'], {'toolchain': 'foss'})
+        toolchains = response.context['facets'][-1]['values']
+        self.assertEqual([(value['value'], value['selected'], value['url']) for value in toolchains],
+                         [('foss', True, '?search=a')])
+        self.assertContains(response, '<strong>foss</strong>')
+
+        bav, count = next((value, facet['count']) for value, facet in facets['BEAR Apps Version'].items())
+        response = self.client.get(reverse('bear_applications:search'), {'search': 'a', 'bav': bav})
+        self.assertEqual({appver['bav'] for appver in response.context['appversions']}, {bav})
+        self.assertEqual(len(response.context['appversions']), count)
+
+        response = self.client.get(reverse('bear_applications:search'), {'search': 'a', 'arch': 'Nothing'})
+        self.assertEqual(len(response.context['appversions']), 0)
+        self.assertContains(response, 'No results found!')
+
+    def test_search_facets_many_versions(self):
+        """
+        Test that the results and facets of many versions are worked out in chunks, each with no more parameters
+        than SQLite allows
+        """
+        version_ids = list(Version.objects.values_list('id', flat=True))
+        # versions that don't exist, which match no links
+        padded = version_ids + list(range(max(version_ids) + 1, max(version_ids) + 12000))
+        params = []
+
+        def count_params(execute, sql, query_params, many, context):
+            params.append(len(query_params or ()))
+            return execute(sql, query_params, many, context)
+
+        with connection.execute_wrapper(count_params):
+            counts = facet_counts(padded, {})
+            rows = result_rows(padded, Value(0), {})
+        self.assertLessEqual(max(params), 32766)
+        self.assertEqual(counts, facet_counts(version_ids, {}))
+        self.assertEqual(len(rows), len(result_rows(version_ids, Value(0), {})))
@@ -2,6 +2,14 @@ from collections import ChainMap
 from django.conf import settings
 from django.test import TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
+from bear_applications.models import (Application, Architecture, BearAppsVersion, CurrentVersion, Gpu, Link,
+                                      ParagraphData, Version)
+
+
+# the generation, the version, its paragraphs, those of the application, its dependencies, what requires it, its
+# architectures and their GPUs, the BEAR Apps Version and the other versions
+QUERIES = 10
 
 
 class VersionTestCase(TestCase):
@@ -333,3 +341,37 @@ class VersionTestCase(TestCase):
         self.assertEqual(len(response.context['application'].dependencies.all()), 0)
         self.assertEqual(len(response.context['application'].requires.all()), 0)
         self.assertEqual(len(response.context['multideps']), 0)
+
+    def test_query_count(self):
+        """
+        Test that the page takes the same number of queries however many dependencies, dependents and paragraphs
+        the version has
+        """
+        now = timezone.now()
+        bav = BearAppsVersion.objects.get(name='2019a')
+        arch = Architecture.objects.get(name='EL7-haswell')
+        Gpu.objects.get_or_create(name='A100', architecture=arch)
+        application = Application.objects.create(name='GCCcore', description='The GNU Compiler Collection')
+        gcccore = Version.objects.create(application=application, version='8.2.0-fosscuda-2019a',
+                                         module_load='GCCcore/8.2.0-fosscuda-2019a', created=now, modified=now)
+        CurrentVersion.objects.create(application=application, version=gcccore)
+        Link.objects.create(version=gcccore, bearappsversion=bav, architecture=arch)
+        url = reverse('bear_applications:application_version', args=['2019a', 'GCCcore', '8.2.0-fosscuda-2019a'])
+
+        with self.assertNumQueries(QUERIES):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        for i in range(20):
+            ParagraphData.objects.create(version=gcccore, header='Header %d' % i, content='Content %d' % i)
+            ParagraphData.objects.create(application=application, header='App header %d' % i, content='App %d' % i)
+        others = [Version.objects.create(application=Application.objects.create(name='Dependent%d' % i),
+                                         version='1.%d' % i, created=now, modified=now)
+                  for i in range(100)]
+        gcccore.requires.add(*others)
+        gcccore.dependencies.add(*others[:30])
+
+        with self.assertNumQueries(QUERIES):
+            response = self.client.get(url)
+        self.assertContains(response, 'Dependent99/1.99')
+        self.assertContains(response, 'App header 19')
+        self.assertContains(response, 'A100')
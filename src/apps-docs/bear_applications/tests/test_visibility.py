@@ -0,0 +1,104 @@
+import sys
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from unittest.mock import patch
+from bear_applications.caching import catalog_state
+from bear_applications.models import (Application, Architecture, BearAppsVersion, Link, ParagraphData,
+                                      SearchDocument, Version)
+from bear_applications.signals import deferred_updates
+from bear_applications.visibility import update_visibility
+
+sys.path.insert(0, "../../scripts")
+from architecture import set_visibility
+from bear_apps_version import mark_deprecated, mark_not_supported
+from hide import _hide_obj
+
+FLAGS = ['is_visible', 'visible_link_count', 'all_links_deprecated', 'all_links_unsupported',
+         'has_deprecated_link', 'has_unsupported_link']
+
+
+class VisibilityTestCase(TestCase):
+    """
+    Test the visibility and status flags of versions
+    """
+    fixtures = ['db.json']
+
+    def _flags(self, version):
+        return list(Version.objects.filter(pk=version.pk).values_list(*FLAGS).get())
+
+    def test_fixture_flags(self):
+        """
+        Test that the flags set as the fixture is loaded are those that a rebuild sets
+        """
+        flags = list(Version.objects.order_by('id').values('id', *FLAGS))
+        update_visibility()
+        self.assertEqual(list(Version.objects.order_by('id').values('id', *FLAGS)), flags)
+        self.assertFalse(Version.objects.get(application__name='Python', version='2.7.12-foss-2012a').is_visible)
+        self.assertTrue(Version.objects.get(application__name='MATLAB', version='R2018b').is_visible)
+
+    @patch.dict("os.environ", {"USER": "me"})
+    def test_kept_up_to_date(self):
+        """
+        Test that linking versions, and the scripts that hide, deprecate and unsupport things, change the flags
+        """
+        application = Application.objects.create(name='Apptainer', description='Containers')
+        version = Version.objects.create(application=application, version='1.1.9', module_load='Apptainer/1.1.9',
+                                         created=timezone.now(), modified=timezone.now())
+        self.assertEqual(self._flags(version), [True, 0, False, False, False, False])
+
+        haswell = Architecture.objects.get(name='EL7-haswell')
+        Link.objects.create(version=version, bearappsversion=BearAppsVersion.objects.get(name='2019b'),
+                            architecture=haswell)
+        Link.objects.create(version=version, bearappsversion=BearAppsVersion.objects.get(name='2019a'),
+                            architecture=Architecture.objects.get(name='EL7-p9'))
+        self.assertEqual(self._flags(version), [True, 2, False, False, False, False])
+
+        mark_deprecated(bear_application_version=BearAppsVersion.objects.get(name='2019b'))
+        self.assertEqual(self._flags(version), [True, 2, False, False, True, False])
+
+        set_visibility(arch=Architecture.objects.get(name='EL7-p9'), hidden=True)
+        self.assertEqual(self._flags(version), [True, 1, True, False, True, False])
+
+        mark_not_supported(bear_application_version=BearAppsVersion.objects.get(name='2019a'))
+        self.assertEqual(self._flags(version), [True, 1, True, False, True, True])
+
+        _hide_obj(obj_to_hide=application, reason="Bye Bye")
+        self.assertEqual(self._flags(version), [False, 1, True, False, True, True])
+
+    def test_deferred_updates(self):
+        """
+        Test that within deferred_updates the flags, search documents and generation are brought up to date once,
+        at the end
+        """
+        before = catalog_state().generation
+        application = Application.objects.create(name='Apptainer', description='Containers')
+        with deferred_updates():
+            with self.assertNumQueries(4):
+                version = Version.objects.create(application=application, version='1.1.9',
+                                                 module_load='Apptainer/1.1.9', created=timezone.now(),
+                                                 modified=timezone.now())
+                Link.objects.create(version=version, bearappsversion=BearAppsVersion.objects.get(name='2019b'),
+                                    architecture=Architecture.objects.get(name='EL7-haswell'))
+            with deferred_updates():
+                ParagraphData.objects.create(application=application, header='Usage', content='apptainer run')
+            self.assertEqual(self._flags(version), [True, 0, False, False, False, False])
+            self.assertFalse(SearchDocument.objects.filter(version=version).exists())
+        self.assertEqual(self._flags(version), [True, 1, False, False, False, False])
+        self.assertIn('apptainer run', SearchDocument.objects.get(version=version).other)
+        self.assertGreater(catalog_state().generation, before)
+
+    def test_rebuild_visibility(self):
+        """
+        Test that the command sets the flags of every version
+        """
+        Version.objects.update(is_visible=True, visible_link_count=0)
+        out = StringIO()
+        call_command('rebuild_visibility', stdout=out)
+        self.assertFalse(Version.objects.get(application__name='Python', version='2.7.12-foss-2012a').is_visible)
+        self.assertEqual(Version.objects.get(application__name='MATLAB', version='R2018b').visible_link_count,
+                         Link.objects.filter(version__application__name='MATLAB', version__version='R2018b',
+                                             bearappsversion__hidden=False, architecture__hidden=False).count())
+        self.assertEqual(out.getvalue(), "Updated %d versions, %d of them visible\n"
+                         % (Version.objects.count(), Version.objects.filter(is_visible=True).count()))
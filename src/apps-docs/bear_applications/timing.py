@@ -0,0 +1,125 @@
+"""
+Per-request timings. TimingMiddleware records, for each request, the number of queries and the time they took,
+the time taken rendering templates (including the queries run as they are rendered) and the total time, along
+with the name of the URL that the request resolved to. These are
+
+- in a Server-Timing header on the response if settings.SERVER_TIMING is True, which the developer tools of
+  browsers show alongside the request
+- logged as JSON to the bear_applications.timing logger for a fraction settings.TIMING_LOG_SAMPLE_RATE of the
+  requests
+- on request.timing, which the tests use to check the queries each page runs, see tests/budgets.py
+
+The template time needs the templates to be loaded by the DjangoTemplates backend in this module, see
+settings.TEMPLATES.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+from django.template.backends import django as django_backend
+
+logger = logging.getLogger(__name__)
+
+# the Timing of the request being handled by this thread
+_current = threading.local()
+
+
+class Timing:
+    """
+    The timings of a request, which counts and times the queries run on a connection, see
+    connection.execute_wrapper
+    """
+
+    def __init__(self):
+        self.view = None
+        self.queries = 0
+        self.db = 0.0
+        self.template = 0.0
+        self.total = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db += time.perf_counter() - start
+
+    def server_timing(self):
+        """
+        Returns the value of the Server-Timing header, with the times in milliseconds
+        """
+        return 'db;dur=%.1f;desc="%d queries", template;dur=%.1f, total;dur=%.1f' % (
+            self.db * 1000, self.queries, self.template * 1000, self.total * 1000)
+
+    def as_dict(self):
+        return {'view': self.view, 'queries': self.queries, 'db_ms': round(self.db * 1000, 1),
+                'template_ms': round(self.template * 1000, 1), 'total_ms': round(self.total * 1000, 1)}
+
+
+class TimedTemplate:
+    """
+    A template of the DjangoTemplates backend, whose render adds the time it takes to the Timing of the request
+    """
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        timing = getattr(_current, 'timing', None)
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            if timing is not None:
+                timing.template += time.perf_counter() - start
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """
+    The DjangoTemplates backend, timing the templates it renders
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+class TimingMiddleware:
+    """
+    Record the timings of each request
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timing = request.timing = _current.timing = Timing()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timing))
+                response = self.get_response(request)
+        finally:
+            _current.timing = None
+        # which is only until the start of the content of streaming responses
+        timing.total = time.perf_counter() - start
+        if request.resolver_match is not None:
+            timing.view = request.resolver_match.view_name
+
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = timing.server_timing()
+        if random.random() < settings.TIMING_LOG_SAMPLE_RATE:
+            logger.info(json.dumps(dict(timing.as_dict(), method=request.method, path=request.path,
+                                        status=response.status_code)))
+        return response
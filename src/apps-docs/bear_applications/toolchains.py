@@ -0,0 +1,60 @@
+"""
+The toolchain family of each Version, which is stored on it as it is saved, so that the search page can count
+and narrow down its results by it (see facets.py) without parsing every version.
+
+An EasyBuild version is <version>-<toolchain>-<toolchain version><suffix>, e.g. 3.8.6-foss-2019b. The toolchain
+is mapped to its family by TOOLCHAIN_FAMILIES, so that the CPU and GPU builds, and the compiler-only
+subtoolchains, are counted together. Versions without a known toolchain, e.g. R2018b, are in the system family.
+After changing TOOLCHAIN_FAMILIES, run the rebuild_toolchains command.
+"""
+import re
+
+from .models import Version
+
+CHUNK_SIZE = 500
+
+TOOLCHAIN_FAMILIES = {
+    'foss': 'foss',
+    'fosscuda': 'foss',
+    'gompi': 'foss',
+    'gompic': 'foss',
+    'GCC': 'GCC',
+    'GCCcore': 'GCC',
+    'gcccuda': 'GCC',
+    'intel': 'intel',
+    'intelcuda': 'intel',
+    'iimpi': 'intel',
+    'iimpic': 'intel',
+    'iccifort': 'intel',
+    'intel-compilers': 'intel',
+    'iomkl': 'iomkl',
+    'iomklc': 'iomkl',
+    'iompi': 'iomkl',
+    'iompic': 'iomkl',
+    'NVHPC': 'NVHPC',
+    'nvompi': 'NVHPC',
+}
+SYSTEM = 'system'
+# a toolchain is followed by its version, which starts with a digit
+TOOLCHAIN = re.compile(r'-([A-Za-z][\w-]*?)-\d')
+
+
+def toolchain_family(version):
+    """
+    Returns the family of the toolchain that version is built with
+    """
+    for toolchain in TOOLCHAIN.findall(version):
+        if toolchain in TOOLCHAIN_FAMILIES:
+            return TOOLCHAIN_FAMILIES[toolchain]
+    return SYSTEM
+
+
+def update_toolchains():
+    """
+    Bring the toolchain family of every version up to date. Returns the number of versions that changed.
+    """
+    changed = [Version(id=pk, toolchain=toolchain_family(version))
+               for pk, version, toolchain in Version.objects.values_list('id', 'version', 'toolchain').iterator()
+               if toolchain_family(version) != toolchain]
+    Version.objects.bulk_update(changed, ['toolchain'], batch_size=CHUNK_SIZE)
+    return len(changed)
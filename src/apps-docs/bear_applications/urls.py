@@ -1,7 +1,8 @@
 from django.conf import settings
 from django.urls import path
 from django.views.generic import TemplateView
-from . import views
+from . import api, views
+from .caching import cache_by_generation, catalog_condition
 
 from django.contrib.sitemaps.views import sitemap
 from .sitemaps import (ApplicationSitemap, ArchitectureSitemap, BEARAppsVersionSitemap,
@@ -22,7 +23,7 @@ sitemaps = {
 app_name = 'bear_applications'
 urlpatterns = [
     path('', views.home, name='home'),
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='sitemap'),
+    path('sitemap.xml', catalog_condition(cache_by_generation(sitemap)), {'sitemaps': sitemaps}, name='sitemap'),
     path('index', views.home, name='home'),
     path('search', views.search, name='search'),
     path('filter', views.filter_options, name='filter_options'),
@@ -42,5 +43,10 @@ urlpatterns = [
          name='accessibility'),
     path('help', TemplateView.as_view(template_name=f"bear_applications/{settings.WEBSITE_SITE_CONFIG['HELP_PAGE']}"),
          name='help'),
-    path('latest-applications-feed', LatestApplicationsFeed(), name='latest-applications-feed'),
+    path('latest-applications-feed', catalog_condition(cache_by_generation(LatestApplicationsFeed())),
+         name='latest-applications-feed'),
+    path('api/applications', api.applications, name='api_applications'),
+    path('api/versions', api.versions, name='api_versions'),
+    path('api/versions/<str:name>/<str:version>', api.version, name='api_version'),
+    path('api/dump', api.dump, name='api_dump'),
 ]
@@ -0,0 +1,60 @@
+"""
+The visibility and status flags of each Version, which are worked out from the version, its application,
+its links and their BEAR Apps Versions and architectures, and stored on it so that the pages can filter
+on them without the joins:
+
+- is_visible: neither the version nor its application is hidden
+- visible_link_count: the number of its links to a BEAR Apps Version and architecture that aren't hidden
+- all_links_deprecated: it has visible links, and they are all to deprecated BEAR Apps Versions
+- all_links_unsupported: it has visible links, and they are all to unsupported BEAR Apps Versions
+- has_deprecated_link: any of its links, visible or not, is to a deprecated BEAR Apps Version
+- has_unsupported_link: any of its links, visible or not, is to an unsupported BEAR Apps Version
+"""
+from django.db import transaction
+from django.db.models import BooleanField, Case, Count, Exists, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import Application, Link, Version
+
+CHUNK_SIZE = 500
+
+
+def _flags():
+    """
+    Returns the expressions that work out the flags of each version, for QuerySet.update
+    """
+    all_links = Link.objects.filter(version=OuterRef('pk'))
+    links = all_links.filter(bearappsversion__hidden=False, architecture__hidden=False)
+    link_count = links.order_by().values('version').annotate(count=Count('id')).values('count')
+    return {
+        'is_visible': Case(When(reason_to_hide=None,
+                                then=Exists(Application.objects.filter(pk=OuterRef('application_id'),
+                                                                       reason_to_hide=None))),
+                           default=Value(False), output_field=BooleanField()),
+        'visible_link_count': Coalesce(Subquery(link_count, output_field=IntegerField()), Value(0)),
+        'all_links_deprecated': Case(When(Exists(links.filter(bearappsversion__deprecated=False)), then=Value(False)),
+                                     When(Exists(links), then=Value(True)),
+                                     default=Value(False), output_field=BooleanField()),
+        'all_links_unsupported': Case(When(Exists(links.filter(bearappsversion__supported=True)), then=Value(False)),
+                                      When(Exists(links), then=Value(True)),
+                                      default=Value(False), output_field=BooleanField()),
+        'has_deprecated_link': Exists(all_links.filter(bearappsversion__deprecated=True)),
+        'has_unsupported_link': Exists(all_links.filter(bearappsversion__supported=False)),
+    }
+
+
+def update_visibility(version_ids=None):
+    """
+    Bring the flags of these versions, or of all of them if version_ids is None, up to date
+    """
+    flags = _flags()
+
+    if version_ids is None:
+        Version.objects.update(**flags)
+        return
+
+    version_ids = sorted(set(version_ids))
+    # this is run on every write, so there is no savepoint of its own
+    with transaction.atomic(savepoint=False):
+        for start in range(0, len(version_ids), CHUNK_SIZE):
+            Version.objects.filter(id__in=version_ids[start:start + CHUNK_SIZE]).update(**flags)
@@ -42,3 +42,22 @@ DATABASES = {
 # if 'test' in sys.argv or 'test_coverage' in sys.argv:  # Covers regular testing and django-coverage
 #     DATABASES['default']['ENGINE'] = 'django.db.backends.sqlite3'
 #     DATABASES['default']['NAME'] = os.path.join(BASE_DIR, 'bear_apps_docs_TEST.sqlite3')
+
+# The cache of rendered pages, which should be shared by the processes serving the site
+# CACHES = {
+#     'default': {
+#         'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+#         'LOCATION': '/var/tmp/bear_apps_docs_cache',
+#     }
+# }
+# Which changes the cache keys of the pages on each deployment, rather than a hash of the code and templates
+# PAGE_CACHE_VERSION = '2022.1'
+
+# Per-request timings: a Server-Timing header on each response, and a JSON log line for a sample of the requests
+# SERVER_TIMING = True
+# TIMING_LOG_SAMPLE_RATE = 0.01
+# LOGGING = {
+#     'version': 1,
+#     'handlers': {'timing': {'class': 'logging.FileHandler', 'filename': '/var/log/bear_apps_docs/timing.log'}},
+#     'loggers': {'bear_applications.timing': {'handlers': ['timing'], 'level': 'INFO'}},
+# }
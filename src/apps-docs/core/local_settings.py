@@ -0,0 +1,37 @@
+"""
+Settings that are specific to this particular instance of the project.
+This can contain sensitive information (such as keys) and should not be shared with others.
+
+REMEMBER: If modfiying the content of this file, reflect the changes in local_settings.example.py
+"""
+
+import os
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# This SECRET_KEY is only for running the unit tests - DO NOT USE IN PRODUCTION
+SECRET_KEY = '9e&^04)hg^ycvlawc_qwg4!!k5%xo6n=weg(=!cq!*5$sjls&$'
+
+# Set to True if in development, or False is in production
+DEBUG = True
+
+# Set to ['*'] if in development, or specific IP addresses and domains if in production
+ALLOWED_HOSTS = ['*']
+
+# Website config file
+WEBSITE_SITE_CONFIG_FILE = "bear.json"
+
+# Set the database name below
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'bear_apps_docs_TEST.sqlite3'),
+    }
+}
+
+# Don't cache pages between requests, apart from in the tests of the caching
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    }
+}
@@ -28,3 +28,10 @@ DATABASES = {
         'NAME': os.path.join(BASE_DIR, 'bear_apps_docs_TEST.sqlite3'),
     }
 }
+
+# Don't cache pages between requests, apart from in the tests of the caching
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    }
+}
@@ -33,11 +33,16 @@ INSTALLED_APPS = [
     'django.contrib.sitemaps',
 ]
 
+MIDDLEWARE = [
+    'bear_applications.timing.TimingMiddleware',
+]
+
 ROOT_URLCONF = 'core.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, timing the templates as they are rendered, see bear_applications/timing.py
+        'BACKEND': 'bear_applications.timing.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, "core/templates")],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -57,6 +62,23 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 DEBUG = False  # can be overridden in local_settings.py
 
+# Rendered pages are cached until the catalog changes, see bear_applications/caching.py
+# Can be overridden in local_settings.py, e.g. with a FileBasedCache shared by the processes serving the site
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+# Part of the cache keys and ETags of the pages, so that they change when the code does
+# If empty a hash of the code and templates is used, see bear_applications/caching.py
+PAGE_CACHE_VERSION = ''
+
+# Per-request timings, see bear_applications/timing.py
+# Whether to add them to the responses in a Server-Timing header, and the fraction of requests to log them for
+SERVER_TIMING = False
+TIMING_LOG_SAMPLE_RATE = 0.0
+
 WSGI_APPLICATION = 'core.wsgi.application'
 
 LANGUAGE_CODE = 'en-gb'